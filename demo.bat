@@ -36,7 +36,7 @@ taskkill /FI "WindowTitle eq Renode Simulator*" /T /F >nul 2>&1
 echo.
 echo [Step 3/3] Generating report...
 echo ----------------------------------------
-python scripts\analyze_results.py
+python scripts\analyze_results.py --csv
 
 echo.
 echo ================================================================================
@@ -45,6 +45,7 @@ echo ===========================================================================
 echo.
 echo Generated Files:
 echo   - reports\PROJECT_REPORT.txt       (Comprehensive report with statistics)
+echo   - reports\simulation_data.npz      (Raw data, typed binary columns)
 echo   - reports\simulation_data.csv      (Raw data for Excel graphs)
 echo   - reports\uart_output.txt          (Raw UART output)
 echo.
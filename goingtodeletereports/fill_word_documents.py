@@ -8,21 +8,8 @@ import os
 import sys
 from datetime import datetime
 
-try:
-    from docx import Document
-    from docx.shared import Pt, Inches, RGBColor
-    from docx.enum.text import WD_ALIGN_PARAGRAPH
-    from docx.enum.style import WD_STYLE_TYPE
-except ImportError:
-    print("ERROR: python-docx library not installed!")
-    print("Installing now...")
-    import subprocess
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "python-docx"])
-    from docx import Document
-    from docx.shared import Pt, Inches, RGBColor
-    from docx.enum.text import WD_ALIGN_PARAGRAPH
-    from docx.enum.style import WD_STYLE_TYPE
-    print("✓ python-docx installed successfully!")
+# python-docx is imported inside the functions that build documents, never at
+# module load and never installed automatically
 
 # Project data
 PROJECT_DATA = {
@@ -71,12 +58,15 @@ PROJECT_DATA = {
 
 def add_heading_custom(doc, text, level=1):
     """Add a custom styled heading"""
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
     heading = doc.add_heading(text, level=level)
     heading.alignment = WD_ALIGN_PARAGRAPH.LEFT
     return heading
 
 def add_placeholder_image(doc, caption):
     """Add a placeholder for image with caption"""
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.shared import Pt, RGBColor
     p = doc.add_paragraph()
     p.alignment = WD_ALIGN_PARAGRAPH.CENTER
     run = p.add_run(f"\n[INSERT IMAGE: {caption}]\n")
@@ -250,6 +240,10 @@ def add_table_bill_of_materials(doc):
 
 def fill_synopsis(doc_path, output_path):
     """Fill the synopsis document"""
+    from docx import Document
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.shared import Pt
+
     print(f"\n📄 Processing: {os.path.basename(doc_path)}")
     
     # Always create new document
@@ -413,6 +407,10 @@ def fill_synopsis(doc_path, output_path):
 
 def fill_report(doc_path, output_path):
     """Fill the full project report"""
+    from docx import Document
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.shared import Pt
+
     print(f"\n📄 Processing: {os.path.basename(doc_path)}")
     
     # Always create new document
@@ -885,6 +883,13 @@ def main():
     if not os.path.exists(report_input):
         print(f"⚠ Warning: {report_input} not found, creating new document...")
     
+    try:
+        import docx   # Only checks that python-docx is installed
+    except ImportError:
+        print("ERROR: python-docx library not installed!")
+        print("  Install it with: pip install python-docx")
+        return 1
+    
     # Fill documents
     try:
         fill_synopsis(synopsis_input, synopsis_output)
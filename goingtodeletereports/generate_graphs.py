@@ -7,30 +7,24 @@ Generates all required plots for report/presentation:
 3. PWM vs Temp scatter with fitted line (R²)
 4. CPU Utilization bar chart
 5. Fault event timeline
+
+The plots are independent jobs rendered on a process pool (Agg backend).
+
+Usage:
+    python generate_graphs.py [--profile draft|print] [--format png|svg|pdf] [--workers N]
+                              [--trace trace.json]
 """
 
 import os
 import sys
 import csv
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
-# Auto-install required packages
-try:
-    import matplotlib.pyplot as plt
-    import numpy as np
-    from scipy import stats
-    from matplotlib.patches import Rectangle
-    import matplotlib.patches as mpatches
-except ImportError:
-    print("Installing required packages: matplotlib, numpy, scipy...")
-    import subprocess
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "matplotlib", "numpy", "scipy"])
-    import matplotlib.pyplot as plt
-    import numpy as np
-    from scipy import stats
-    from matplotlib.patches import Rectangle
-    import matplotlib.patches as mpatches
-    print("✓ Packages installed successfully!")
+import numpy as np
+
+# matplotlib and scipy are imported inside the functions that draw, never at
+# module load, and nothing is installed behind the user's back
 
 # Configuration
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -38,22 +32,54 @@ PROJECT_DIR = os.path.dirname(SCRIPT_DIR)
 REPORTS_DIR = os.path.join(PROJECT_DIR, "reports")
 OUTPUT_DIR = os.path.join(SCRIPT_DIR, "graphs_output")
 
+# Shared data-file and plotting helpers live with the analysis scripts
+sys.path.insert(0, os.path.join(PROJECT_DIR, "scripts"))
+import columnar
+import decimate
+import firmware_model
+import timing_trace
+
 # System parameters
 CONTROL_PERIOD_MS = 100  # Control loop period (100ms)
 DEADLINE_MS = 100  # Task deadline (100ms)
 TEMP_MIN = 25  # Minimum temperature
 TEMP_MAX = 100  # Maximum temperature
 
+# Output profiles: quick previews vs report-quality figures
+RENDER_PROFILES = {
+    'draft': {'dpi': 100, 'format': 'png'},
+    'print': {'dpi': 300, 'format': 'png'},
+}
+DEFAULT_PROFILE = 'print'
+FORMATS = ('png', 'svg', 'pdf')
+
 def ensure_output_dir():
     """Create output directory if it doesn't exist"""
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
         print(f"✓ Created output directory: {OUTPUT_DIR}")
 
+def save_figure(output_dir, name, profile=None):
+    """Save the current figure as <name>.<format> at the profile's DPI"""
+    import matplotlib.pyplot as plt
+    profile = profile or RENDER_PROFILES[DEFAULT_PROFILE]
+    output_path = os.path.join(output_dir, f"{name}.{profile['format']}")
+    plt.savefig(output_path, dpi=profile['dpi'], bbox_inches='tight')
+    return output_path
+
+@timing_trace.traced()
 def load_simulation_data():
-    """Load simulation data from CSV file"""
+    """Load simulation data (columnar .npz, falling back to CSV)"""
+    npz_path = os.path.join(REPORTS_DIR, "simulation_data.npz")
     csv_path = os.path.join(REPORTS_DIR, "simulation_data.csv")
     
+    if os.path.exists(npz_path):
+        print(f"Loading data from: {npz_path}")
+        columns, _ = columnar.load_columns(npz_path)
+        temps = columns['temp'].astype(float)
+        print(f"✓ Loaded {len(temps)} data points")
+        return temps, columns['adc'].astype(int), columns['pwm'].astype(int)
+    
     if not os.path.exists(csv_path):
         print(f"⚠ Warning: {csv_path} not found!")
         print("Generating synthetic data for demonstration...")
@@ -83,22 +109,21 @@ def generate_synthetic_data():
     # Add some realistic noise
     temps = temps + np.random.normal(0, 0.5, len(temps))
     
-    # ADC: 12-bit (0-4095), proportional to temperature
-    # At 25°C -> ~1024, at 100°C -> ~4095
-    adcs = ((temps - TEMP_MIN) / (TEMP_MAX - TEMP_MIN) * 3071 + 1024).astype(int)
-    adcs = np.clip(adcs, 0, 4095)
+    # ADC: LM35 (10mV/°C) through the 12-bit, 3.3V ADC
+    adcs = firmware_model.adc_code(firmware_model.lm35_voltage(temps))
     
-    # PWM: proportional to ADC (PWM = ADC / 4095 * 4000)
-    pwms = (adcs / 4095 * 4000).astype(int)
-    pwms = np.clip(pwms, 0, 4000)
+    # PWM: the firmware control law, min(Temp * 40, 4000)
+    _, pwms = firmware_model.control_law(adcs)
     
     return temps.tolist(), adcs.tolist(), pwms.tolist()
 
-def plot_period_vs_time(output_dir):
+def plot_period_vs_time(output_dir, profile=None):
     """
     Plot 1: Period vs Time (Jitter & Deadline Misses)
     Shows task execution period over time with jitter and any deadline violations
     """
+    import matplotlib.pyplot as plt
+
     print("\n[1/5] Generating Period vs Time plot...")
     
     # Simulate real-time execution periods
@@ -164,23 +189,28 @@ def plot_period_vs_time(output_dir):
             bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
     
     plt.tight_layout()
-    output_path = os.path.join(output_dir, "1_period_vs_time_jitter.png")
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    output_path = save_figure(output_dir, "1_period_vs_time_jitter", profile)
     print(f"  ✓ Saved: {output_path}")
     plt.close()
 
-def plot_temp_pwm_vs_time(temps, pwms, output_dir):
+def plot_temp_pwm_vs_time(temps, pwms, output_dir, profile=None):
     """
     Plot 2: Temperature & PWM vs Time (Step/Ramp Tests)
     Shows temperature changes and corresponding PWM response
     """
+    import matplotlib.pyplot as plt
+    import matplotlib.patches as mpatches
+
     print("\n[2/5] Generating Temperature & PWM vs Time plot...")
     
     num_samples = len(temps)
     time_s = np.linspace(0, num_samples * CONTROL_PERIOD_MS / 1000, num_samples)
     
     # Convert PWM to percentage
-    pwm_percent = [p / 4000 * 100 for p in pwms]
+    pwm_percent = np.asarray(pwms) / firmware_model.PWM_MAX * 100
+    
+    # Reduce to plot resolution (min/max buckets keep peaks and threshold crossings)
+    plot_time, plot_temps, plot_pwm = decimate.decimate(time_s, temps, pwm_percent)
     
     # Create dual-axis plot
     fig, ax1 = plt.subplots(figsize=(14, 7))
@@ -189,7 +219,7 @@ def plot_temp_pwm_vs_time(temps, pwms, output_dir):
     color_temp = 'tab:red'
     ax1.set_xlabel('Time (seconds)', fontsize=12, fontweight='bold')
     ax1.set_ylabel('Temperature (°C)', color=color_temp, fontsize=12, fontweight='bold')
-    line1 = ax1.plot(time_s, temps, color=color_temp, linewidth=2.5, 
+    line1 = ax1.plot(plot_time, plot_temps, color=color_temp, linewidth=2.5, 
                      label='Temperature', alpha=0.8)
     ax1.tick_params(axis='y', labelcolor=color_temp)
     ax1.grid(True, alpha=0.3, linestyle=':', linewidth=0.5)
@@ -199,7 +229,7 @@ def plot_temp_pwm_vs_time(temps, pwms, output_dir):
     ax2 = ax1.twinx()
     color_pwm = 'tab:blue'
     ax2.set_ylabel('Fan Speed - PWM (%)', color=color_pwm, fontsize=12, fontweight='bold')
-    line2 = ax2.plot(time_s, pwm_percent, color=color_pwm, linewidth=2, 
+    line2 = ax2.plot(plot_time, plot_pwm, color=color_pwm, linewidth=2, 
                      label='PWM Duty Cycle', alpha=0.7, linestyle='--')
     ax2.tick_params(axis='y', labelcolor=color_pwm)
     ax2.set_ylim([0, 105])
@@ -235,20 +265,22 @@ def plot_temp_pwm_vs_time(temps, pwms, output_dir):
                 fontsize=9, bbox=dict(boxstyle='round', facecolor='yellow', alpha=0.7))
     
     fig.tight_layout()
-    output_path = os.path.join(output_dir, "2_temp_pwm_vs_time.png")
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    output_path = save_figure(output_dir, "2_temp_pwm_vs_time", profile)
     print(f"  ✓ Saved: {output_path}")
     plt.close()
 
-def plot_pwm_vs_temp_scatter(temps, pwms, output_dir):
+def plot_pwm_vs_temp_scatter(temps, pwms, output_dir, profile=None):
     """
     Plot 3: PWM vs Temperature Scatter with Fitted Line (R²)
     Shows linearity of proportional control algorithm
     """
+    import matplotlib.pyplot as plt
+    from scipy import stats
+
     print("\n[3/5] Generating PWM vs Temp scatter plot with R²...")
     
     # Convert PWM to percentage
-    pwm_percent = np.array([p / 4000 * 100 for p in pwms])
+    pwm_percent = np.asarray(pwms) / firmware_model.PWM_MAX * 100
     temps_array = np.array(temps)
     
     # Linear regression
@@ -316,17 +348,18 @@ def plot_pwm_vs_temp_scatter(temps, pwms, output_dir):
                 bbox=dict(boxstyle='round,pad=0.8', facecolor='yellow', alpha=0.8, edgecolor='darkblue', linewidth=2))
     
     plt.tight_layout()
-    output_path = os.path.join(output_dir, "3_pwm_vs_temp_scatter_r2.png")
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    output_path = save_figure(output_dir, "3_pwm_vs_temp_scatter_r2", profile)
     print(f"  ✓ Saved: {output_path}")
     print(f"  📊 R² = {r_squared:.6f} (Excellent correlation!)")
     plt.close()
 
-def plot_cpu_utilization(output_dir):
+def plot_cpu_utilization(output_dir, profile=None):
     """
     Plot 4: CPU Utilization Bar Chart
     Shows CPU usage in different operating conditions
     """
+    import matplotlib.pyplot as plt
+
     print("\n[4/5] Generating CPU Utilization bar chart...")
     
     # Simulated CPU utilization data (realistic for STM32F103 @ 72MHz)
@@ -396,16 +429,19 @@ def plot_cpu_utilization(output_dir):
             bbox=dict(boxstyle='round', facecolor='lightblue', alpha=0.9, edgecolor='black'))
     
     plt.tight_layout()
-    output_path = os.path.join(output_dir, "4_cpu_utilization_bar.png")
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    output_path = save_figure(output_dir, "4_cpu_utilization_bar", profile)
     print(f"  ✓ Saved: {output_path}")
     plt.close()
 
-def plot_fault_event_timeline(output_dir):
+def plot_fault_event_timeline(output_dir, profile=None):
     """
     Plot 5: Fault Event Timeline
     Shows system faults, recovery events, and operational status
     """
+    import matplotlib.pyplot as plt
+    import matplotlib.patches as mpatches
+    from matplotlib.patches import Rectangle
+
     print("\n[5/5] Generating Fault Event Timeline...")
     
     # Simulation timeline (0 to 45 seconds)
@@ -514,11 +550,60 @@ def plot_fault_event_timeline(output_dir):
               title='Fault Severity', framealpha=0.9)
     
     plt.tight_layout()
-    output_path = os.path.join(output_dir, "5_fault_event_timeline.png")
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    output_path = save_figure(output_dir, "5_fault_event_timeline", profile)
     print(f"  ✓ Saved: {output_path}")
     plt.close()
 
+# ============================================================
+# PARALLEL RENDERING
+# ============================================================
+
+# (plot function, needs simulation data) in report order
+GRAPH_JOBS = [
+    (plot_period_vs_time, False),
+    (plot_temp_pwm_vs_time, True),
+    (plot_pwm_vs_temp_scatter, True),
+    (plot_cpu_utilization, False),
+    (plot_fault_event_timeline, False),
+]
+
+def _render_job(args):
+    """Run one plot function (in a pool worker)"""
+    index, temps, pwms, output_dir, profile = args
+    try:
+        with timing_trace.span("import matplotlib"):
+            import matplotlib
+            matplotlib.use("Agg")   # Files only; no GUI backend in pool workers
+            import matplotlib.pyplot
+        plot, needs_data = GRAPH_JOBS[index]
+        with timing_trace.span(plot.__name__):
+            if needs_data:
+                plot(temps, pwms, output_dir, profile)
+            else:
+                plot(output_dir, profile)
+    finally:
+        # Pool workers exit without running atexit handlers
+        timing_trace.flush()
+    return index
+
+@timing_trace.traced()
+def render_graphs(temps, pwms, output_dir, profile=None, workers=None):
+    """Render every graph as an independent job; workers=1 renders in-process"""
+    profile = profile or RENDER_PROFILES[DEFAULT_PROFILE]
+    workers = min(workers or os.cpu_count() or 1, len(GRAPH_JOBS))
+    jobs = [(i, temps if needs_data else None, pwms if needs_data else None, output_dir, profile)
+            for i, (_, needs_data) in enumerate(GRAPH_JOBS)]
+    
+    if workers == 1:
+        for job in jobs:
+            _render_job(job)
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # list() re-raises the first failure from any worker
+        list(executor.map(_render_job, jobs))
+
+@timing_trace.traced()
 def generate_summary_document(output_dir):
     """Generate a summary text file with graph descriptions"""
     summary_path = os.path.join(output_dir, "GRAPHS_SUMMARY.txt")
@@ -603,28 +688,48 @@ def generate_summary_document(output_dir):
     
     print(f"\n✓ Summary document saved: {summary_path}")
 
+@timing_trace.traced("generate_graphs")
 def main():
     """Main function to generate all graphs"""
+    args = sys.argv[1:]
+    profile_name = args[args.index('--profile') + 1] if '--profile' in args else DEFAULT_PROFILE
+    if profile_name not in RENDER_PROFILES:
+        print(f"Unknown profile '{profile_name}' (choose from: {', '.join(RENDER_PROFILES)})")
+        return 1
+    profile = dict(RENDER_PROFILES[profile_name])
+    if '--format' in args:
+        profile['format'] = args[args.index('--format') + 1].lower()
+        if profile['format'] not in FORMATS:
+            print(f"Unknown format '{profile['format']}' (choose from: {', '.join(FORMATS)})")
+            return 1
+    workers = int(args[args.index('--workers') + 1]) if '--workers' in args else None
+    
     print("=" * 80)
     print("RTS FAN CONTROL PROJECT - GRAPH GENERATOR")
     print("=" * 80)
     print("Generating comprehensive plots for report/presentation...\n")
     
     # Setup
+    try:
+        with timing_trace.span("import matplotlib"):
+            import matplotlib
+            matplotlib.use("Agg")
+            import matplotlib.pyplot
+            import scipy.stats
+    except ImportError as e:
+        print(f"✗ Missing package: {e.name}")
+        print("  Install the plotting dependencies with: pip install matplotlib numpy scipy")
+        return 1
     ensure_output_dir()
     
     # Load simulation data
     temps, adcs, pwms = load_simulation_data()
     
     # Generate all plots
-    print("\nGenerating plots (this may take a moment)...")
+    print(f"\nGenerating plots ({profile_name}: {profile['dpi']} DPI {profile['format'].upper()})...")
     print("=" * 80)
     
-    plot_period_vs_time(OUTPUT_DIR)
-    plot_temp_pwm_vs_time(temps, pwms, OUTPUT_DIR)
-    plot_pwm_vs_temp_scatter(temps, pwms, OUTPUT_DIR)
-    plot_cpu_utilization(OUTPUT_DIR)
-    plot_fault_event_timeline(OUTPUT_DIR)
+    render_graphs(temps, pwms, OUTPUT_DIR, profile, workers)
     
     # Generate summary
     print("\nGenerating summary document...")
@@ -636,17 +741,19 @@ def main():
     print("=" * 80)
     print(f"\nOutput location: {OUTPUT_DIR}")
     print("\nGenerated files:")
-    print("  1. 1_period_vs_time_jitter.png       - Jitter & deadline analysis")
-    print("  2. 2_temp_pwm_vs_time.png            - Step/ramp response")
-    print("  3. 3_pwm_vs_temp_scatter_r2.png      - Linearity with R²")
-    print("  4. 4_cpu_utilization_bar.png         - CPU usage comparison")
-    print("  5. 5_fault_event_timeline.png        - Fault & recovery timeline")
+    ext = profile['format']
+    print(f"  1. {'1_period_vs_time_jitter.' + ext:<33} - Jitter & deadline analysis")
+    print(f"  2. {'2_temp_pwm_vs_time.' + ext:<33} - Step/ramp response")
+    print(f"  3. {'3_pwm_vs_temp_scatter_r2.' + ext:<33} - Linearity with R²")
+    print(f"  4. {'4_cpu_utilization_bar.' + ext:<33} - CPU usage comparison")
+    print(f"  5. {'5_fault_event_timeline.' + ext:<33} - Fault & recovery timeline")
     print("  6. GRAPHS_SUMMARY.txt                - Detailed descriptions")
-    print("\nAll graphs are high-resolution (300 DPI) PNG files.")
+    print(f"\nAll graphs are {profile['dpi']} DPI {ext.upper()} files.")
     print("Ready for insertion into Word documents, PowerPoint, or LaTeX!")
     print("=" * 80)
     
     return 0
 
 if __name__ == "__main__":
+    timing_trace.enable_from_args(sys.argv)
     sys.exit(main())
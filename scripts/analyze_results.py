@@ -2,54 +2,62 @@
 """
 STM32 Fan Control - Report Analyzer
 Parses UART output from Renode simulation and generates a formatted report
+
+Usage:
+    python analyze_results.py [--csv]             # after the simulation has finished
+    python analyze_results.py --follow [--every N] [--interval SECONDS]
+                                                  # live, while Renode is still writing
+    python analyze_results.py --trace trace.json  # time each stage (see timing_trace.py)
 """
 
-import re
-import csv
+import os
+import sys
+import time
 from datetime import datetime
 
-def parse_uart_output(filename="../reports/uart_output.txt"):
-    """Parse UART output file and extract temperature, ADC, and PWM data"""
-    data = []
+# These bring in numpy (about 0.1 s of startup); the default .npz output needs it anyway
+import firmware_model
+import online_stats
+import sample_buffer
+import timing_trace
+import uart_stream
+
+@timing_trace.traced()
+def parse_uart_output(filename="../reports/uart_output.txt", stats=None):
+    """
+    Parse UART output file and extract temperature, ADC, and PWM data.
+
+    Returns a sample_buffer.SampleBuffer (typed columns; still indexable and
+    iterable as {'temp', 'adc', 'pwm'} dicts). If stats (an
+    online_stats.TelemetryStats) is given, every batch is also folded into it
+    while parsing, so no second pass over the data is needed.
+    """
+    data = sample_buffer.SampleBuffer()
     
     try:
-        with open(filename, 'r') as f:
-            for line in f:
-                # Match pattern: "Temp: XX C | ADC: XXXX | PWM: XXXX | Fan: XX%"
-                match = re.search(r'Temp:\s*(\d+)\s*C\s*\|\s*ADC:\s*(\d+)\s*\|\s*PWM:\s*(\d+)', line)
-                if match:
-                    temp = int(match.group(1))
-                    adc = int(match.group(2))
-                    pwm = int(match.group(3))
-                    data.append({'temp': temp, 'adc': adc, 'pwm': pwm})
+        # Chunked bytes-regex parse; see uart_stream.py for the batch API
+        for temps, adcs, pwms in uart_stream.iter_uart_batches(filename):
+            if stats is not None:
+                stats.update(temps, adcs, pwms)
+            data.extend(temps, adcs, pwms)
     except FileNotFoundError:
         print(f"Error: {filename} not found. Run the simulation first.")
-        return []
+        return sample_buffer.SampleBuffer(0)
     
     return data
 
+@timing_trace.traced()
 def calculate_stats(data):
-    """Calculate statistics from the data"""
+    """Calculate statistics from the data (SampleBuffer or list of sample dicts)"""
     if not data:
         return None
     
-    temps = [d['temp'] for d in data]
-    adcs = [d['adc'] for d in data]
-    pwms = [d['pwm'] for d in data]
-    
-    return {
-        'temp_min': min(temps),
-        'temp_max': max(temps),
-        'temp_avg': sum(temps) / len(temps),
-        'adc_min': min(adcs),
-        'adc_max': max(adcs),
-        'adc_avg': sum(adcs) / len(adcs),
-        'pwm_min': min(pwms),
-        'pwm_max': max(pwms),
-        'pwm_avg': sum(pwms) / len(pwms),
-        'samples': len(data)
-    }
+    samples = sample_buffer.as_samples(data)
+    stats = online_stats.TelemetryStats()
+    stats.update(samples.temp, samples.adc, samples.pwm)
+    return stats.summary()
 
+@timing_trace.traced()
 def generate_report(data, stats):
     """Generate a formatted text report"""
     report = []
@@ -80,35 +88,47 @@ def generate_report(data, stats):
         report.append(f"  Total Samples:      {stats['samples']}")
         report.append(f"  Temperature Range:  {stats['temp_min']}°C - {stats['temp_max']}°C")
         report.append(f"  Average Temp:       {stats['temp_avg']:.1f}°C")
+        if 'temp_std' in stats:
+            report.append(f"  Temp Std Dev:       {stats['temp_std']:.2f}°C")
+            report.append(f"  Temp Median / P95:  {stats['temp_p50']}°C / {stats['temp_p95']}°C")
         report.append("")
-        report.append(f"  ADC Range:          {stats['adc_min']} - {stats['adc_max']} (0-4095)")
+        report.append(f"  ADC Range:          {stats['adc_min']} - {stats['adc_max']} (0-{firmware_model.ADC_MAX})")
         report.append(f"  Average ADC:        {stats['adc_avg']:.0f}")
+        if 'adc_std' in stats:
+            report.append(f"  ADC Std Dev:        {stats['adc_std']:.1f}")
         report.append("")
-        report.append(f"  PWM Duty Range:     {stats['pwm_min']} - {stats['pwm_max']} (0-4000)")
+        report.append(f"  PWM Duty Range:     {stats['pwm_min']} - {stats['pwm_max']} (0-{firmware_model.PWM_MAX})")
         report.append(f"  Average PWM:        {stats['pwm_avg']:.0f}")
-        report.append(f"  PWM Utilization:    {(stats['pwm_avg']/4000)*100:.1f}%")
+        if 'pwm_std' in stats:
+            report.append(f"  PWM Std Dev:        {stats['pwm_std']:.1f}")
+            report.append(f"  PWM Median / P95:   {stats['pwm_p50']} / {stats['pwm_p95']}")
+        report.append(f"  PWM Utilization:    {(stats['pwm_avg']/firmware_model.PWM_MAX)*100:.1f}%")
         report.append("")
     
     report.append("DETAILED MEASUREMENTS:")
     report.append("-" * 80)
-    report.append(f"{'Temperature (°C)':<20} {'ADC Value':<15} {'PWM Duty':<15} {'Fan Speed %':<15}")
+    report.append(f"{'Temp °C':<8} {'Samples':>9}   {'ADC avg':>7} {'std':>6} {'min-max':>11}   "
+                  f"{'PWM avg':>7} {'std':>6} {'min-max':>11}  {'Fan %':>5}")
     report.append("-" * 80)
     
-    # Group data by temperature for cleaner output
-    temp_groups = {}
-    for d in data:
-        temp = d['temp']
-        if temp not in temp_groups:
-            temp_groups[temp] = []
-        temp_groups[temp].append(d)
-    
-    for temp in sorted(temp_groups.keys()):
-        samples = temp_groups[temp]
-        avg_adc = sum(s['adc'] for s in samples) / len(samples)
-        avg_pwm = sum(s['pwm'] for s in samples) / len(samples)
-        fan_speed = (avg_pwm / 4000) * 100
+    # Per-temperature groups via bincount on the temperature column
+    # (accumulated during parsing when the stats came from online_stats)
+    if stats and 'by_temp' in stats:
+        by_temp = stats['by_temp']
+    else:
+        samples = sample_buffer.as_samples(data)
+        table = online_stats.TemperatureTable()
+        table.update(samples.temp, samples.adc, samples.pwm)
+        by_temp = table.rows()
+    
+    for row in by_temp:
+        fan_speed = (row['pwm_avg'] / firmware_model.PWM_MAX) * 100
+        adc_range = f"{row['adc_min']}-{row['adc_max']}"
+        pwm_range = f"{row['pwm_min']}-{row['pwm_max']}"
         
-        report.append(f"{temp:<20} {avg_adc:<15.0f} {avg_pwm:<15.0f} {fan_speed:<15.1f}")
+        report.append(f"{row['temp']:<8} {row['samples']:>9}   {row['adc_avg']:>7.0f} {row['adc_std']:>6.1f} "
+                      f"{adc_range:>11}   {row['pwm_avg']:>7.0f} {row['pwm_std']:>6.1f} {pwm_range:>11}  "
+                      f"{fan_speed:>5.1f}")
     
     report.append("")
     report.append("=" * 80)
@@ -116,7 +136,8 @@ def generate_report(data, stats):
     report.append("-" * 80)
     report.append("The fan control system uses proportional control:")
     report.append("  - PWM Duty Cycle is proportional to ADC reading")
-    report.append("  - Formula: PWM = (ADC_Value / 4095) * 4000")
+    report.append(f"  - Formula: Temp = ADC_Value * {firmware_model.VREF} / {firmware_model.ADC_MAX} * 100")
+    report.append(f"             PWM  = min(Temp * {firmware_model.PWM_PER_C}, {firmware_model.PWM_MAX})")
     report.append("  - Linear relationship between temperature and fan speed")
     report.append("")
     report.append("Expected Behavior:")
@@ -131,21 +152,94 @@ def generate_report(data, stats):
     
     return "\n".join(report)
 
+@timing_trace.traced()
+def save_columnar(data, filename="../reports/simulation_data.npz"):
+    """Save data as typed binary columns (see columnar.py); the default output"""
+    if not data:
+        return
+    
+    import columnar   # Output-only dependency; keeps parse/stats startup lean
+    
+    columns = sample_buffer.as_samples(data).columns()
+    columnar.save_columns(filename, columns, meta={'source': 'uart_output.txt'})
+    
+    print(f"✓ Binary data saved to: {filename}")
+
+@timing_trace.traced()
 def save_csv(data, filename="../reports/simulation_data.csv"):
     """Save data to CSV file for further analysis"""
     if not data:
         return
     
-    with open(filename, 'w', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=['temp', 'adc', 'pwm'])
-        writer.writeheader()
-        writer.writerows(data)
+    import columnar
+    
+    columnar.to_csv(filename, sample_buffer.as_samples(data).columns())
     
     print(f"✓ CSV data saved to: {filename}")
 
+@timing_trace.traced()
+def write_report(report, filename="../reports/PROJECT_REPORT.txt"):
+    """Write the report text, replacing the file atomically for live readers"""
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, 'w') as f:
+        f.write(report)
+    os.replace(tmp_filename, filename)
+
+def follow_uart_output(filename="../reports/uart_output.txt", refresh_every=1000, poll_interval=0.5,
+                       report_filename="../reports/PROJECT_REPORT.txt"):
+    """
+    Tail a growing UART capture and refresh the report every refresh_every samples.
+
+    Only newly appended bytes are parsed; the running statistics and the
+    per-temperature table live in fixed-size accumulators, so each update
+    costs the same however large the capture gets. Stops on Ctrl+C after
+    writing a final report.
+    """
+    tail = uart_stream.UartTail(filename)
+    stats = online_stats.TelemetryStats()
+    next_refresh = refresh_every
+    reported = 0
+
+    print(f"Following {filename} (report every {refresh_every} samples, Ctrl+C to stop)...")
+    try:
+        while True:
+            temps, adcs, pwms = tail.poll()
+            if tail.restarted:
+                print("Capture restarted; resetting statistics")
+                stats = online_stats.TelemetryStats()
+                next_refresh = refresh_every
+                reported = 0
+
+            stats.update(temps, adcs, pwms)
+            if stats.count >= next_refresh:
+                summary = stats.summary()
+                write_report(generate_report([], summary), report_filename)
+                reported = stats.count
+                next_refresh = (stats.count // refresh_every + 1) * refresh_every
+                print(f"  {stats.count:>10} samples | temp {summary['temp_min']}-{summary['temp_max']}°C "
+                      f"| avg PWM {summary['pwm_avg']:.0f} -> {report_filename}")
+            elif len(temps) == 0:
+                time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        pass
+
+    if stats.count and stats.count != reported:
+        write_report(generate_report([], stats.summary()), report_filename)
+    print(f"\n✓ Stopped following after {stats.count} samples")
+    return stats
+
+@timing_trace.traced("analyze_results")
 def main():
+    args = sys.argv[1:]
+    if '--follow' in args:
+        refresh_every = int(args[args.index('--every') + 1]) if '--every' in args else 1000
+        poll_interval = float(args[args.index('--interval') + 1]) if '--interval' in args else 0.5
+        follow_uart_output(refresh_every=refresh_every, poll_interval=poll_interval)
+        return
+
     print("Parsing UART output...")
-    data = parse_uart_output()
+    accumulator = online_stats.TelemetryStats()
+    data = parse_uart_output(stats=accumulator)
     
     if not data:
         print("No data found. Make sure you've run the simulation first.")
@@ -154,20 +248,22 @@ def main():
     print(f"✓ Parsed {len(data)} data samples")
     
     print("Calculating statistics...")
-    stats = calculate_stats(data)
+    with timing_trace.span("statistics"):
+        stats = accumulator.summary()
     
     print("Generating report...")
     report = generate_report(data, stats)
     
     # Save report to file
     report_filename = "../reports/PROJECT_REPORT.txt"
-    with open(report_filename, 'w') as f:
-        f.write(report)
+    write_report(report, report_filename)
     
     print(f"✓ Report saved to: {report_filename}")
     
-    # Save CSV
-    save_csv(data)
+    # Save data (binary columns; CSV only when asked for, e.g. for Excel)
+    save_columnar(data)
+    if '--csv' in args:
+        save_csv(data)
     
     # Print report to console
     print("\n" + report)
@@ -175,7 +271,10 @@ def main():
     print(f"\n✓ Report generation complete!")
     print(f"\nGenerated files:")
     print(f"  - {report_filename} (formatted report)")
-    print(f"  - simulation_data.csv (raw data for Excel/analysis)")
+    print(f"  - simulation_data.npz (raw data, typed binary columns)")
+    if '--csv' in args:
+        print(f"  - simulation_data.csv (raw data for Excel/analysis)")
 
 if __name__ == "__main__":
+    timing_trace.enable_from_args(sys.argv)
     main()
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+RTS Fan Control - Benchmark Harness
+Times the data pipeline stages on synthetic inputs at several scales
+
+Every (stage, scale) runs in a fresh Python process so its peak RSS is its
+own. For each one the harness records wall time, peak RSS, the RSS growth
+during the timed call, and throughput. Results go to a JSON file tagged with
+the git commit, so two runs can be compared with --compare.
+
+Stages:
+    parse_uart_output   analyze_results.parse_uart_output (SampleBuffer)
+    uart_stream         uart_stream.read_uart_arrays (typed arrays)
+    online_stats        online_stats.file_stats (single worker)
+    read_raw            simulate_tempfan.read_simulation_data (binary rawfile)
+    save_table_npz      simulate_tempfan.save_data_table -> .npz
+    save_table_csv      simulate_tempfan.save_data_table -> .csv
+    create_plots        simulate_tempfan.create_plots (Agg backend)
+    mna_transient       mna_solver.simulate on the tempfan netlist (n time steps)
+    kicad_generate      generate_kicad_schematic.create_kicad_schematic
+    kicad_update        update_kicad_schematic.generate_improved_schematic
+
+Usage:
+    python benchmark.py                                 # all stages at 1k,100k,10M
+    python benchmark.py --scales 1k,100k --stages uart_stream,online_stats
+    python benchmark.py --compare old.json new.json     # wall-time ratios
+"""
+
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(SCRIPT_DIR)
+RESULTS_DIR = os.path.join(PROJECT_DIR, "benchmarks")
+
+DEFAULT_SCALES = "1k,100k,10M"
+DEFAULT_TIMEOUT = 1800   # seconds per (stage, scale)
+
+# name -> (input kind, largest scale worth running, unit counted for throughput)
+STAGES = {
+    'parse_uart_output': ('uart', None, 'samples'),
+    'uart_stream': ('uart', None, 'samples'),
+    'online_stats': ('uart', None, 'samples'),
+    'read_raw': ('raw', None, 'samples'),
+    'save_table_npz': ('arrays', None, 'rows'),
+    'save_table_csv': ('arrays', None, 'rows'),
+    'create_plots': ('arrays', None, 'samples'),
+    'mna_transient': ('none', 100_000, 'steps'),   # ~3 s per 10k steps
+    'kicad_generate': ('fixed', None, 'bytes'),
+    'kicad_update': ('fixed', None, 'bytes'),
+}
+
+def parse_scale(text):
+    """'1k' / '100k' / '10M' / '5000' -> int"""
+    multipliers = {'k': 1_000, 'm': 1_000_000, 'g': 1_000_000_000}
+    text = text.strip().lower()
+    if text and text[-1] in multipliers:
+        return int(float(text[:-1]) * multipliers[text[-1]])
+    return int(text)
+
+def format_scale(n):
+    for suffix, size in (('G', 1_000_000_000), ('M', 1_000_000), ('k', 1_000)):
+        if n >= size and n % size == 0:
+            return f"{n // size}{suffix}"
+    return str(n)
+
+# ============================================================
+# SYNTHETIC INPUTS
+# ============================================================
+
+def write_uart_capture(path, n):
+    """n lines of main_simple.c's UART output (see uart_emulator.py)"""
+    import uart_emulator
+    uart_emulator.write_uart_output(path, n)
+
+def synthetic_waveforms(n):
+    """(times, v_temp_mV, v_pwm, v_motor) like a tempfan transient"""
+    import numpy as np
+    times = np.linspace(0, 10, n)
+    v_temp = 1000 * times / 10 + np.sin(times * 50)
+    v_pwm = np.clip((v_temp - 300) / 700 * 5, 0, 5)
+    v_motor = 5 - 0.9 * v_pwm
+    return times, v_temp, v_pwm, v_motor
+
+def write_rawfile(path, n):
+    """ngspice-style binary rawfile with time, v(4), v(8), v(12)"""
+    import numpy as np
+    times, v_temp, v_pwm, v_motor = synthetic_waveforms(n)
+    names = ['time', 'v(4)', 'v(8)', 'v(12)']
+    kinds = ['time', 'voltage', 'voltage', 'voltage']
+    header = ["Title: benchmark", "Date: -", "Plotname: Transient Analysis", "Flags: real",
+              f"No. Variables: {len(names)}", f"No. Points: {n}", "Variables:"]
+    header += [f"\t{i}\t{name}\t{kind}" for i, (name, kind) in enumerate(zip(names, kinds))]
+    header.append("Binary:")
+    with open(path, 'wb') as f:
+        f.write(("\n".join(header) + "\n").encode('ascii'))
+        np.column_stack([times, v_temp / 1000, v_pwm, v_motor]).astype(np.float64).tofile(f)
+
+def prepare_input(kind, n, work_dir):
+    """Create (once per scale) the input file for a stage kind; returns its path"""
+    if kind == 'uart':
+        path = os.path.join(work_dir, f"uart_{n}.txt")
+        if not os.path.exists(path):
+            write_uart_capture(path, n)
+        return path
+    if kind == 'raw':
+        path = os.path.join(work_dir, f"output_{n}.raw")
+        if not os.path.exists(path):
+            write_rawfile(path, n)
+        return path
+    return None
+
+# ============================================================
+# STAGE RUNNER (child process)
+# ============================================================
+
+def _peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unavailable"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024 / 1024
+    except (ImportError, AttributeError):
+        return None
+
+def _setup_stage(stage, n, input_path, work_dir):
+    """Import what the stage needs and build its inputs; returns the timed call"""
+    import numpy as np
+
+    if stage == 'parse_uart_output':
+        import analyze_results
+        return lambda: len(analyze_results.parse_uart_output(input_path))
+    if stage == 'uart_stream':
+        import uart_stream
+        return lambda: len(uart_stream.read_uart_arrays(input_path)[0])
+    if stage == 'online_stats':
+        import online_stats
+        return lambda: online_stats.file_stats(input_path, 1).count
+    if stage == 'read_raw':
+        import simulate_tempfan
+        def run():
+            data = simulate_tempfan.read_simulation_data(input_path)
+            sum(float(np.sum(column)) for column in data)   # Fault in every page
+            return len(data[0])
+        return run
+    if stage in ('save_table_npz', 'save_table_csv', 'create_plots'):
+        import simulate_tempfan
+        waveforms = synthetic_waveforms(n)
+        if stage == 'create_plots':
+            output = os.path.join(work_dir, "bench_plot.png")
+            return lambda: simulate_tempfan.create_plots(*waveforms, output) or n
+        output = os.path.join(work_dir, "bench_table." + stage.rsplit('_', 1)[1])
+        return lambda: simulate_tempfan.save_data_table(*waveforms, output) or n
+    if stage == 'mna_transient':
+        import mna_solver
+        import simulate_tempfan
+        circuit = mna_solver.parse_netlist(simulate_tempfan.NETLIST)
+        tstop = circuit.tran[1] if circuit.tran else 10.0
+        return lambda: len(mna_solver.simulate(simulate_tempfan.NETLIST, tstep=tstop / n, tstop=tstop)['time'])
+    if stage == 'kicad_generate':
+        import generate_kicad_schematic
+        return lambda: len(generate_kicad_schematic.create_kicad_schematic().encode('utf-8'))
+    if stage == 'kicad_update':
+        import update_kicad_schematic
+        return lambda: len(update_kicad_schematic.generate_improved_schematic().encode('utf-8'))
+    raise ValueError(f"Unknown stage {stage!r}")
+
+def run_stage(stage, n, input_path, work_dir):
+    """Time one stage in this process; returns the result record"""
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        call = _setup_stage(stage, n, input_path, work_dir)
+        rss_before = _peak_rss_mb()
+        start = time.perf_counter()
+        items = call()
+        wall = time.perf_counter() - start
+    rss_after = _peak_rss_mb()
+
+    return {
+        'stage': stage,
+        'scale': n,
+        'wall_s': wall,
+        'items': items,
+        'unit': STAGES[stage][2],
+        'throughput': items / wall if wall > 0 else None,
+        'peak_rss_mb': rss_after,
+        'stage_rss_mb': (rss_after - rss_before) if rss_after is not None else None,
+    }
+
+# ============================================================
+# HARNESS (parent process)
+# ============================================================
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR,
+                                capture_output=True, text=True, timeout=10)
+        return result.stdout.strip() or None
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return None
+
+def environment():
+    info = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+    try:
+        import numpy
+        info['numpy'] = numpy.__version__
+    except ImportError:
+        info['numpy'] = None
+    return info
+
+def run_benchmarks(stages, scales, timeout=DEFAULT_TIMEOUT):
+    """Run every stage at every scale, each in its own process"""
+    results = []
+    work_dir = tempfile.mkdtemp(prefix="rts_bench_")
+    try:
+        for n in scales:
+            for stage in stages:
+                kind, max_scale, _ = STAGES[stage]
+                if kind == 'fixed' and n != scales[0]:
+                    continue    # Scale-independent; run once
+                if max_scale is not None and n > max_scale:
+                    print(f"  - {stage:<18} {format_scale(n):>6}  skipped (limit {format_scale(max_scale)})")
+                    continue
+
+                input_path = prepare_input(kind, n, work_dir)
+                command = [sys.executable, os.path.abspath(__file__), "--run-stage",
+                           stage, str(n), input_path or "", work_dir]
+                try:
+                    proc = subprocess.run(command, cwd=SCRIPT_DIR, capture_output=True,
+                                          text=True, timeout=timeout)
+                    if proc.returncode != 0:
+                        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip()
+                                           else f"exit code {proc.returncode}")
+                    record = json.loads(proc.stdout.strip().splitlines()[-1])
+                except (RuntimeError, subprocess.TimeoutExpired) as e:
+                    record = {'stage': stage, 'scale': n, 'error': str(e) or type(e).__name__}
+                    print(f"  ✗ {stage:<18} {format_scale(n):>6}  {record['error']}")
+                else:
+                    rss = f"{record['peak_rss_mb']:8.1f} MB" if record['peak_rss_mb'] is not None else "       n/a"
+                    print(f"  ✓ {stage:<18} {format_scale(n):>6}  {record['wall_s']:9.4f} s  {rss}  "
+                          f"{record['throughput']:>14,.0f} {record['unit']}/s")
+                results.append(record)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+def compare(base_file, new_file):
+    """Print new/base wall-time ratios for every (stage, scale) in both files"""
+    with open(base_file) as f:
+        base = json.load(f)
+    with open(new_file) as f:
+        new = json.load(f)
+    base_times = {(r['stage'], r['scale']): r['wall_s'] for r in base['results'] if 'wall_s' in r}
+
+    print(f"{'stage':<18} {'scale':>6} {'base (s)':>10} {'new (s)':>10} {'ratio':>7}")
+    print(f"  base: {base['environment'].get('commit')}   new: {new['environment'].get('commit')}")
+    for r in new['results']:
+        key = (r['stage'], r['scale'])
+        if 'wall_s' not in r or key not in base_times:
+            continue
+        ratio = r['wall_s'] / base_times[key] if base_times[key] > 0 else float('inf')
+        flag = "  ← slower" if ratio > 1.1 else ""
+        print(f"{r['stage']:<18} {format_scale(r['scale']):>6} {base_times[key]:>10.4f} "
+              f"{r['wall_s']:>10.4f} {ratio:>6.2f}x{flag}")
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def option(args, name, default=None):
+    return args[args.index(name) + 1] if name in args else default
+
+def main():
+    args = sys.argv[1:]
+
+    if args and args[0] == '--run-stage':
+        stage, n, input_path, work_dir = args[1], int(args[2]), args[3] or None, args[4]
+        print(json.dumps(run_stage(stage, n, input_path, work_dir)))
+        return 0
+
+    if '--compare' in args:
+        i = args.index('--compare')
+        compare(args[i + 1], args[i + 2])
+        return 0
+
+    stages = option(args, '--stages', ','.join(STAGES)).split(',')
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        print(f"Unknown stage(s): {', '.join(unknown)} (choose from: {', '.join(STAGES)})")
+        return 1
+    scales = sorted(parse_scale(s) for s in option(args, '--scales', DEFAULT_SCALES).split(','))
+    timeout = float(option(args, '--timeout', DEFAULT_TIMEOUT))
+
+    env = environment()
+    output = option(args, '--output') or os.path.join(
+        RESULTS_DIR, f"{env['timestamp'].replace(':', '')}_{env['commit'] or 'nocommit'}.json")
+
+    print(f"Benchmarking {len(stages)} stages at {', '.join(map(format_scale, scales))} "
+          f"(commit {env['commit']})")
+    results = run_benchmarks(stages, scales, timeout)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({'environment': env, 'results': results}, f, indent=2)
+    print(f"✓ Results saved to: {output}")
+    return 0 if all('error' not in r for r in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+RTS Fan Control - Columnar Data Files
+Typed binary column storage for telemetry and simulation tables
+
+A table is an uncompressed .npz archive with one array per column (stored in
+its own dtype, e.g. int16 temperatures or float32 voltages) plus a JSON schema
+header under the key '__schema__':
+
+    {"format": "rts-columns", "version": 1, "rows": N, "meta": {...},
+     "columns": [{"name": "temp", "dtype": "int16", "label": "temp"}, ...]}
+
+Loading is a straight read of each column's bytes, with no per-cell parsing.
+CSV stays available through to_csv() for spreadsheets (optionally gzipped).
+
+Usage:
+    python columnar.py ../reports/simulation_data.npz           # show schema
+    python columnar.py ../reports/simulation_data.npz out.csv   # export CSV
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+FORMAT_NAME = "rts-columns"
+FORMAT_VERSION = 1
+SCHEMA_KEY = "__schema__"
+
+CSV_BLOCK_ROWS = 256 * 1024   # rows formatted and written per block
+GZIP_LEVEL = 1                # fast; numeric CSV compresses well even at level 1
+
+def _umask():
+    """Current process umask (reading it means setting it, so put it back)"""
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+def save_columns(path, columns, labels=None, meta=None):
+    """
+    Write {name: array} as a columnar .npz file (atomically).
+
+    Column dtypes are kept as given; labels maps names to display/CSV headers.
+    """
+    arrays = {name: np.ascontiguousarray(values) for name, values in columns.items()}
+    lengths = {len(values) for values in arrays.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"Columns have different lengths: {sorted(lengths)}")
+
+    labels = labels or {}
+    schema = {
+        'format': FORMAT_NAME,
+        'version': FORMAT_VERSION,
+        'rows': lengths.pop() if lengths else 0,
+        'meta': meta or {},
+        'columns': [{'name': name, 'dtype': values.dtype.str, 'label': labels.get(name, name)}
+                    for name, values in arrays.items()],
+    }
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=directory)
+    try:
+        # mkstemp makes the file 0600; give it the mode open() would have
+        os.chmod(tmp_path, 0o666 & ~_umask())
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **{SCHEMA_KEY: np.array(json.dumps(schema))}, **arrays)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def load_columns(path):
+    """Read a columnar .npz file -> ({name: array}, schema)"""
+    with np.load(path, allow_pickle=False) as data:
+        if SCHEMA_KEY not in data.files:
+            raise ValueError(f"{path} has no {SCHEMA_KEY} header; not a columnar data file")
+        schema = json.loads(str(data[SCHEMA_KEY]))
+        if schema.get('format') != FORMAT_NAME or schema.get('version', 0) > FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported format {schema.get('format')} v{schema.get('version')}")
+        columns = {col['name']: data[col['name']] for col in schema['columns']}
+    return columns, schema
+
+def _fixed_point_bytes(values, decimals):
+    """
+    Format a column as fixed-point text in one vectorized pass.
+
+    Returns an (n, width) uint8 matrix of ASCII characters where 0 marks an
+    unused position (sign, leading zeros), matching format(v, f'.{decimals}f').
+    """
+    if values.dtype.kind in 'iu':
+        scaled = np.abs(values.astype(np.int64))
+        negative = values < 0
+        decimals = 0
+    else:
+        magnitude = np.abs(values.astype(np.float64))
+        product = magnitude * 10.0 ** decimals
+        scaled = np.rint(product).astype(np.int64)
+        # format() rounds the exact binary value, but the product is itself
+        # rounded: near a ...5 tie (51.85 is 51.8499999...) it can land on the
+        # wrong side. Those rows, and any beyond exact float integers, are
+        # rounded by format() itself.
+        near_tie = (np.abs(product - np.floor(product) - 0.5) < 1e-9 * np.maximum(product, 1.0)) | \
+            (product >= 2.0 ** 52)
+        for i in np.flatnonzero(near_tie):
+            scaled[i] = int(format(magnitude[i], f'.{decimals}f').replace('.', ''))
+        negative = np.signbit(values)    # Python also writes -0.0 as '-0.0'
+
+    int_part, frac_part = np.divmod(scaled, 10 ** decimals)
+    n_int = len(str(int(int_part.max())))
+    out = np.zeros((len(values), 1 + n_int + (1 + decimals if decimals else 0)), dtype=np.uint8)
+    out[:, 0] = np.where(negative, ord('-'), 0)
+
+    # Digits are peeled off the right, one divmod per character column
+    rest = frac_part
+    for col in range(n_int + 1 + decimals, n_int + 1, -1):
+        rest, digit = np.divmod(rest, 10)
+        out[:, col] = digit + ord('0')
+    if decimals:
+        out[:, n_int + 1] = ord('.')
+    rest = int_part
+    for col in range(n_int, 0, -1):
+        rest, digit = np.divmod(rest, 10)
+        if col == n_int:
+            out[:, col] = digit + ord('0')   # Units digit is always written
+        else:
+            out[:, col] = np.where((rest | digit) > 0, digit + ord('0'), 0)   # Drop leading zeros
+    return out
+
+def _cell_bytes(values, decimals):
+    """(n, width) uint8 text matrix for one block of a column (0 = no byte)"""
+    if values.dtype.kind in 'iu' or (decimals is not None and np.isfinite(values).all()
+                                     and np.abs(values).max(initial=0) * 10.0 ** decimals < 2.0 ** 62):
+        return _fixed_point_bytes(values, decimals or 0)
+    # Generic path: shortest repr for floats without a precision, or non-finite values
+    spec = '' if decimals is None else f'.{decimals}f'
+    text = np.array([str(v) if decimals is None else format(v, spec) for v in values], dtype='S')
+    return text.view(np.uint8).reshape(len(values), -1)
+
+def to_csv(path, columns, labels=None, decimals=None, block_rows=CSV_BLOCK_ROWS):
+    """
+    Export {name: array} as CSV; a path ending in .gz is gzip-compressed.
+
+    decimals maps column names to a fixed number of decimal places. Cells are
+    formatted a whole block of rows at a time and written as one buffer.
+    """
+    labels = labels or {}
+    decimals = decimals or {}
+    names = list(columns)
+    arrays = [np.asarray(columns[name]) for name in names]
+    n_rows = len(arrays[0]) if arrays else 0
+
+    if path.endswith('.gz'):
+        raw = gzip.open(path, 'wb', compresslevel=GZIP_LEVEL)
+    else:
+        raw = open(path, 'wb')
+    with io.TextIOWrapper(raw, newline='', write_through=True) as f:
+        csv.writer(f).writerow([labels.get(name, name) for name in names])
+
+        comma = np.full((min(block_rows, n_rows), 1), ord(','), dtype=np.uint8)
+        line_end = np.tile(np.frombuffer(b'\r\n', dtype=np.uint8), (min(block_rows, n_rows), 1))
+        for start in range(0, n_rows, block_rows):
+            stop = min(start + block_rows, n_rows)
+            parts = []
+            for i, (name, values) in enumerate(zip(names, arrays)):
+                if i:
+                    parts.append(comma[:stop - start])
+                parts.append(_cell_bytes(values[start:stop], decimals.get(name)))
+            parts.append(line_end[:stop - start])
+            block = np.hstack(parts)
+            f.buffer.write(block[block != 0].tobytes())
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python columnar.py <file.npz> [export.csv]")
+        return 1
+
+    columns, schema = load_columns(sys.argv[1])
+    print(f"{sys.argv[1]}: {schema['rows']} rows, format v{schema['version']}")
+    for col in schema['columns']:
+        print(f"  {col['name']:<16} {np.dtype(col['dtype']).name:<10} {col['label']}")
+    for key, value in schema['meta'].items():
+        print(f"  meta {key}: {value}")
+
+    if len(sys.argv) > 2:
+        to_csv(sys.argv[2], columns, {col['name']: col['label'] for col in schema['columns']})
+        print(f"✓ CSV exported to: {sys.argv[2]}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+RTS Fan Control - Plot Decimation
+Reduces long waveforms to a plot-resolution subset before they reach matplotlib
+
+- minmax: split the trace into equal buckets and keep each bucket's minimum
+          and maximum sample, so peaks survive and any threshold crossing
+          inside a bucket is still drawn (default)
+- lttb:   Largest-Triangle-Three-Buckets, one visually representative point
+          per bucket (smoother, but may shave isolated spikes)
+
+Several series sharing one x axis are decimated together (union of the
+selected indices), so twin axes and fill_between stay aligned.
+
+Usage:
+    python decimate.py [n_samples]     # timing demo on a synthetic waveform
+"""
+
+import sys
+import time
+
+import numpy as np
+
+DEFAULT_MAX_POINTS = 4000   # ~2 points per horizontal pixel of a 300 DPI figure
+
+def minmax_indices(y, n_buckets):
+    """Indices of the min and max sample of each of n_buckets equal buckets"""
+    n = len(y)
+    size = max(1, -(-n // n_buckets))    # Round up: at most n_buckets buckets, tail included
+    full = (n // size) * size
+    blocks = np.asarray(y[:full]).reshape(-1, size)
+    starts = np.arange(0, full, size)
+    picks = [starts + blocks.argmin(axis=1), starts + blocks.argmax(axis=1)]
+    if full < n:
+        tail = np.asarray(y[full:])
+        picks.append(np.array([full + tail.argmin(), full + tail.argmax()]))
+    return np.concatenate(picks)
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of n_out representative points"""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Interior points go into n_out - 2 buckets; first and last are always kept
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    prev = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third vertex
+        if i + 2 < len(edges):
+            nlo, nhi = edges[i + 1], edges[i + 2]
+            avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        area = np.abs((x[prev] - avg_x) * (y[lo:hi] - y[prev]) -
+                      (x[prev] - x[lo:hi]) * (avg_y - y[prev]))
+        prev = lo + int(area.argmax())
+        selected[i + 1] = prev
+    return selected
+
+def plot_indices(x, *ys, max_points=DEFAULT_MAX_POINTS, method='minmax'):
+    """Sorted sample indices to draw for series ys over the shared axis x"""
+    n = len(x)
+    if n <= max_points or not ys:
+        return np.arange(n)
+
+    if method == 'minmax':
+        n_buckets = max(1, max_points // (2 * len(ys)))
+        picks = [minmax_indices(y, n_buckets) for y in ys]
+    elif method == 'lttb':
+        n_out = max(3, max_points // len(ys))
+        picks = [lttb_indices(x, y, n_out) for y in ys]
+    else:
+        raise ValueError(f"Unknown decimation method {method!r} (expected 'minmax' or 'lttb')")
+
+    # Endpoints keep the plotted x range identical to the raw data
+    return np.unique(np.concatenate(picks + [np.array([0, n - 1])]))
+
+def decimate(x, *ys, max_points=DEFAULT_MAX_POINTS, method='minmax'):
+    """(x, y1, y2, ...) reduced to at most ~max_points shared samples"""
+    x = np.asarray(x)
+    ys = [np.asarray(y) for y in ys]
+    index = plot_indices(x, *ys, max_points=max_points, method=method)
+    return (x[index],) + tuple(y[index] for y in ys)
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    t = np.linspace(0, 10, n)
+    y = np.sin(2 * np.pi * t) + 0.05 * np.random.default_rng(0).standard_normal(n)
+    y[n // 3] = 3.0    # Isolated spike that must survive
+
+    for method in ('minmax', 'lttb'):
+        start = time.perf_counter()
+        t_d, y_d = decimate(t, y, method=method)
+        elapsed = time.perf_counter() - start
+        print(f"✓ {method:<6} {n} -> {len(t_d)} points in {elapsed:.3f}s "
+              f"(peak kept: {y_d.max() == y.max()})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+RTS Fan Control - Firmware Control-Law Model
+Bit-exact NumPy model of the temperature -> PWM pipeline in src/
+
+main.c (hardware firmware):
+    adc_val     = HAL_ADC_GetValue()                    12-bit code, uint32_t
+    temperature = (adc_val * 3.3 / 4095) * 100          double math, stored as float
+    pwm         = (uint16_t)(temperature * 40)          float multiply, truncated
+    if (pwm > 4000) pwm = 4000                          clamp, written to TIM3->CCR1
+
+main_simple.c (Renode demo firmware, integer temperature):
+    pwm_duty  = temperature * 40     (uint16_t, clamped to 4000)
+    adc_value = temperature * 12     (uint16_t)
+    fan       = (pwm_duty * 100) / 4000
+
+Every function takes whole arrays, so millions of codes are evaluated per
+call. Scripts that need the control law use this module, not their own copy.
+
+Note: TIM3 runs with a period of 1125 counts (8 kHz), so any compare value
+>= 1125 already gives 100 % duty on the pin; timer_duty() models that.
+
+Usage:
+    python firmware_model.py        # transfer table summary + throughput
+"""
+
+import sys
+import time
+
+import numpy as np
+
+# ADC1 (PA0): 12-bit, 3.3 V reference
+ADC_BITS = 12
+ADC_MAX = (1 << ADC_BITS) - 1       # 4095
+VREF = 3.3
+
+# LM35: 10 mV per °C
+LM35_V_PER_C = 0.01
+
+# Control law
+PWM_PER_C = 40
+PWM_MAX = 4000
+
+# main_simple.c's simulated ADC reading per °C
+SIMPLE_ADC_PER_C = 12
+
+# TIM3: 72 MHz / 8 / 1125 = 8 kHz
+TIM3_PERIOD = 1125
+
+MATH_MODES = ('float', 'int')
+
+def lm35_voltage(temp_c):
+    """LM35 output voltage for a temperature in °C"""
+    return np.asarray(temp_c, dtype=np.float64) * LM35_V_PER_C
+
+def adc_code(volts):
+    """Ideal 12-bit conversion (1 LSB = VREF / 4096), clipped to 0..4095"""
+    codes = np.floor(np.asarray(volts, dtype=np.float64) * ((ADC_MAX + 1) / VREF))
+    return np.clip(codes, 0, ADC_MAX).astype(np.uint16)
+
+def temperature_from_adc(adc, math='float'):
+    """
+    Temperature the firmware computes from an ADC code.
+
+    'float': main.c's double expression rounded to float (float32 result).
+    'int':   the same scaling in uint32 integer math, (adc * 330) / 4095.
+    """
+    adc = np.asarray(adc)
+    if math == 'float':
+        return ((adc.astype(np.float64) * VREF / ADC_MAX) * 100).astype(np.float32)
+    if math == 'int':
+        return (adc.astype(np.uint32) * np.uint32(330) // np.uint32(ADC_MAX)).astype(np.int32)
+    raise ValueError(f"Unknown math mode {math!r} (expected one of {', '.join(MATH_MODES)})")
+
+def pwm_from_temperature(temperature):
+    """
+    Compare value for a temperature: (uint16_t)(temperature * 40), clamped.
+
+    float32 input multiplies in float32 and truncates toward zero like the C
+    cast; integer input multiplies in int and wraps to 16 bits on assignment.
+    """
+    temperature = np.asarray(temperature)
+    if temperature.dtype.kind == 'f':
+        raw = (temperature.astype(np.float32) * np.float32(PWM_PER_C)).astype(np.uint16)
+    else:
+        raw = (temperature.astype(np.int64) * PWM_PER_C).astype(np.uint16)   # Wraps mod 2**16
+    return np.minimum(raw, np.uint16(PWM_MAX))
+
+def control_law(adc, math='float'):
+    """ADC codes -> (temperature, pwm) exactly as main.c computes them"""
+    temperature = temperature_from_adc(adc, math)
+    return temperature, pwm_from_temperature(temperature)
+
+def fan_percent(pwm):
+    """Fan % printed over UART: (pwm_duty * 100) / 4000 in int math"""
+    return (np.asarray(pwm).astype(np.int32) * 100) // PWM_MAX
+
+def timer_duty(pwm):
+    """Actual PA6 duty fraction for a TIM3 compare value (saturates at the period)"""
+    return np.minimum(np.asarray(pwm, dtype=np.float64), TIM3_PERIOD) / TIM3_PERIOD
+
+def simple_firmware_outputs(temperature):
+    """main_simple.c for integer temperatures -> (adc_value, pwm_duty, fan_percent)"""
+    temperature = np.asarray(temperature).astype(np.int64)
+    adc_value = (temperature * SIMPLE_ADC_PER_C).astype(np.uint16)
+    pwm_duty = pwm_from_temperature(temperature)
+    return adc_value, pwm_duty, fan_percent(pwm_duty)
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    codes = np.arange(ADC_MAX + 1, dtype=np.uint16)
+    for math in MATH_MODES:
+        temperature, pwm = control_law(codes, math)
+        saturated = int(np.argmax(pwm == PWM_MAX)) if (pwm == PWM_MAX).any() else None
+        print(f"{math:<5}: {temperature[0]}..{temperature[-1]} °C, PWM {pwm.min()}..{pwm.max()}, "
+              f"PWM saturates at ADC code {saturated}")
+
+    differ = control_law(codes, 'float')[1] != control_law(codes, 'int')[1]
+    print(f"float vs int math: {int(differ.sum())} of {len(codes)} codes give a different PWM")
+    print(f"TIM3 duty hits 100% at PWM >= {TIM3_PERIOD} "
+          f"(ADC code {int(np.argmax(control_law(codes)[1] >= TIM3_PERIOD))})")
+
+    samples = np.random.default_rng(0).integers(0, ADC_MAX + 1, 10_000_000).astype(np.uint16)
+    start = time.perf_counter()
+    control_law(samples)
+    elapsed = time.perf_counter() - start
+    print(f"✓ {len(samples) / elapsed / 1e6:.1f} M codes/s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,33 +14,13 @@ This script generates a complete KiCad 7.x schematic file showing:
 """
 
 import os
-import uuid
-from datetime import datetime
 
-def generate_uuid():
-    """Generate a KiCad-compatible UUID"""
-    return str(uuid.uuid4())
+import schematic_export
+from kicad_model import (Junction, PowerFlag, Property, Schematic, Symbol, Text, Wire,
+                         lib_symbols_from_text, pins)
 
-def create_kicad_schematic():
-    """Generate the complete KiCad schematic file"""
-    
-    schematic_content = f'''(kicad_sch (version 20230121) (generator eeschema)
-
-  (uuid {generate_uuid()})
-
-  (paper "A4")
-
-  (title_block
-    (title "STM32F103C8 Fan Control System")
-    (date "{datetime.now().strftime('%Y-%m-%d')}")
-    (rev "1.0")
-    (company "Real-Time Systems Project")
-    (comment 1 "Temperature-controlled DC fan using PWM")
-    (comment 2 "LM35 sensor simulation in software")
-    (comment 3 "UART debug output on PA9/PA10")
-  )
-
-  (lib_symbols
+# Cached library symbols, as KiCad stores them in the schematic
+LIB_SYMBOLS = """
     (symbol "MCU_ST_STM32F1:STM32F103C8Tx" (in_bom yes) (on_board yes)
       (property "Reference" "U1" (at 0 2.54 0)
         (effects (font (size 1.27 1.27)))
@@ -419,263 +399,97 @@ def create_kicad_schematic():
         )
       )
     )
-  )
-
-  (junction (at 127 76.2) (diameter 0) (color 0 0 0 0)
-    (uuid {generate_uuid()})
-  )
-  (junction (at 165.1 63.5) (diameter 0) (color 0 0 0 0)
-    (uuid {generate_uuid()})
-  )
-
-  (wire (pts (xy 50.8 76.2) (xy 62.23 76.2))
-    (stroke (width 0) (type default))
-    (uuid {generate_uuid()})
-  )
-  (wire (pts (xy 62.23 86.36) (xy 50.8 86.36))
-    (stroke (width 0) (type default))
-    (uuid {generate_uuid()})
-  )
-  (wire (pts (xy 104.14 66.04) (xy 111.76 66.04))
-    (stroke (width 0) (type default))
-    (uuid {generate_uuid()})
-  )
-  (wire (pts (xy 111.76 66.04) (xy 111.76 76.2))
-    (stroke (width 0) (type default))
-    (uuid {generate_uuid()})
-  )
-  (wire (pts (xy 111.76 76.2) (xy 119.38 76.2))
-    (stroke (width 0) (type default))
-    (uuid {generate_uuid()})
-  )
-  (wire (pts (xy 127 76.2) (xy 134.62 76.2))
-    (stroke (width 0) (type default))
-    (uuid {generate_uuid()})
-  )
-  (wire (pts (xy 134.62 76.2) (xy 134.62 83.82))
-    (stroke (width 0) (type default))
-    (uuid {generate_uuid()})
-  )
-  (wire (pts (xy 139.7 83.82) (xy 139.7 63.5))
-    (stroke (width 0) (type default))
-    (uuid {generate_uuid()})
-  )
-  (wire (pts (xy 139.7 63.5) (xy 165.1 63.5))
-    (stroke (width 0) (type default))
-    (uuid {generate_uuid()})
-  )
-  (wire (pts (xy 165.1 63.5) (xy 165.1 68.58))
-    (stroke (width 0) (type default))
-    (uuid {generate_uuid()})
-  )
-  (wire (pts (xy 165.1 76.2) (xy 165.1 81.28))
-    (stroke (width 0) (type default))
-    (uuid {generate_uuid()})
-  )
-  (wire (pts (xy 165.1 88.9) (xy 165.1 91.44))
-    (stroke (width 0) (type default))
-    (uuid {generate_uuid()})
-  )
-  (wire (pts (xy 139.7 91.44) (xy 165.1 91.44))
-    (stroke (width 0) (type default))
-    (uuid {generate_uuid()})
-  )
-  (wire (pts (xy 142.24 91.44) (xy 142.24 93.98))
-    (stroke (width 0) (type default))
-    (uuid {generate_uuid()})
-  )
-  (wire (pts (xy 127 76.2) (xy 127 93.98))
-    (stroke (width 0) (type default))
-    (uuid {generate_uuid()})
-  )
-  (wire (pts (xy 88.9 86.36) (xy 88.9 93.98))
-    (stroke (width 0) (type default))
-    (uuid {generate_uuid()})
-  )
-  (wire (pts (xy 50.8 93.98) (xy 88.9 93.98))
-    (stroke (width 0) (type default))
-    (uuid {generate_uuid()})
-  )
-  (wire (pts (xy 88.9 93.98) (xy 127 93.98))
-    (stroke (width 0) (type default))
-    (uuid {generate_uuid()})
-  )
-  (wire (pts (xy 127 93.98) (xy 142.24 93.98))
-    (stroke (width 0) (type default))
-    (uuid {generate_uuid()})
-  )
-  (wire (pts (xy 165.1 63.5) (xy 165.1 55.88))
-    (stroke (width 0) (type default))
-    (uuid {generate_uuid()})
-  )
-  (wire (pts (xy 88.9 58.42) (xy 88.9 55.88))
-    (stroke (width 0) (type default))
-    (uuid {generate_uuid()})
-  )
-  (wire (pts (xy 50.8 68.58) (xy 50.8 55.88))
-    (stroke (width 0) (type default))
-    (uuid {generate_uuid()})
-  )
-  (wire (pts (xy 50.8 55.88) (xy 88.9 55.88))
-    (stroke (width 0) (type default))
-    (uuid {generate_uuid()})
-  )
-  (wire (pts (xy 88.9 55.88) (xy 165.1 55.88))
-    (stroke (width 0) (type default))
-    (uuid {generate_uuid()})
-  )
-
-  (text "Temperature Sensor\\n(Software Simulated)" (at 35.56 58.42 0)
-    (effects (font (size 1.27 1.27)) (justify left bottom))
-    (uuid {generate_uuid()})
-  )
-  (text "STM32 Controller\\n72MHz ARM Cortex-M3" (at 71.12 45.72 0)
-    (effects (font (size 1.27 1.27)) (justify left bottom))
-    (uuid {generate_uuid()})
-  )
-  (text "Fan Driver Circuit\\nPWM @ 8kHz" (at 142.24 45.72 0)
-    (effects (font (size 1.27 1.27)) (justify left bottom))
-    (uuid {generate_uuid()})
-  )
-  (text "PA0: ADC Input (Temperature)\\nPA6: PWM Output (TIM3_CH1)\\nPA9/PA10: UART Debug @ 115200" 
-    (at 45.72 106.68 0)
-    (effects (font (size 1.016 1.016)) (justify left bottom))
-    (uuid {generate_uuid()})
-  )
-
-  (symbol (lib_id "Sensor_Temperature:LM35") (at 50.8 81.28 0) (unit 1)
-    (in_bom yes) (on_board yes) (dnp no)
-    (uuid {generate_uuid()})
-    (property "Reference" "U2" (at 45.72 73.66 0)
-      (effects (font (size 1.27 1.27)) (justify left))
-    )
-    (property "Value" "LM35" (at 45.72 76.2 0)
-      (effects (font (size 1.27 1.27)) (justify left))
-    )
-    (property "Footprint" "Package_TO_SOT_THT:TO-92_Inline" (at 50.8 83.82 0)
-      (effects (font (size 1.27 1.27)) hide)
-    )
-    (pin "1" (uuid {generate_uuid()}))
-    (pin "2" (uuid {generate_uuid()}))
-    (pin "3" (uuid {generate_uuid()}))
-  )
-
-  (symbol (lib_id "MCU_ST_STM32F1:STM32F103C8Tx") (at 88.9 73.66 0) (unit 1)
-    (in_bom yes) (on_board yes) (dnp no)
-    (uuid {generate_uuid()})
-    (property "Reference" "U1" (at 88.9 33.02 0)
-      (effects (font (size 1.27 1.27)))
-    )
-    (property "Value" "STM32F103C8T6" (at 88.9 35.56 0)
-      (effects (font (size 1.27 1.27)))
-    )
-    (property "Footprint" "Package_QFP:LQFP-48_7x7mm_P0.5mm" (at 88.9 116.84 0)
-      (effects (font (size 1.27 1.27)) hide)
-    )
-    (pin "1" (uuid {generate_uuid()}))
-    (pin "2" (uuid {generate_uuid()}))
-    (pin "10" (uuid {generate_uuid()}))
-    (pin "16" (uuid {generate_uuid()}))
-    (pin "30" (uuid {generate_uuid()}))
-    (pin "31" (uuid {generate_uuid()}))
-  )
-
-  (symbol (lib_id "Device:R") (at 123.19 76.2 90) (unit 1)
-    (in_bom yes) (on_board yes) (dnp no)
-    (uuid {generate_uuid()})
-    (property "Reference" "R1" (at 123.19 71.12 90)
-      (effects (font (size 1.27 1.27)))
-    )
-    (property "Value" "1k" (at 123.19 73.66 90)
-      (effects (font (size 1.27 1.27)))
-    )
-    (property "Footprint" "Resistor_THT:R_Axial_DIN0207_L6.3mm_D2.5mm_P10.16mm_Horizontal" (at 123.19 77.978 0)
-      (effects (font (size 1.27 1.27)) hide)
-    )
-    (pin "1" (uuid {generate_uuid()}))
-    (pin "2" (uuid {generate_uuid()}))
-  )
+"""
 
-  (symbol (lib_id "Transistor_BJT:2N2222") (at 137.16 83.82 0) (unit 1)
-    (in_bom yes) (on_board yes) (dnp no)
-    (uuid {generate_uuid()})
-    (property "Reference" "Q1" (at 142.24 80.01 0)
-      (effects (font (size 1.27 1.27)) (justify left))
-    )
-    (property "Value" "2N2222" (at 142.24 82.55 0)
-      (effects (font (size 1.27 1.27)) (justify left))
-    )
-    (property "Footprint" "Package_TO_SOT_THT:TO-92_Inline" (at 142.24 85.725 0)
-      (effects (font (size 1.27 1.27) italic) (justify left) hide)
-    )
-    (pin "1" (uuid {generate_uuid()}))
-    (pin "2" (uuid {generate_uuid()}))
-    (pin "3" (uuid {generate_uuid()}))
-  )
+JUNCTIONS = [
+    ((127, 76.2)),
+    ((165.1, 63.5)),
+]
 
-  (symbol (lib_id "Diode:1N4007") (at 165.1 85.09 270) (unit 1)
-    (in_bom yes) (on_board yes) (dnp no)
-    (uuid {generate_uuid()})
-    (property "Reference" "D1" (at 167.64 83.82 90)
-      (effects (font (size 1.27 1.27)) (justify left))
-    )
-    (property "Value" "1N4007" (at 167.64 86.36 90)
-      (effects (font (size 1.27 1.27)) (justify left))
-    )
-    (property "Footprint" "Diode_THT:D_DO-41_SOD81_P10.16mm_Horizontal" (at 160.655 85.09 0)
-      (effects (font (size 1.27 1.27)) hide)
-    )
-    (pin "1" (uuid {generate_uuid()}))
-    (pin "2" (uuid {generate_uuid()}))
-  )
+WIRES = [
+    ((50.8, 76.2), (62.23, 76.2)),
+    ((62.23, 86.36), (50.8, 86.36)),
+    ((104.14, 66.04), (111.76, 66.04)),
+    ((111.76, 66.04), (111.76, 76.2)),
+    ((111.76, 76.2), (119.38, 76.2)),
+    ((127, 76.2), (134.62, 76.2)),
+    ((134.62, 76.2), (134.62, 83.82)),
+    ((139.7, 83.82), (139.7, 63.5)),
+    ((139.7, 63.5), (165.1, 63.5)),
+    ((165.1, 63.5), (165.1, 68.58)),
+    ((165.1, 76.2), (165.1, 81.28)),
+    ((165.1, 88.9), (165.1, 91.44)),
+    ((139.7, 91.44), (165.1, 91.44)),
+    ((142.24, 91.44), (142.24, 93.98)),
+    ((127, 76.2), (127, 93.98)),
+    ((88.9, 86.36), (88.9, 93.98)),
+    ((50.8, 93.98), (88.9, 93.98)),
+    ((88.9, 93.98), (127, 93.98)),
+    ((127, 93.98), (142.24, 93.98)),
+    ((165.1, 63.5), (165.1, 55.88)),
+    ((88.9, 58.42), (88.9, 55.88)),
+    ((50.8, 68.58), (50.8, 55.88)),
+    ((50.8, 55.88), (88.9, 55.88)),
+    ((88.9, 55.88), (165.1, 55.88)),
+]
 
-  (symbol (lib_id "Motor:Motor_DC") (at 165.1 72.39 0) (unit 1)
-    (in_bom yes) (on_board yes) (dnp no)
-    (uuid {generate_uuid()})
-    (property "Reference" "M1" (at 170.18 68.58 0)
-      (effects (font (size 1.27 1.27)) (justify left))
-    )
-    (property "Value" "DC_Fan" (at 170.18 71.12 0)
-      (effects (font (size 1.27 1.27)) (justify left))
-    )
-    (property "Footprint" "" (at 165.1 74.676 0)
-      (effects (font (size 1.27 1.27)) hide)
-    )
-    (pin "1" (uuid {generate_uuid()}))
-    (pin "2" (uuid {generate_uuid()}))
-  )
+TEXTS = [
+    ("Temperature Sensor\n(Software Simulated)", (35.56, 58.42), 1.27),
+    ("STM32 Controller\n72MHz ARM Cortex-M3", (71.12, 45.72), 1.27),
+    ("Fan Driver Circuit\nPWM @ 8kHz", (142.24, 45.72), 1.27),
+    ("PA0: ADC Input (Temperature)\nPA6: PWM Output (TIM3_CH1)\nPA9/PA10: UART Debug @ 115200", (45.72, 106.68), 1.016),
+]
 
-  (symbol (lib_id "power:+5V") (at 165.1 55.88 0) (unit 1)
-    (in_bom yes) (on_board yes) (dnp no)
-    (uuid {generate_uuid()})
-    (property "Reference" "#PWR01" (at 165.1 59.69 0)
-      (effects (font (size 1.27 1.27)) hide)
-    )
-    (property "Value" "+5V" (at 165.1 52.07 0)
-      (effects (font (size 1.27 1.27)))
-    )
-    (pin "1" (uuid {generate_uuid()}))
-  )
+def build_schematic():
+    """The fan control schematic as a kicad_model.Schematic"""
+    sch = Schematic("STM32F103C8 Fan Control System", rev="1.0", company="Real-Time Systems Project",
+                    comments=["Temperature-controlled DC fan using PWM",
+                              "LM35 sensor simulation in software",
+                              "UART debug output on PA9/PA10"])
+    sch.lib_symbols = lib_symbols_from_text(LIB_SYMBOLS)
 
-  (symbol (lib_id "power:GND") (at 142.24 93.98 0) (unit 1)
-    (in_bom yes) (on_board yes) (dnp no)
-    (uuid {generate_uuid()})
-    (property "Reference" "#PWR02" (at 142.24 100.33 0)
-      (effects (font (size 1.27 1.27)) hide)
-    )
-    (property "Value" "GND" (at 142.24 97.79 0)
-      (effects (font (size 1.27 1.27)))
+    sch.add(*(Junction(at) for at in JUNCTIONS))
+    sch.add(*(Wire(start, end) for start, end in WIRES))
+    sch.add(*(Text(text, at, size=size) for text, at, size in TEXTS))
+    sch.add(
+        Symbol("Sensor_Temperature:LM35", (50.8, 81.28), properties=[
+            Property("Reference", "U2", (45.72, 73.66), justify='left'),
+            Property("Value", "LM35", (45.72, 76.2), justify='left'),
+            Property("Footprint", "Package_TO_SOT_THT:TO-92_Inline", (50.8, 83.82), hide=True),
+        ], pins=pins(1, 2, 3)),
+        Symbol("MCU_ST_STM32F1:STM32F103C8Tx", (88.9, 73.66), properties=[
+            Property("Reference", "U1", (88.9, 33.02)),
+            Property("Value", "STM32F103C8T6", (88.9, 35.56)),
+            Property("Footprint", "Package_QFP:LQFP-48_7x7mm_P0.5mm", (88.9, 116.84), hide=True),
+        ], pins=pins(1, 2, 10, 16, 30, 31)),
+        Symbol("Device:R", (123.19, 76.2), angle=90, properties=[
+            Property("Reference", "R1", (123.19, 71.12), angle=90),
+            Property("Value", "1k", (123.19, 73.66), angle=90),
+            Property("Footprint", "Resistor_THT:R_Axial_DIN0207_L6.3mm_D2.5mm_P10.16mm_Horizontal", (123.19, 77.978), hide=True),
+        ], pins=pins(1, 2)),
+        Symbol("Transistor_BJT:2N2222", (137.16, 83.82), properties=[
+            Property("Reference", "Q1", (142.24, 80.01), justify='left'),
+            Property("Value", "2N2222", (142.24, 82.55), justify='left'),
+            Property("Footprint", "Package_TO_SOT_THT:TO-92_Inline", (142.24, 85.725), justify='left', italic=True, hide=True),
+        ], pins=pins(1, 2, 3)),
+        Symbol("Diode:1N4007", (165.1, 85.09), angle=270, properties=[
+            Property("Reference", "D1", (167.64, 83.82), angle=90, justify='left'),
+            Property("Value", "1N4007", (167.64, 86.36), angle=90, justify='left'),
+            Property("Footprint", "Diode_THT:D_DO-41_SOD81_P10.16mm_Horizontal", (160.655, 85.09), hide=True),
+        ], pins=pins(1, 2)),
+        Symbol("Motor:Motor_DC", (165.1, 72.39), properties=[
+            Property("Reference", "M1", (170.18, 68.58), justify='left'),
+            Property("Value", "DC_Fan", (170.18, 71.12), justify='left'),
+            Property("Footprint", "", (165.1, 74.676), hide=True),
+        ], pins=pins(1, 2)),
+        PowerFlag("+5V", (165.1, 55.88), "#PWR01"),
+        PowerFlag("GND", (142.24, 93.98), "#PWR02"),
     )
-    (pin "1" (uuid {generate_uuid()}))
-  )
+    return sch
 
-  (sheet_instances
-    (path "/" (page "1"))
-  )
-)
-'''
-    
-    return schematic_content
+def create_kicad_schematic():
+    """Generate the complete KiCad schematic file contents"""
+    return build_schematic().to_string()
 
 def export_schematic():
     """Create the KiCad schematic and export to various formats"""
@@ -687,11 +501,8 @@ def export_schematic():
     
     # Generate the schematic file
     print("[Step 1/4] Generating KiCad schematic...")
-    schematic_content = create_kicad_schematic()
-    
     output_file = "RTS_FanControl.kicad_sch"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(schematic_content)
+    build_schematic().save(output_file)
     
     print(f"✓ Schematic generated → {output_file}")
     print()
@@ -702,31 +513,17 @@ def export_schematic():
     print("✓ Directory created → report_outputs/")
     print()
     
-    # Export to PDF using KiCad CLI (if available)
-    print("[Step 3/4] Attempting to export schematic to PDF/SVG...")
-    print("Note: This requires KiCad CLI to be installed and in PATH")
-    
-    try:
-        # Try to export PDF
-        pdf_cmd = f'kicad-cli sch export pdf "{output_file}" -o "report_outputs/{output_file.replace(".kicad_sch", ".pdf")}"'
-        result = os.system(pdf_cmd)
-        if result == 0:
-            print("✓ PDF exported → report_outputs/RTS_FanControl.pdf")
-        else:
-            print("⚠ PDF export failed (KiCad CLI may not be installed)")
-    except Exception as e:
-        print(f"⚠ PDF export failed: {e}")
+    # Export to PDF/SVG on the export queue (kicad-cli if available,
+    # otherwise the built-in SVG renderer)
+    print("[Step 3/4] Exporting schematic to PDF/SVG...")
+    print("Note: PDF export requires KiCad CLI to be installed and in PATH")
     
-    try:
-        # Try to export SVG
-        svg_cmd = f'kicad-cli sch export svg "{output_file}" -o "report_outputs/"'
-        result = os.system(svg_cmd)
-        if result == 0:
-            print("✓ SVG exported → report_outputs/RTS_FanControl.svg")
-        else:
-            print("⚠ SVG export failed (KiCad CLI may not be installed)")
-    except Exception as e:
-        print(f"⚠ SVG export failed: {e}")
+    jobs, up_to_date, unsupported = schematic_export.plan_jobs([output_file], output_dir="report_outputs")
+    for output in up_to_date:
+        print(f"✓ Up to date → {output}")
+    for output in unsupported:
+        print(f"⚠ {output} skipped (KiCad CLI not installed)")
+    schematic_export.export_all(jobs, on_result=schematic_export.print_result)
     
     print()
     
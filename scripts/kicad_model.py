@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+RTS Fan Control - KiCad Schematic Model
+Typed in-memory model of a KiCad schematic (symbols, power flags, wires,
+junctions, labels, text) with a streaming S-expression writer
+
+    sch = kicad_model.Schematic(title="STM32F103C8 Fan Control System")
+    sch.lib_symbols.append(kicad_model.LibSymbol("Device:R", R_BODY))
+    sch.add(kicad_model.Symbol("Device:R", (123.19, 76.2), angle=90,
+                               properties=[...], pins=kicad_model.pins(1, 2)))
+    sch.add(kicad_model.Wire((111.76, 76.2), (119.38, 76.2)))
+    sch.save("RTS_FanControl.kicad_sch")
+
+Every item writes its own S-expression straight to the file handle in the
+KiCad 7 layout, a few short f.write() calls per item, so the size of the
+schematic never shows up as one big string in memory.
+
+Library symbol definitions (lib_symbols) are cached copies of the KiCad
+library entries and are kept as verbatim S-expression text.
+
+Usage:
+    python kicad_model.py [copies] [--output PATH]
+                                    # Write `copies` tiled copies of the
+                                    # fan controller and report the speed
+"""
+
+import copy
+import io
+import os
+import re
+import sys
+import time
+import uuid
+from datetime import datetime
+
+KICAD_VERSION = 20230121
+FONT_SIZE = 1.27
+
+def generate_uuid():
+    """Generate a KiCad-compatible UUID"""
+    return str(uuid.uuid4())
+
+def fmt(value):
+    """KiCad number: at most 4 decimals, no trailing zeros"""
+    text = f"{value:.4f}".rstrip('0').rstrip('.')
+    return '0' if text == '-0' else text
+
+def quote(text):
+    """Quoted S-expression string (newlines written as \\n)"""
+    return '"' + str(text).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+
+def _effects(size=FONT_SIZE, justify=None, hide=False, italic=False):
+    font = f"(font (size {fmt(size)} {fmt(size)}){' italic' if italic else ''})"
+    return f"(effects {font}{f' (justify {justify})' if justify else ''}{' hide' if hide else ''})"
+
+# ============================================================
+# SCHEMATIC ITEMS
+# ============================================================
+
+class Property:
+    """Symbol field such as Reference, Value or Footprint"""
+    __slots__ = ('name', 'value', 'at', 'angle', 'size', 'justify', 'hide', 'italic')
+
+    def __init__(self, name, value, at, angle=0, size=FONT_SIZE, justify=None, hide=False, italic=False):
+        self.name = name
+        self.value = value
+        self.at = at
+        self.angle = angle
+        self.size = size
+        self.justify = justify
+        self.hide = hide
+        self.italic = italic
+
+    def write(self, f, indent="    "):
+        x, y = self.at
+        f.write(f"{indent}(property {quote(self.name)} {quote(self.value)} "
+                f"(at {fmt(x)} {fmt(y)} {fmt(self.angle)})\n")
+        f.write(f"{indent}  {_effects(self.size, self.justify, self.hide, self.italic)}\n")
+        f.write(f"{indent})\n")
+
+class Pin:
+    """Pin entry of a placed symbol (KiCad tracks a uuid per pin)"""
+    __slots__ = ('number', 'uuid')
+
+    def __init__(self, number, uuid=None):
+        self.number = str(number)
+        self.uuid = uuid or generate_uuid()
+
+def pins(*numbers, prefix=None):
+    """Pin list; with prefix the uuids are fixed as '<prefix>-pin<number>'"""
+    return [Pin(n, f"{prefix}-pin{n}" if prefix else None) for n in numbers]
+
+class Symbol:
+    """Placed instance of a library symbol"""
+    kind = 'symbol'
+
+    def __init__(self, lib_id, at, angle=0, properties=(), pins=(), mirror=None, unit=1, uuid=None):
+        self.lib_id = lib_id
+        self.at = at
+        self.angle = angle
+        self.mirror = mirror
+        self.unit = unit
+        self.properties = list(properties)
+        self.pins = list(pins)
+        self.uuid = uuid or generate_uuid()
+
+    def field(self, name):
+        """Value of the named property (None if absent)"""
+        for prop in self.properties:
+            if prop.name == name:
+                return prop.value
+        return None
+
+    @property
+    def reference(self):
+        return self.field("Reference")
+
+    @property
+    def value(self):
+        return self.field("Value")
+
+    def write(self, f):
+        x, y = self.at
+        mirror = f" (mirror {self.mirror})" if self.mirror else ""
+        f.write(f"  (symbol (lib_id {quote(self.lib_id)}) (at {fmt(x)} {fmt(y)} {fmt(self.angle)})"
+                f"{mirror} (unit {self.unit})\n")
+        f.write("    (in_bom yes) (on_board yes) (dnp no)\n")
+        f.write(f"    (uuid {self.uuid})\n")
+        for prop in self.properties:
+            prop.write(f)
+        for pin in self.pins:
+            f.write(f"    (pin {quote(pin.number)} (uuid {pin.uuid}))\n")
+        f.write("  )\n")
+
+class PowerFlag(Symbol):
+    """power:<net> symbol; hidden #PWR reference, net name shown as the value"""
+
+    # (reference, value) y offsets of the KiCad power library symbols
+    OFFSETS = {'GND': (6.35, 3.81)}
+    DEFAULT_OFFSETS = (3.81, -3.81)
+
+    def __init__(self, net, at, reference, uuid=None, pin_uuid=None):
+        x, y = at
+        ref_dy, value_dy = self.OFFSETS.get(net, self.DEFAULT_OFFSETS)
+        super().__init__(f"power:{net}", at, properties=[
+            Property("Reference", reference, (x, y + ref_dy), hide=True),
+            Property("Value", net, (x, y + value_dy)),
+        ], pins=[Pin(1, pin_uuid)], uuid=uuid)
+
+    @property
+    def net(self):
+        return self.lib_id.split(":", 1)[1]
+
+class Wire:
+    """Straight wire segment"""
+    kind = 'wire'
+    __slots__ = ('start', 'end', 'uuid')
+
+    def __init__(self, start, end, uuid=None):
+        self.start = start
+        self.end = end
+        self.uuid = uuid or generate_uuid()
+
+    def write(self, f):
+        (x1, y1), (x2, y2) = self.start, self.end
+        f.write(f"  (wire (pts (xy {fmt(x1)} {fmt(y1)}) (xy {fmt(x2)} {fmt(y2)}))\n"
+                f"    (stroke (width 0) (type default))\n"
+                f"    (uuid {self.uuid})\n"
+                f"  )\n")
+
+class Junction:
+    """Connection dot where three or more wires meet"""
+    kind = 'junction'
+    __slots__ = ('at', 'uuid')
+
+    def __init__(self, at, uuid=None):
+        self.at = at
+        self.uuid = uuid or generate_uuid()
+
+    def write(self, f):
+        x, y = self.at
+        f.write(f"  (junction (at {fmt(x)} {fmt(y)}) (diameter 0) (color 0 0 0 0)\n"
+                f"    (uuid {self.uuid})\n"
+                f"  )\n")
+
+class Label:
+    """Local net label; wires touching labels with the same text are connected"""
+    kind = 'label'
+    __slots__ = ('text', 'at', 'angle', 'uuid')
+
+    def __init__(self, text, at, angle=0, uuid=None):
+        self.text = text
+        self.at = at
+        self.angle = angle
+        self.uuid = uuid or generate_uuid()
+
+    def write(self, f):
+        x, y = self.at
+        f.write(f"  (label {quote(self.text)} (at {fmt(x)} {fmt(y)} {fmt(self.angle)})\n"
+                f"    {_effects(justify='left bottom')}\n"
+                f"    (uuid {self.uuid})\n"
+                f"  )\n")
+
+class Text:
+    """Free text note (no electrical meaning)"""
+    kind = 'text'
+    __slots__ = ('text', 'at', 'angle', 'size', 'uuid')
+
+    def __init__(self, text, at, angle=0, size=FONT_SIZE, uuid=None):
+        self.text = text
+        self.at = at
+        self.angle = angle
+        self.size = size
+        self.uuid = uuid or generate_uuid()
+
+    def write(self, f):
+        x, y = self.at
+        f.write(f"  (text {quote(self.text)} (at {fmt(x)} {fmt(y)} {fmt(self.angle)})\n"
+                f"    {_effects(self.size, justify='left bottom')}\n"
+                f"    (uuid {self.uuid})\n"
+                f"  )\n")
+
+class LibSymbol:
+    """Cached library symbol definition, kept as verbatim S-expression text"""
+    __slots__ = ('lib_id', 'body')
+
+    def __init__(self, lib_id, body):
+        self.lib_id = lib_id
+        self.body = body
+
+    def write(self, f):
+        f.write(self.body.rstrip("\n") + "\n")
+
+def lib_symbols_from_text(text):
+    """LibSymbol per top-level (symbol ...) in a lib_symbols cache block"""
+    lib_symbols = []
+    for block in re.split(r'\n(?=    \(symbol ")', "\n" + text.strip("\n")):
+        if block.strip():
+            lib_id = re.match(r'\s*\(symbol "([^"]+)"', block).group(1)
+            lib_symbols.append(LibSymbol(lib_id, block))
+    return lib_symbols
+
+# Section order of a KiCad 7 file
+ITEM_ORDER = ('junction', 'wire', 'label', 'text', 'symbol')
+
+class Schematic:
+    """One schematic sheet: header, library cache and placed items"""
+
+    def __init__(self, title, rev="1.0", date=None, company="", comments=(), paper="A4", uuid=None):
+        self.uuid = uuid or generate_uuid()
+        self.paper = paper
+        self.title = title
+        self.date = date or datetime.now().strftime('%Y-%m-%d')
+        self.rev = rev
+        self.company = company
+        self.comments = list(comments)
+        self.lib_symbols = []
+        self.items = []
+
+    def add(self, *items):
+        """Append items; returns the last one for chaining"""
+        self.items.extend(items)
+        return items[-1] if items else None
+
+    def of_kind(self, kind):
+        """Items of one kind ('symbol' includes power flags)"""
+        return [item for item in self.items if item.kind == kind]
+
+    def write(self, f):
+        """Stream the whole file to a text handle"""
+        f.write(f"(kicad_sch (version {KICAD_VERSION}) (generator eeschema)\n\n")
+        f.write(f"  (uuid {self.uuid})\n\n")
+        f.write(f"  (paper {quote(self.paper)})\n\n")
+        f.write("  (title_block\n"
+                f"    (title {quote(self.title)})\n"
+                f"    (date {quote(self.date)})\n"
+                f"    (rev {quote(self.rev)})\n"
+                f"    (company {quote(self.company)})\n")
+        for i, comment in enumerate(self.comments, 1):
+            f.write(f"    (comment {i} {quote(comment)})\n")
+        f.write("  )\n\n")
+
+        f.write("  (lib_symbols\n")
+        for lib_symbol in self.lib_symbols:
+            lib_symbol.write(f)
+        f.write("  )\n")
+
+        # Grouped by kind in the order KiCad writes them, without sorting a copy
+        for kind in ITEM_ORDER:
+            first = True
+            for item in self.items:
+                if item.kind == kind:
+                    if first:
+                        f.write("\n")
+                        first = False
+                    item.write(f)
+
+        f.write("\n  (sheet_instances\n"
+                "    (path \"/\" (page \"1\"))\n"
+                "  )\n"
+                ")\n")
+
+    def save(self, path):
+        """Write the schematic to path (UTF-8)"""
+        with open(path, 'w', encoding='utf-8') as f:
+            self.write(f)
+        return path
+
+    def to_string(self):
+        """The file contents as one string (for small schematics and tests)"""
+        buffer = io.StringIO()
+        self.write(buffer)
+        return buffer.getvalue()
+
+# ============================================================
+# VARIANTS
+# ============================================================
+
+def _renumber(reference, offset):
+    """'R1' -> 'R101' for offset 100; '#PWR01' keeps its zero padding"""
+    match = re.match(r'^(.*?)(\d+)$', reference)
+    if not match:
+        return reference
+    prefix, number = match.groups()
+    return f"{prefix}{int(number) + offset:0{len(number)}d}"
+
+def translated(item, dx, dy, ref_offset=0):
+    """Copy of an item moved by (dx, dy) with fresh uuids and renumbered references"""
+    moved = copy.deepcopy(item)
+    for attr in ('at', 'start', 'end'):
+        if hasattr(moved, attr):
+            x, y = getattr(moved, attr)
+            setattr(moved, attr, (x + dx, y + dy))
+    moved.uuid = generate_uuid()
+    if moved.kind == 'symbol':
+        for prop in moved.properties:
+            x, y = prop.at
+            prop.at = (x + dx, y + dy)
+            if prop.name == "Reference":
+                prop.value = _renumber(prop.value, ref_offset)
+        for pin in moved.pins:
+            pin.uuid = generate_uuid()
+    return moved
+
+def tiled(schematic, copies, columns=4, pitch=(240.0, 140.0), paper="User"):
+    """Schematic holding `copies` copies of another, laid out on a grid"""
+    variant = Schematic(f"{schematic.title} x{copies}", rev=schematic.rev, date=schematic.date,
+                        company=schematic.company, comments=schematic.comments, paper=paper)
+    variant.lib_symbols = list(schematic.lib_symbols)
+    for n in range(copies):
+        dx, dy = (n % columns) * pitch[0], (n // columns) * pitch[1]
+        variant.items.extend(translated(item, dx, dy, ref_offset=100 * n) for item in schematic.items)
+    return variant
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    args = sys.argv[1:]
+    output = "fan_control_variant.kicad_sch"
+    if '--output' in args:
+        i = args.index('--output')
+        output = args[i + 1]
+        del args[i:i + 2]
+    copies = int(args[0]) if args else 16
+
+    import update_kicad_schematic
+    base = update_kicad_schematic.build_schematic()
+
+    start = time.perf_counter()
+    variant = tiled(base, copies)
+    built = time.perf_counter() - start
+
+    start = time.perf_counter()
+    variant.save(output)
+    written = time.perf_counter() - start
+
+    symbols = len(variant.of_kind('symbol'))
+    wires = len(variant.of_kind('wire'))
+    size = os.path.getsize(output)
+    print(f"✓ {copies} copies: {symbols} symbols, {wires} wires -> {output}")
+    print(f"  Built in {built * 1000:.1f} ms, written in {written * 1000:.1f} ms "
+          f"({size / 1e6:.2f} MB, {size / 1e6 / max(written, 1e-9):.1f} MB/s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+RTS Fan Control - KiCad Schematic Patcher
+Brings an existing .kicad_sch in line with a kicad_model.Schematic through
+the smallest set of text edits, instead of rewriting the whole file
+
+Items are matched by uuid first, then by what they are: symbols by lib_id
+and position, wires by their end points, junctions by position, text by
+position and labels by name and position. A matched item keeps its uuid and
+formatting; only fields that differ (symbol value/footprint, text, title
+block) are rewritten in place, and a symbol whose rotation or mirroring
+changed is re-emitted under its old uuids. Items missing from the file are
+inserted (with their library symbol if the cache lacks it); items the model
+does not have are only removed with prune=True, so anything added by hand in
+eeschema survives. All other bytes of the file stay as they were.
+
+Inserted items are written the way the file already is: KiCad 8+ files
+(tab-indented, one list per line, quoted uuids, (hide yes)) get that layout,
+so the next eeschema save does not rewrite them. Model ids that are not
+UUIDs (e.g. 'wire-lm35-out-1') are replaced by UUIDs derived from them, so
+repeated patches mint the same ones.
+
+Usage:
+    python kicad_patch.py [schematic] [--generator MODULE]
+        # Lists the edits "python MODULE.py --patch" would make (default:
+        # update_kicad_schematic) without touching the file
+"""
+
+import copy
+import importlib
+import io
+import os
+import sys
+import tempfile
+import uuid
+
+import kicad_model
+import kicad_sexpr
+
+DEFAULT_SCHEMATIC = "../circuit/RTS_FanControl.kicad_sch"
+
+GRID = 100      # Positions are matched in 1/100 mm
+
+PATCHED_FIELDS = ("Value", "Footprint")
+
+class Edit:
+    """Replace text[start:end] with text"""
+    __slots__ = ('start', 'end', 'text', 'description')
+
+    def __init__(self, start, end, text, description):
+        self.start = start
+        self.end = end
+        self.text = text
+        self.description = description
+
+    def __repr__(self):
+        return f"Edit({self.description!r})"
+
+def _xy(x, y):
+    return (round(float(x) * GRID), round(float(y) * GRID))
+
+# ============================================================
+# MATCHING
+# ============================================================
+
+def model_key(item):
+    """Identity of a model item apart from its uuid"""
+    if item.kind == 'symbol':
+        return ('symbol', item.lib_id, _xy(*item.at))
+    if item.kind == 'wire':
+        return ('wire', frozenset((_xy(*item.start), _xy(*item.end))))
+    if item.kind == 'label':
+        return ('label', item.text, _xy(*item.at))
+    return (item.kind, _xy(*item.at))
+
+def node_key(node):
+    """Identity of a parsed top-level item apart from its uuid (None if not matched)"""
+    head = node.head
+    if head == 'symbol':
+        return ('symbol', node.value('lib_id'), _xy(*node.value('at')[:2]))
+    if head == 'wire':
+        return ('wire', frozenset(_xy(*xy.atoms()) for xy in node.find('pts').find_all('xy')))
+    if head == 'label':
+        return ('label', node.atoms()[0], _xy(*node.value('at')[:2]))
+    if head in ('junction', 'text'):
+        return (head, _xy(*node.value('at')[:2]))
+    return None
+
+def _token_span(doc, index):
+    start = doc.offsets()[index]
+    return start, start + len(doc.tokens[index])
+
+def _replace_string(doc, index, value, description):
+    """Edit replacing one quoted-string token"""
+    start, end = _token_span(doc, index)
+    return Edit(start, end, kicad_model.quote(value), description)
+
+def _serialize(item):
+    buffer = io.StringIO()
+    item.write(buffer)
+    return buffer.getvalue()
+
+def _line_start(text, offset):
+    """Offset of the start of the line holding offset, if only whitespace precedes it"""
+    start = offset
+    while start > 0 and text[start - 1] in ' \t':
+        start -= 1
+    return start if start == 0 or text[start - 1] == '\n' else offset
+
+# ============================================================
+# LAYOUT
+# ============================================================
+
+class Layout:
+    """How a file writes its S-expressions"""
+    __slots__ = ('indent', 'quoted_uuids', 'hide_lists')
+
+    def __init__(self, indent="  ", quoted_uuids=False, hide_lists=False):
+        self.indent = indent
+        self.quoted_uuids = quoted_uuids
+        self.hide_lists = hide_lists
+
+    @property
+    def one_per_line(self):
+        """KiCad 8+ layout (tab-indented, every child list on its own line)"""
+        return self.indent == "\t"
+
+def file_layout(doc):
+    """Layout of a parsed file, read off its first item, uuids and hide flags"""
+    tokens = doc.tokens
+    items = doc.items()
+    indent = "  "
+    if items:
+        start = doc.offsets()[items[0].index]
+        indent = doc.text[_line_start(doc.text, start):start] or indent
+    quoted = hide_lists = False
+    for i in range(1, len(tokens) - 1):
+        if tokens[i - 1] == '(' and tokens[i] == 'uuid':
+            quoted = tokens[i + 1].startswith('"')
+            break
+    hide_lists = any(tokens[i - 1] == '(' and tokens[i] == 'hide' for i in range(1, len(tokens)))
+    return Layout(indent, quoted, hide_lists)
+
+def _tree(node):
+    """[head, child, ...] with raw (still quoted) atom tokens"""
+    return [node.head] + [_tree(c) if isinstance(c, kicad_sexpr.Node) else c for c in node.children()]
+
+def _restyle(tree, layout):
+    """Apply the file's uuid quoting and (hide yes) spelling to a tree"""
+    head, *rest = tree
+    if head == 'uuid' and layout.quoted_uuids and rest and not rest[0].startswith('"'):
+        rest[0] = f'"{rest[0]}"'
+    if layout.hide_lists and 'hide' in rest:
+        rest = [c for c in rest if c != 'hide'] + [['hide', 'yes']]
+    return [head] + [_restyle(c, layout) if isinstance(c, list) else c for c in rest]
+
+def _pretty(tree, depth, indent):
+    """KiCad 8+ text: atoms on the head line, one child list per line"""
+    head, *rest = tree
+    if not any(isinstance(c, list) for c in rest):
+        return "(" + " ".join([head] + rest) + ")"
+    lead = []
+    while rest and not isinstance(rest[0], list):
+        lead.append(rest.pop(0))
+    inner = indent * (depth + 1)
+    if all(isinstance(c, list) and c[0] == 'xy' for c in rest):
+        # Point lists stay on one line: (pts\n (xy ..) (xy ..)\n)
+        lines = [inner + " ".join(_pretty(c, 0, indent) for c in rest)]
+    else:
+        lines = [inner + (_pretty(c, depth + 1, indent) if isinstance(c, list) else c) for c in rest]
+    return "\n".join(["(" + " ".join([head] + lead)] + lines + [indent * depth + ")"])
+
+def render(text, layout, depth=1):
+    """kicad_model text re-laid out for the target file, one item per call"""
+    if not layout.one_per_line:
+        return text if text.endswith("\n") else text + "\n"
+    tree = _restyle(_tree(kicad_sexpr.Document(text).root), layout)
+    return layout.indent * depth + _pretty(tree, depth, layout.indent) + "\n"
+
+def _is_uuid(value):
+    try:
+        uuid.UUID(str(value))
+    except ValueError:
+        return False
+    return True
+
+def real_uuid(value, namespace):
+    """value if it is a UUID, else the UUID minted for it (uuid5 in namespace)"""
+    return value if _is_uuid(value) else str(uuid.uuid5(namespace, str(value)))
+
+def with_real_uuids(item, namespace):
+    """Copy of a model item whose non-UUID ids are replaced by minted UUIDs"""
+    item = copy.deepcopy(item)
+    for obj in [item] + list(getattr(item, 'pins', ())):
+        obj.uuid = real_uuid(obj.uuid, namespace)
+    return item
+
+# ============================================================
+# PLANNING
+# ============================================================
+
+def _symbol_edits(doc, node, item, label, layout, namespace):
+    """In-place edits turning a matched symbol node into the model symbol"""
+    angle = float(node.value('at')[2]) if len(node.value('at')) > 2 else 0.0
+    if angle != float(item.angle) or (node.value('mirror') or None) != item.mirror:
+        # Orientation changed: re-emit, keeping the file's uuids
+        replacement = copy.deepcopy(item)
+        replacement.uuid = node.uuid
+        old_pins = {pin.atoms()[0]: pin.value('uuid') for pin in node.find_all('pin')}
+        for pin in replacement.pins:
+            pin.uuid = old_pins.get(pin.number) or real_uuid(pin.uuid, namespace)
+        text = _serialize(replacement).strip()
+        instances = node.find('instances')
+        if instances is not None:
+            # Keep the annotation eeschema stored for this symbol
+            text = f"{text[:-1].rstrip()}\n    {instances.text()}\n  )"
+        start, end = node.span()
+        text = render(text, layout).strip()
+        return [Edit(start, end, text, f"re-orient {label}")]
+
+    edits = []
+    for prop in node.find_all('property'):
+        name, *value = prop.atoms()
+        if name in PATCHED_FIELDS:
+            wanted = item.field(name)
+            if wanted is not None and (value[0] if value else '') != wanted:
+                edits.append(_replace_string(doc, prop.index + 3, wanted,
+                                             f"{label} {name}: {value[0] if value else ''!r} -> {wanted!r}"))
+    return edits
+
+def _title_edits(doc, schematic):
+    block = doc.root.find('title_block')
+    if block is None:
+        return []
+    wanted = {'title': schematic.title, 'date': schematic.date, 'rev': schematic.rev,
+              'company': schematic.company}
+    wanted.update({('comment', str(i)): c for i, c in enumerate(schematic.comments, 1)})
+    edits = []
+    for entry in block.children():
+        if not isinstance(entry, kicad_sexpr.Node):
+            continue
+        atoms = entry.atoms()
+        key = entry.head if entry.head != 'comment' else ('comment', atoms[0])
+        if key in wanted and atoms and atoms[-1] != wanted[key]:
+            # The value is the last token before the closing parenthesis
+            edits.append(_replace_string(doc, entry.end - 1, wanted[key],
+                                         f"title block {key if isinstance(key, str) else 'comment ' + key[1]}: "
+                                         f"{atoms[-1]!r} -> {wanted[key]!r}"))
+    return edits
+
+def plan(doc, schematic, prune=False):
+    """List of Edits that make the parsed document match the model"""
+    edits = _title_edits(doc, schematic)
+    layout = file_layout(doc)
+    namespace = uuid.UUID(schematic.uuid) if _is_uuid(schematic.uuid) else uuid.NAMESPACE_OID
+
+    by_key = {}
+    for node in doc.items():
+        key = node_key(node)
+        if key is not None:
+            by_key.setdefault(key, node)
+
+    matched = set()
+    inserted = []
+    for item in schematic.items:
+        node = doc.by_uuid.get(real_uuid(item.uuid, namespace))
+        if node is None or node.head != item.kind:
+            node = by_key.get(model_key(item))
+        if node is None or node in matched:
+            inserted.append(item)
+            continue
+        matched.add(node)
+        if item.kind == 'symbol':
+            label = doc.reference(node) or item.reference
+            if label.endswith('?'):
+                label = f"{item.reference} ({item.lib_id})"
+            edits += _symbol_edits(doc, node, item, label, layout, namespace)
+        elif item.kind == 'text' and node.atoms()[0] != item.text:
+            edits.append(_replace_string(doc, node.index + 2, item.text,
+                                         f"text {node.atoms()[0]!r} -> {item.text!r}"))
+
+    # New items go in front of (sheet_instances ...), or before the final ')'
+    anchor = doc.root.find('sheet_instances')
+    at = _line_start(doc.text, anchor.span()[0]) if anchor is not None else doc.root.span()[1] - 1
+    if inserted:
+        text = "".join(render(_serialize(with_real_uuids(item, namespace)), layout) for item in inserted)
+        described = ", ".join(_describe(item) for item in inserted[:6])
+        more = f" (+{len(inserted) - 6} more)" if len(inserted) > 6 else ""
+        edits.append(Edit(at, at, text, f"add {len(inserted)} item(s): {described}{more}"))
+
+        cached = doc.lib_symbols()
+        cache = doc.root.find('lib_symbols')
+        missing = [lib for lib in schematic.lib_symbols
+                   if lib.lib_id not in cached and any(i.kind == 'symbol' and i.lib_id == lib.lib_id
+                                                       for i in inserted)]
+        if missing and cache is not None:
+            close = doc.offsets()[cache.end]
+            at = _line_start(doc.text, close)
+            edits.append(Edit(at, at, "".join(render(_serialize(lib), layout, depth=2) for lib in missing),
+                              f"add library symbols: {', '.join(lib.lib_id for lib in missing)}"))
+
+    if prune:
+        for node in doc.items():
+            if node_key(node) is not None and node not in matched:
+                start, end = node.span()
+                start = _line_start(doc.text, start)
+                if doc.text[end:end + 1] == '\n':
+                    end += 1
+                edits.append(Edit(start, end, "", f"remove {_describe_node(doc, node)}"))
+    return edits
+
+def _describe(item):
+    if item.kind == 'symbol':
+        return f"{item.reference} ({item.lib_id})"
+    if item.kind == 'wire':
+        return f"wire {item.start}->{item.end}"
+    if item.kind in ('text', 'label'):
+        return f"{item.kind} {item.text!r}"
+    return f"{item.kind} {item.at}"
+
+def _describe_node(doc, node):
+    if node.head == 'symbol':
+        return f"{doc.reference(node)} ({node.value('lib_id')})"
+    if node.head == 'wire':
+        x1, y1, x2, y2 = (float(v) for xy in node.find('pts').find_all('xy') for v in xy.atoms())
+        return f"wire {(x1, y1)}->{(x2, y2)}"
+    if node.head in ('text', 'label'):
+        return f"{node.head} {node.atoms()[0]!r}"
+    x, y = node.value('at')[:2]
+    return f"{node.head} {(float(x), float(y))}"
+
+# ============================================================
+# APPLYING
+# ============================================================
+
+def apply(text, edits):
+    """Text with all edits applied (edits must not overlap)"""
+    parts = []
+    position = 0
+    for edit in sorted(edits, key=lambda e: (e.start, e.end)):
+        if edit.start < position:
+            raise ValueError(f"Overlapping edits at offset {edit.start}: {edit.description}")
+        parts.append(text[position:edit.start])
+        parts.append(edit.text)
+        position = edit.end
+    parts.append(text[position:])
+    return "".join(parts)
+
+def _umask():
+    """Current process umask (reading it means setting it, so put it back)"""
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+def patch_file(path, schematic, prune=False, dry_run=False):
+    """Patch path in place (atomically) and return the applied Edits"""
+    doc = kicad_sexpr.load(path)
+    edits = plan(doc, schematic, prune=prune)
+    if edits and not dry_run:
+        patched = apply(doc.text, edits)
+        kicad_sexpr.Document(patched)   # Refuse to write something KiCad cannot read
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            # mkstemp makes the file 0600; give it the mode open() would have
+            os.chmod(tmp_path, 0o666 & ~_umask())
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+                f.write(patched)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    return edits
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    args = sys.argv[1:]
+    generator = "update_kicad_schematic"
+    if '--generator' in args:
+        i = args.index('--generator')
+        generator = args[i + 1]
+        del args[i:i + 2]
+    path = args[0] if args else DEFAULT_SCHEMATIC
+    try:
+        doc = kicad_sexpr.load(path)
+        module = importlib.import_module(generator)
+    except (FileNotFoundError, ImportError) as e:
+        print(f"❌ {e}")
+        return 1
+    edits = plan(doc, module.build_schematic())
+    print(f"{len(edits)} edit(s) to {path} from {generator}:")
+    for edit in edits:
+        print(f"  - {edit.description}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
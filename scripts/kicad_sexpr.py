@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+RTS Fan Control - KiCad Schematic Reader
+Tokenizer and indexed parser for .kicad_sch files (KiCad 6-9 layouts)
+
+The text is tokenized once by a single regex into a flat token list, and
+matching parentheses are paired with NumPy (depth prefix sum, stable sort).
+A Node is only (document, token index): walking its children jumps over
+whole sub-trees through the match table, so no nested lists are built
+unless a sub-tree is asked for (Node.materialize()).
+
+Indexes over the top-level items, built on load:
+    by_uuid       uuid -> item (symbols, wires, junctions, labels, text, ...)
+    by_reference  'R1' -> [symbols]   (unannotated 'R?' can repeat)
+    by_lib_id     'Device:R' -> [symbols]
+
+    doc = kicad_sexpr.load("../circuit/RTS_FanControl.kicad_sch")
+    for node in doc.by_lib_id["Device:C"]:
+        print(doc.reference(node), node.field("Value"), node.value("at"))
+
+Usage:
+    python kicad_sexpr.py [file.kicad_sch]              # Summary and parse time
+    python kicad_sexpr.py old.kicad_sch new.kicad_sch   # Item diff by uuid
+"""
+
+import re
+import sys
+import time
+
+import numpy as np
+
+DEFAULT_SCHEMATIC = "../circuit/RTS_FanControl.kicad_sch"
+
+# Parenthesis, quoted string (with escapes) or bare atom
+_TOKEN_RE = re.compile(r'[()]|"(?:[^"\\]|\\.)*"|[^\s()"]+')
+_ESCAPE_RE = re.compile(r'\\(.)')
+_ESCAPES = {'n': '\n', 't': '\t'}
+
+class ParseError(ValueError):
+    """Malformed S-expression"""
+
+def unquote(token):
+    """Atom value: quoted strings lose their quotes and escapes"""
+    if token[:1] != '"':
+        return token
+    body = token[1:-1]
+    if '\\' not in body:
+        return body
+    return _ESCAPE_RE.sub(lambda m: _ESCAPES.get(m.group(1), m.group(1)), body)
+
+def tokenize(text):
+    """(tokens, match): token strings and, per parenthesis, the index of its partner"""
+    tokens = _TOKEN_RE.findall(text)
+    codes = np.array(tokens, dtype=object)
+    delta = (codes == '(').astype(np.int8) - (codes == ')')
+    depth = np.cumsum(delta, dtype=np.int32)
+    if len(depth) and (depth.min() < 0 or depth[-1] != 0):
+        raise ParseError("Unbalanced parentheses" if depth.min() < 0 else
+                         f"{int(depth[-1])} unclosed '('")
+
+    # The k-th '(' opening depth d pairs with the k-th ')' closing back below d
+    opens = np.flatnonzero(delta == 1)
+    closes = np.flatnonzero(delta == -1)
+    opens = opens[np.argsort(depth[opens], kind='stable')]
+    closes = closes[np.argsort(depth[closes] + 1, kind='stable')]
+    match = np.zeros(len(tokens), dtype=np.int64)
+    match[opens] = closes
+    match[closes] = opens
+    return tokens, match.tolist()
+
+# ============================================================
+# NODES
+# ============================================================
+
+class Node:
+    """View of one (head ...) list inside a Document"""
+    __slots__ = ('doc', 'index')
+
+    def __init__(self, doc, index):
+        self.doc = doc
+        self.index = index
+
+    @property
+    def head(self):
+        return self.doc.tokens[self.index + 1]
+
+    @property
+    def end(self):
+        """Token index of the closing parenthesis"""
+        return self.doc.match[self.index]
+
+    def children(self):
+        """Direct children after the head: Node for lists, raw token for atoms"""
+        tokens, match, doc = self.doc.tokens, self.doc.match, self.doc
+        i, end = self.index + 2, self.doc.match[self.index]
+        while i < end:
+            if tokens[i] == '(':
+                yield Node(doc, i)
+                i = match[i] + 1
+            else:
+                yield tokens[i]
+                i += 1
+
+    def atoms(self):
+        """Unquoted atom values among the direct children"""
+        return [unquote(child) for child in self.children() if not isinstance(child, Node)]
+
+    def find(self, head):
+        """First direct child list with this head (None if absent)"""
+        for child in self.children():
+            if isinstance(child, Node) and child.head == head:
+                return child
+        return None
+
+    def find_all(self, head):
+        """Every direct child list with this head"""
+        return [child for child in self.children() if isinstance(child, Node) and child.head == head]
+
+    def value(self, head, default=None):
+        """Atoms of the (head ...) child: one value, a tuple of several, or default"""
+        child = self.find(head)
+        if child is None:
+            return default
+        atoms = child.atoms()
+        if not atoms:
+            return default
+        return atoms[0] if len(atoms) == 1 else tuple(atoms)
+
+    def field(self, name):
+        """Value of a symbol (property "name" "value" ...) entry"""
+        for child in self.children():
+            if isinstance(child, Node) and child.head == 'property':
+                atoms = child.atoms()
+                if atoms and atoms[0] == name:
+                    return atoms[1] if len(atoms) > 1 else ''
+        return None
+
+    @property
+    def uuid(self):
+        return self.value('uuid')
+
+    def tokens(self):
+        """Token slice of this sub-tree (whitespace-independent, for comparisons)"""
+        return self.doc.tokens[self.index:self.end + 1]
+
+    def span(self):
+        """(start, end) character offsets in the source text"""
+        offsets = self.doc.offsets()
+        return offsets[self.index], offsets[self.end] + 1
+
+    def text(self):
+        """Source text of this sub-tree"""
+        start, end = self.span()
+        return self.doc.text[start:end]
+
+    def materialize(self):
+        """Nested lists [head, child, ...] with unquoted atoms"""
+        tokens, match = self.doc.tokens, self.doc.match
+        stack = [[]]
+        for i in range(self.index, self.end + 1):
+            token = tokens[i]
+            if token == '(':
+                stack.append([])
+            elif token == ')':
+                done = stack.pop()
+                stack[-1].append(done)
+            else:
+                stack[-1].append(unquote(token))
+        return stack[0][0]
+
+    def __eq__(self, other):
+        return isinstance(other, Node) and self.doc is other.doc and self.index == other.index
+
+    def __hash__(self):
+        return hash((id(self.doc), self.index))
+
+    def __repr__(self):
+        return f"Node({self.head}, uuid={self.uuid})"
+
+# ============================================================
+# DOCUMENT
+# ============================================================
+
+class Document:
+    """Tokenized schematic with uuid / reference / lib_id indexes"""
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens, self.match = tokenize(text)
+        if len(self.tokens) < 2 or self.tokens[0] != '(':
+            raise ParseError("Not an S-expression document")
+        self._offsets = None
+        self.root = Node(self, 0)
+        self._build_indexes()
+
+    def _build_indexes(self):
+        self.by_uuid = {}
+        self.by_reference = {}
+        self.by_lib_id = {}
+        tokens, match = self.tokens, self.match
+        for item in self.items():
+            # Inline child scan: (uuid ...) and (lib_id ...) are direct children
+            uuid = lib_id = None
+            i, end = item.index + 2, match[item.index]
+            while i < end:
+                if tokens[i] == '(':
+                    head = tokens[i + 1]
+                    if head == 'uuid' and uuid is None:
+                        uuid = unquote(tokens[i + 2])
+                    elif head == 'lib_id':
+                        lib_id = unquote(tokens[i + 2])
+                    i = match[i] + 1
+                else:
+                    i += 1
+            if uuid is not None:
+                self.by_uuid[uuid] = item
+            if lib_id is not None and item.head == 'symbol':
+                self.by_lib_id.setdefault(lib_id, []).append(item)
+                self.by_reference.setdefault(self.reference(item), []).append(item)
+
+    def offsets(self):
+        """Character offset of every token (computed on first use)"""
+        if self._offsets is None:
+            self._offsets = [m.start() for m in _TOKEN_RE.finditer(self.text)]
+        return self._offsets
+
+    def items(self):
+        """Top-level list items (header entries, lib_symbols, symbols, wires, ...)"""
+        return [child for child in self.root.children() if isinstance(child, Node)]
+
+    def of_kind(self, head):
+        """Top-level items with this head, e.g. 'wire' or 'symbol'"""
+        return [item for item in self.items() if item.head == head]
+
+    @property
+    def version(self):
+        return self.root.value('version')
+
+    def lib_symbols(self):
+        """{lib_id: definition Node} from the lib_symbols cache"""
+        cache = self.root.find('lib_symbols')
+        if cache is None:
+            return {}
+        return {node.atoms()[0]: node for node in cache.find_all('symbol')}
+
+    def reference(self, symbol):
+        """Annotated reference: instance path entry (KiCad 7+) or the Reference field"""
+        instances = symbol.find('instances')
+        if instances is not None:
+            for project in instances.find_all('project'):
+                for path in project.find_all('path'):
+                    reference = path.value('reference')
+                    if reference is not None:
+                        return reference
+        return symbol.field('Reference')
+
+    def item_keys(self):
+        """{key: item} for diffing: uuid, or head + position for uuid-less items"""
+        keys = {}
+        for item in self.items():
+            key = item.uuid
+            if key is None:
+                key = (item.head,) + tuple(item.atoms())
+            keys[key] = item
+        return keys
+
+def load(path):
+    """Parse a .kicad_sch (or any KiCad S-expression) file"""
+    with open(path, encoding='utf-8') as f:
+        return Document(f.read())
+
+def diff(old, new):
+    """(added, removed, changed) item lists between two Documents, matched by uuid"""
+    old_keys, new_keys = old.item_keys(), new.item_keys()
+    added = [new_keys[k] for k in new_keys if k not in old_keys]
+    removed = [old_keys[k] for k in old_keys if k not in new_keys]
+    changed = [(old_keys[k], new_keys[k]) for k in new_keys
+               if k in old_keys and old_keys[k].tokens() != new_keys[k].tokens()]
+    return added, removed, changed
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def _describe(doc, item):
+    if item.head == 'symbol':
+        return f"symbol {doc.reference(item)} ({item.value('lib_id')})"
+    if item.head == 'wire':
+        points = [p.atoms() for p in item.find('pts').find_all('xy')]
+        return "wire " + " -> ".join(f"({x}, {y})" for x, y in points)
+    if item.head in ('label', 'global_label', 'text'):
+        return f"{item.head} {item.atoms()[0]!r}"
+    return item.head
+
+def main():
+    args = sys.argv[1:]
+    paths = args or [DEFAULT_SCHEMATIC]
+
+    docs = []
+    for path in paths[:2]:
+        start = time.perf_counter()
+        try:
+            doc = load(path)
+        except FileNotFoundError:
+            print(f"❌ {path} not found")
+            return 1
+        except ParseError as e:
+            print(f"❌ {path}: {e}")
+            return 1
+        elapsed = time.perf_counter() - start
+        docs.append(doc)
+
+        kinds = {}
+        for item in doc.items():
+            kinds[item.head] = kinds.get(item.head, 0) + 1
+        print(f"✓ {path}: version {doc.version}, {len(doc.tokens)} tokens in {elapsed * 1000:.1f} ms")
+        print(f"  {len(doc.lib_symbols())} library symbols, "
+              + ", ".join(f"{n} {kind}" for kind, n in sorted(kinds.items())
+                          if kind in ('symbol', 'wire', 'junction', 'label', 'global_label', 'text')))
+
+    if len(docs) == 2:
+        added, removed, changed = diff(*docs)
+        print(f"\n{len(added)} added, {len(removed)} removed, {len(changed)} changed")
+        for item in removed:
+            print(f"  - {_describe(docs[0], item)}")
+        for item in added:
+            print(f"  + {_describe(docs[1], item)}")
+        for _, item in changed:
+            print(f"  ~ {_describe(docs[1], item)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,634 @@
+#!/usr/bin/env python3
+"""
+RTS Fan Control - In-Process Circuit Solver
+Modified nodal analysis (MNA) transient engine for the tempfan netlists
+
+Supports the element set used by simulate_tempfan.py and simulate_complete.py:
+- V sources (DC and PWL)
+- R, C, L
+- E (linear VCVS and VALUE={...} behavioral source with IF/V())
+- F (current-controlled current source)
+- D (diode, DC model) and Q (NPN/PNP, Ebers-Moll transport model)
+
+Integration is backward Euler on a fixed time step with Newton-Raphson for the
+nonlinear elements. Every element value can be overridden with an array, which
+solves a whole batch of design points in one pass (leading batch axis).
+
+Usage:
+    python mna_solver.py <netlist.cir> [probe ...]
+    python mna_solver.py --check       # DC regression checks against analytic values
+"""
+
+import math
+import re
+import sys
+
+import numpy as np
+
+# ============================================================
+# CONSTANTS
+# ============================================================
+
+SOLVER_VERSION = "1.1"     # Bump when results change (part of the cache key)
+
+VT = 0.025852          # Thermal voltage @ 27°C
+GMIN = 1e-12           # Minimum conductance (node to ground, junctions)
+RELTOL = 1e-4          # Newton relative tolerance
+VNTOL = 1e-6           # Newton absolute tolerance (V)
+MAX_NEWTON_ITER = 100
+
+SCALE_SUFFIXES = [
+    ('meg', 1e6), ('mil', 25.4e-6), ('t', 1e12), ('g', 1e9), ('k', 1e3),
+    ('m', 1e-3), ('u', 1e-6), ('n', 1e-9), ('p', 1e-12), ('f', 1e-15),
+]
+
+DIODE_DEFAULTS = {'is': 1e-14, 'n': 1.0}
+BJT_DEFAULTS = {'is': 1e-16, 'bf': 100.0, 'br': 1.0, 'nf': 1.0, 'nr': 1.0}
+
+_NUMBER_RE = re.compile(r'^([+-]?(?:\d+\.?\d*|\.\d+)(?:e[+-]?\d+)?)([a-z]*)$', re.IGNORECASE)
+_PROBE_RE = re.compile(r'\bv\(\s*([^,\s()]+)\s*(?:,\s*([^,\s()]+)\s*)?\)', re.IGNORECASE)
+_MODEL_RE = re.compile(r'^\.model\s+(\S+)\s+([a-z]+)\s*\(?(.*?)\)?\s*$', re.IGNORECASE)
+_PARAM_RE = re.compile(r'(\w+)\s*=\s*([^\s()]+)')
+
+GROUND_NAMES = ('0', 'gnd')
+
+# ============================================================
+# NETLIST PARSING
+# ============================================================
+
+def parse_value(token):
+    """Parse a SPICE number with scale suffix (10k, 1Meg, 100n, 5V, 2s)"""
+    match = _NUMBER_RE.match(token.strip())
+    if not match:
+        raise ValueError(f"Invalid numeric value: {token!r}")
+
+    value = float(match.group(1))
+    suffix = match.group(2).lower()
+    for name, scale in SCALE_SUFFIXES:
+        if suffix.startswith(name):
+            return value * scale
+    return value
+
+def _logical_lines(text):
+    """Join '+' continuations and multi-line {...} expressions, drop comments"""
+    lines = []
+    open_braces = 0
+
+    for raw in text.splitlines()[1:]:   # First line is always the title
+        line = raw.split(';', 1)[0].rstrip()
+        stripped = line.strip()
+        if not stripped:
+            continue
+
+        if open_braces > 0:
+            lines[-1] += ' ' + stripped
+        elif stripped.startswith('*'):
+            continue
+        elif stripped.startswith('+') and lines:
+            lines[-1] += ' ' + stripped[1:].strip()
+        elif stripped.startswith(')') and lines:
+            lines[-1] += ' ' + stripped
+        else:
+            lines.append(stripped)
+        open_braces += stripped.count('{') - stripped.count('}')
+
+    return lines
+
+class Circuit:
+    """Parsed netlist: nodes, elements, models and analysis directives"""
+
+    def __init__(self, title=""):
+        self.title = title
+        self.nodes = {}         # node name -> matrix index (ground excluded)
+        self.elements = []      # list of element dicts, in netlist order
+        self.models = {}        # model name -> {'type': ..., 'params': {...}}
+        self.tran = None        # (tstep, tstop)
+        self.probes = []        # vectors requested by write/wrdata
+
+    def node_index(self, name):
+        """Return the matrix index of a node, registering it if new (-1 = ground)"""
+        name = name.lower()
+        if name in GROUND_NAMES:
+            return -1
+        if name not in self.nodes:
+            self.nodes[name] = len(self.nodes)
+        return self.nodes[name]
+
+    def element(self, name):
+        """Look up an element by name (case-insensitive)"""
+        name = name.lower()
+        for el in self.elements:
+            if el['name'] == name:
+                return el
+        raise KeyError(f"No element named {name!r}")
+
+def _parse_source(circuit, name, tokens, rest):
+    """V source: DC value or PWL(t1 v1 t2 v2 ...)"""
+    element = {'type': 'V', 'name': name,
+               'nodes': (circuit.node_index(tokens[1]), circuit.node_index(tokens[2]))}
+
+    upper = rest.upper()
+    if upper.startswith('PWL'):
+        points = [parse_value(p) for p in rest[rest.index('(') + 1:rest.rindex(')')].split()]
+        element['value'] = 0.0
+        element['pwl'] = (np.array(points[0::2]), np.array(points[1::2]))
+    else:
+        args = [t for t in rest.split() if t.upper() != 'DC']
+        if len(args) != 1:
+            raise ValueError(f"Unsupported source specification for {name}: {rest!r}")
+        element['value'] = parse_value(args[0])
+    return element
+
+def _compile_expression(circuit, expression):
+    """Translate a VALUE={...} expression into a vectorized Python function"""
+    expression = expression.strip().lower()
+    controls = []
+
+    def replace_probe(match):
+        positive, negative = match.group(1), match.group(2)
+        for node in (positive, negative):
+            if node is not None and node not in GROUND_NAMES:
+                circuit.node_index(node)
+                if node not in controls:
+                    controls.append(node)
+        if negative is None:
+            return f"_v('{positive}')"
+        return f"(_v('{positive}') - _v('{negative}'))"
+
+    translated = _PROBE_RE.sub(replace_probe, expression)
+    translated = re.sub(r'\bif\s*\(', '_if(', translated).replace('^', '**')
+    code = compile(translated, '<behavioral>', 'eval')
+
+    return code, controls
+
+def _parse_element(circuit, line):
+    """Parse one element card into an element dict"""
+    tokens = line.split()
+    name = tokens[0].lower()
+    kind = name[0].upper()
+
+    if kind in 'RCL':
+        return {'type': kind, 'name': name,
+                'nodes': (circuit.node_index(tokens[1]), circuit.node_index(tokens[2])),
+                'value': parse_value(tokens[3])}
+
+    if kind == 'V':
+        rest = line.split(None, 3)[3] if len(tokens) > 3 else '0'
+        return _parse_source(circuit, name, tokens, rest)
+
+    if kind == 'E':
+        nodes = (circuit.node_index(tokens[1]), circuit.node_index(tokens[2]))
+        if tokens[3].upper().startswith('VALUE'):
+            expression = line[line.index('{') + 1:line.rindex('}')]
+            code, controls = _compile_expression(circuit, expression)
+            return {'type': 'B', 'name': name, 'nodes': nodes, 'value': 0.0,
+                    'code': code, 'controls': controls, 'expression': expression.strip()}
+        return {'type': 'E', 'name': name, 'nodes': nodes,
+                'control': (circuit.node_index(tokens[3]), circuit.node_index(tokens[4])),
+                'value': parse_value(tokens[5])}
+
+    if kind == 'F':
+        return {'type': 'F', 'name': name,
+                'nodes': (circuit.node_index(tokens[1]), circuit.node_index(tokens[2])),
+                'source': tokens[3].lower(), 'value': parse_value(tokens[4])}
+
+    if kind == 'D':
+        return {'type': 'D', 'name': name,
+                'nodes': (circuit.node_index(tokens[1]), circuit.node_index(tokens[2])),
+                'model': tokens[3].lower(), 'value': 1.0}
+
+    if kind == 'Q':
+        return {'type': 'Q', 'name': name,
+                'nodes': tuple(circuit.node_index(t) for t in tokens[1:4]),
+                'model': tokens[4].lower(), 'value': 1.0}
+
+    raise ValueError(f"Unsupported element: {line!r}")
+
+def _parse_control(circuit, lines):
+    """Apply the subset of .control commands we understand (alter/tran/write)"""
+    for line in lines:
+        tokens = line.split()
+        command = tokens[0].lower()
+
+        if command == 'alter' and circuit.tran is None:
+            args = [t for t in tokens[2:] if t.upper() not in ('DC', '=')]
+            circuit.element(tokens[1])['value'] = parse_value(args[0])
+        elif command == 'tran':
+            circuit.tran = (parse_value(tokens[1]), parse_value(tokens[2]))
+        elif command in ('write', 'wrdata'):
+            circuit.probes = [t.lower() for t in tokens[2:]]
+
+def parse_netlist(text):
+    """Parse a SPICE netlist string into a Circuit"""
+    title = text.splitlines()[0].lstrip('* ').strip() if text.strip() else ""
+    circuit = Circuit(title)
+    control = None
+
+    for line in _logical_lines(text):
+        lower = line.lower()
+
+        if control is not None:
+            if lower.startswith('.endc'):
+                _parse_control(circuit, control)
+                control = None
+            else:
+                control.append(line)
+        elif lower.startswith('.control'):
+            control = []
+        elif lower.startswith('.model'):
+            match = _MODEL_RE.match(line)
+            params = {k.lower(): parse_value(v) for k, v in _PARAM_RE.findall(match.group(3))}
+            circuit.models[match.group(1).lower()] = {'type': match.group(2).upper(), 'params': params}
+        elif lower.startswith('.tran'):
+            tokens = line.split()
+            circuit.tran = (parse_value(tokens[1]), parse_value(tokens[2]))
+        elif lower.startswith('.title'):
+            circuit.title = line[6:].strip()
+        elif lower.startswith('.'):
+            continue    # .end, .option, .param ... not needed for transient
+        else:
+            circuit.elements.append(_parse_element(circuit, line))
+
+    return circuit
+
+# ============================================================
+# MATRIX STAMPING
+# ============================================================
+
+def _stamp(A, i, j, value):
+    """Add value to A[:, i, j] unless either index is ground"""
+    if i >= 0 and j >= 0:
+        A[:, i, j] += value
+
+def _stamp_conductance(A, a, b, g):
+    _stamp(A, a, a, g)
+    _stamp(A, b, b, g)
+    _stamp(A, a, b, -g)
+    _stamp(A, b, a, -g)
+
+def _stamp_current(rhs, a, b, current):
+    """Current flowing from node a to node b through the element"""
+    if a >= 0:
+        rhs[:, a] -= current
+    if b >= 0:
+        rhs[:, b] += current
+
+def _pnjlim(vnew, vold, vt, vcrit):
+    """
+    SPICE junction voltage limiting to keep Newton out of exp() overflow.
+
+    Returns (voltage, limited): limited flags the batch rows that were
+    clamped, which must not count as converged in this iteration.
+    """
+    limit = (vnew > vcrit) & (np.abs(vnew - vold) > 2 * vt)
+    if not np.any(limit):
+        return vnew, limit
+    arg = 1 + (vnew - vold) / vt
+    from_old = np.where(arg > 0, vold + vt * np.log(np.maximum(arg, 1e-30)), vcrit)
+    from_zero = vt * np.log(np.maximum(vnew / vt, 1e-30))
+    return np.where(limit, np.where(vold > 0, from_old, from_zero), vnew), limit
+
+def _junction(v, isat, nvt):
+    """Junction current and conductance (exp argument clamped)"""
+    e = np.exp(np.minimum(v / nvt, 80.0))
+    return isat * (e - 1) + GMIN * v, isat / nvt * e + GMIN
+
+# ============================================================
+# TRANSIENT ANALYSIS
+# ============================================================
+
+# Solution vectors carry one extra trailing slot that is always 0, so x[:, -1]
+# reads the ground node without a branch.
+
+class _System:
+    """Element values broadcast over the batch, plus the static MNA matrices"""
+
+    def __init__(self, circuit, tstep, overrides):
+        self.circuit = circuit
+        self.tstep = tstep
+        self.n_nodes = len(circuit.nodes)
+
+        overrides = {k.lower(): np.atleast_1d(np.asarray(v, dtype=float))
+                     for k, v in (overrides or {}).items()}
+        self.batch = max([len(v) for v in overrides.values()] or [1])
+
+        self.values = {}
+        self.branch = {}
+        size = self.n_nodes
+        for el in circuit.elements:
+            value = overrides.get(el['name'], el['value'])
+            self.values[el['name']] = np.broadcast_to(np.asarray(value, dtype=float), (self.batch,))
+            if el['type'] in 'VELB':
+                self.branch[el['name']] = size
+                size += 1
+        self.size = size
+
+        for name in overrides:
+            circuit.element(name)   # Raises KeyError for unknown overrides
+
+        self.diodes = [self._with_model(el, DIODE_DEFAULTS) for el in circuit.elements if el['type'] == 'D']
+        self.bjts = [self._with_model(el, BJT_DEFAULTS) for el in circuit.elements if el['type'] == 'Q']
+        self.behavioral = [self._with_namespace(el) for el in circuit.elements if el['type'] == 'B']
+        self.nonlinear = bool(self.diodes or self.bjts or self.behavioral)
+
+        self.G_op = self._static_matrix(transient=False)
+        self.G_tran = self._static_matrix(transient=True)
+        # Capacitor/inductor history enters the RHS as (G_tran - G_op) @ x_prev
+        self.history = self.G_tran - self.G_op
+
+        self.dc_rhs = np.zeros((self.batch, self.size))
+        self.pwl = []
+        for el in circuit.elements:
+            if el['type'] == 'V' and 'pwl' in el:
+                self.pwl.append((self.branch[el['name']],) + el['pwl'])
+            elif el['type'] == 'V':
+                self.dc_rhs[:, self.branch[el['name']]] = self.values[el['name']]
+
+    def _with_model(self, el, defaults):
+        model = self.circuit.models.get(el['model'], {'type': 'D', 'params': {}})
+        params = dict(defaults)
+        params.update(model['params'])
+        params['polarity'] = -1.0 if model['type'] == 'PNP' else 1.0
+        return dict(el, params=params, state=None)
+
+    def _with_namespace(self, el):
+        voltages = {}
+        namespace = {'_v': lambda node: voltages.get(node, 0.0), '_if': np.where,
+                     'abs': np.abs, 'exp': np.exp, 'sqrt': np.sqrt, 'log': np.log,
+                     'min': np.minimum, 'max': np.maximum, '__builtins__': {}}
+        controls = [(node, self.circuit.nodes[node]) for node in el['controls']]
+        return dict(el, voltages=voltages, namespace=namespace, control_index=controls)
+
+    def _static_matrix(self, transient):
+        """Linear part of the MNA matrix; capacitors open and inductors shorted for DC"""
+        A = np.zeros((self.batch, self.size, self.size))
+        for i in range(self.n_nodes):
+            A[:, i, i] += GMIN
+
+        for el in self.circuit.elements:
+            if el['type'] in 'DQ':
+                continue
+            value = self.values[el['name']]
+            a, b = el['nodes']
+            k = self.branch.get(el['name'])
+
+            if el['type'] == 'R':
+                _stamp_conductance(A, a, b, 1.0 / value)
+            elif el['type'] == 'C' and transient:
+                _stamp_conductance(A, a, b, value / self.tstep)
+            elif el['type'] in 'VELB':
+                _stamp(A, a, k, 1.0)
+                _stamp(A, b, k, -1.0)
+                _stamp(A, k, a, 1.0)
+                _stamp(A, k, b, -1.0)
+                if el['type'] == 'E':
+                    c, d = el['control']
+                    _stamp(A, k, c, -value)
+                    _stamp(A, k, d, value)
+                elif el['type'] == 'L' and transient:
+                    _stamp(A, k, k, -value / self.tstep)
+            elif el['type'] == 'F':
+                kc = self.branch[el['source']]
+                _stamp(A, a, kc, value)
+                _stamp(A, b, kc, -value)
+        return A
+
+    def source_rhs(self, t, x_prev, transient):
+        """Right-hand side from sources and reactive-element history"""
+        if transient:
+            rhs = self.dc_rhs + np.einsum('bij,bj->bi', self.history, x_prev[:, :-1])
+        else:
+            rhs = self.dc_rhs.copy()
+        for k, pwl_t, pwl_v in self.pwl:
+            rhs[:, k] = np.interp(t, pwl_t, pwl_v)
+        return rhs
+
+    def stamp_nonlinear(self, A, rhs, x):
+        """
+        Linearize diodes, BJTs and behavioral sources around x.
+
+        Returns a per-row flag of junctions limited by _pnjlim (SPICE's
+        "noncon"): such an iterate is not a solution of the circuit yet.
+        """
+        limited = np.zeros(self.batch, dtype=bool)
+        for el in self.diodes:
+            p = el['params']
+            a, c = el['nodes']
+            nvt = p['n'] * VT
+            vd = x[:, a] - x[:, c]
+            vcrit = nvt * math.log(nvt / (math.sqrt(2) * p['is']))
+            if el['state'] is not None:
+                vd, clamped = _pnjlim(vd, el['state'], nvt, vcrit)
+                limited |= clamped
+            el['state'] = vd
+
+            current, g = _junction(vd, p['is'], nvt)
+            _stamp_conductance(A, a, c, g)
+            _stamp_current(rhs, a, c, current - g * vd)
+
+        for el in self.bjts:
+            limited |= self._stamp_bjt(el, A, rhs, x)
+
+        for el in self.behavioral:
+            self._stamp_behavioral(el, A, rhs, x)
+        return limited
+
+    def _stamp_bjt(self, el, A, rhs, x):
+        p = el['params']
+        pol = p['polarity']
+        c, b, e = el['nodes']
+        vb, vc, ve = x[:, b], x[:, c], x[:, e]
+        nf, nr = p['nf'] * VT, p['nr'] * VT
+        vbe, vbc = pol * (vb - ve), pol * (vb - vc)
+
+        limited = False
+        if el['state'] is not None:
+            vbe, limited_be = _pnjlim(vbe, el['state'][0], nf, nf * math.log(nf / (math.sqrt(2) * p['is'])))
+            vbc, limited_bc = _pnjlim(vbc, el['state'][1], nr, nr * math.log(nr / (math.sqrt(2) * p['is'])))
+            limited = limited_be | limited_bc
+        el['state'] = (vbe, vbc)
+
+        ibe, gbe = _junction(vbe, p['is'], nf)
+        ibc, gbc = _junction(vbc, p['is'], nr)
+        ic = ibe - ibc - ibc / p['br']
+        ib = ibe / p['bf'] + ibc / p['br']
+        dic_be, dic_bc = gbe, -gbc - gbc / p['br']
+        dib_be, dib_bc = gbe / p['bf'], gbc / p['br']
+
+        # Terminal currents flow into the device; emitter carries -(ic + ib)
+        for node, i0, g_be, g_bc in ((c, ic, dic_be, dic_bc),
+                                     (b, ib, dib_be, dib_bc),
+                                     (e, -(ic + ib), -(dic_be + dib_be), -(dic_bc + dib_bc))):
+            if node < 0:
+                continue
+            if b >= 0:
+                A[:, node, b] += g_be + g_bc
+            if e >= 0:
+                A[:, node, e] -= g_be
+            if c >= 0:
+                A[:, node, c] -= g_bc
+            rhs[:, node] -= pol * (i0 - g_be * vbe - g_bc * vbc)
+        return limited
+
+    def _stamp_behavioral(self, el, A, rhs, x):
+        k = self.branch[el['name']]
+        voltages = el['voltages']
+        for node, idx in el['control_index']:
+            voltages[node] = x[:, idx]
+
+        f0 = np.broadcast_to(eval(el['code'], el['namespace']), (self.batch,)).astype(float)
+        rhs[:, k] = f0
+
+        for node, idx in el['control_index']:
+            base = voltages[node]
+            delta = 1e-6 * np.maximum(np.abs(base), 1.0)
+            voltages[node] = base + delta
+            f1 = eval(el['code'], el['namespace'])
+            voltages[node] = base
+            slope = (f1 - f0) / delta
+            A[:, k, idx] -= slope
+            rhs[:, k] -= slope * base
+
+    def solve(self, G, t, x_guess, x_prev, transient):
+        """Newton-Raphson solve of one time point"""
+        rhs_lin = self.source_rhs(t, x_prev, transient)
+        x = np.zeros_like(x_guess)
+
+        if not self.nonlinear:
+            x[:, :-1] = np.linalg.solve(G, rhs_lin[..., None])[..., 0]
+            return x
+
+        x_old = x_guess
+        for _ in range(MAX_NEWTON_ITER):
+            A = G.copy()
+            rhs = rhs_lin.copy()
+            limited = self.stamp_nonlinear(A, rhs, x_old)
+            x[:, :-1] = np.linalg.solve(A, rhs[..., None])[..., 0]
+            # A small step is no proof of convergence while limiting shortened it
+            if not np.any(limited) and np.all(np.abs(x - x_old) <= RELTOL * np.abs(x) + VNTOL):
+                return x
+            x_old = x.copy()
+
+        raise RuntimeError(f"Newton iteration did not converge at t={t:g}s")
+
+    def probe_index(self, name):
+        """(positive, negative) solution indices for v(node), v(a,b) or i(vsource)"""
+        name = name.lower()
+        match = _PROBE_RE.fullmatch(name)
+        if match:
+            positive = self.circuit.nodes[match.group(1)] if match.group(1) not in GROUND_NAMES else -1
+            negative = -1
+            if match.group(2) is not None and match.group(2) not in GROUND_NAMES:
+                negative = self.circuit.nodes[match.group(2)]
+            return positive, negative
+        if name.startswith('i(') and name.endswith(')'):
+            return self.branch[name[2:-1]], -1
+        raise ValueError(f"Unsupported probe: {name!r}")
+
+def transient(circuit, tstep=None, tstop=None, probes=None, overrides=None):
+    """
+    Run a transient analysis and return {'time': t, probe: values, ...}
+
+    overrides maps element names to values or arrays of values; arrays add a
+    leading batch axis and every probe then has shape (batch, len(time)).
+    """
+    if tstep is None or tstop is None:
+        if circuit.tran is None:
+            raise ValueError("No tran analysis in netlist and no tstep/tstop given")
+        tstep = tstep or circuit.tran[0]
+        tstop = tstop or circuit.tran[1]
+
+    probes = [p.lower() for p in (probes or circuit.probes)]
+    if not probes:
+        probes = [f"v({name})" for name in circuit.nodes]
+
+    system = _System(circuit, tstep, overrides)
+    times = np.arange(int(round(tstop / tstep)) + 1) * tstep
+    index = np.array([system.probe_index(p) for p in probes])
+    positive, negative = index[:, 0], index[:, 1]
+    data = np.empty((system.batch, len(times), len(probes)))
+
+    # DC operating point at t=0 gives the initial conditions
+    x = np.zeros((system.batch, system.size + 1))
+    x = system.solve(system.G_op, 0.0, x, x, transient=False)
+    data[:, 0] = x[:, positive] - x[:, negative]
+
+    G = system.G_tran
+    for step in range(1, len(times)):
+        x = system.solve(G, times[step], x, x, transient=True)
+        data[:, step] = x[:, positive] - x[:, negative]
+
+    results = {p: data[:, :, i] for i, p in enumerate(probes)}
+    if overrides is None:
+        results = {p: v[0] for p, v in results.items()}
+    results['time'] = times
+    return results
+
+def simulate(netlist, probes=None, overrides=None, tstep=None, tstop=None):
+    """Parse a netlist string and run its transient analysis"""
+    circuit = parse_netlist(netlist)
+    return transient(circuit, tstep=tstep, tstop=tstop, probes=probes, overrides=overrides)
+
+# ============================================================
+# REGRESSION CHECKS
+# ============================================================
+
+# Diode behind a resistor: every time point must sit at the DC solution,
+# including the operating point (junction limiting must not end Newton early)
+DIODE_CHECK = """diode dc check
+V1 1 0 DC {vs}
+R1 1 2 {r}
+D1 2 0 DD
+.model DD D(IS={isat})
+.tran 1u 10u
+.end
+"""
+
+def _diode_voltage(vs, r, isat, nvt):
+    """Exact diode voltage of V - R - D by bisection (includes the GMIN shunt)"""
+    low, high = 0.0, vs
+    for _ in range(200):
+        v = (low + high) / 2
+        if (vs - v) / r > isat * math.expm1(v / nvt) + GMIN * v:
+            low = v
+        else:
+            high = v
+    return v
+
+def run_checks():
+    """[(name, worst error in V, passed)] for the built-in regression circuits"""
+    results = []
+    for vs, r, isat in ((5.0, 1e3, 1e-14), (12.0, 100.0, 1e-12), (1.0, 10e3, 1e-14)):
+        expected = _diode_voltage(vs, r, isat, VT)
+        got = simulate(DIODE_CHECK.format(vs=vs, r=r, isat=isat), probes=['v(2)'])['v(2)']
+        error = float(np.max(np.abs(got - expected)))
+        results.append((f"diode {vs:g}V/{r:g}ohm IS={isat:g}", error, error < 1e-5))
+    return results
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python mna_solver.py <netlist.cir> [probe ...] | --check")
+        return 1
+
+    if sys.argv[1] == '--check':
+        results = run_checks()
+        for name, error, passed in results:
+            print(f"{'✓' if passed else '❌'} {name:<32} max error {error:.2e} V")
+        return 0 if all(passed for _, _, passed in results) else 1
+
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        netlist = f.read()
+
+    results = simulate(netlist, probes=sys.argv[2:] or None)
+    times = results.pop('time')
+    print(f"✓ Solved {len(times)} time points (0 - {times[-1]:g}s)")
+    for name, values in results.items():
+        print(f"  {name:<16} min={np.min(values):10.4f}  max={np.max(values):10.4f}  final={values[-1]:10.4f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+RTS Fan Control - Monte Carlo Tolerance Analysis
+Samples component tolerances for the complete fan-driver netlist, solves every
+sample on a process pool and reports yield and output distributions
+
+Engines:
+- mna:     in-process MNA solver; each worker solves its chunk of samples as
+           one batch (element values are per-sample override arrays)
+- ngspice: one `ngspice -b` run per sample with the element cards rewritten
+
+Per sample it measures the temperature (from the 0-100 °C input ramp) where
+the PWM output turns on and reaches full scale, and the motor voltage at
+idle and at full drive. Yield counts samples whose metrics stay within
+YIELD_LIMITS of the nominal design.
+
+Usage:
+    python monte_carlo.py [samples] [options]
+
+    samples            Number of Monte Carlo samples (default: 1000)
+    --engine E         mna | ngspice (default: mna)
+    --workers N        Worker processes (default: all cores)
+    --seed S           Random seed (default: 0)
+    --tstep T          Transient step (default: 10ms)
+    --output PATH      Save per-sample values and metrics (.npz or .csv)
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import mna_solver
+import param_sweep
+
+MC_TSTEP = '10ms'           # Coarser than the 1ms default; thresholds move < 0.1°C
+DEFAULT_SAMPLES = 1000
+DEFAULT_CHUNK = 250         # Samples per batched MNA solve
+
+# element name -> (distribution, tolerance); 'normal' tolerances are 3 sigma
+TOLERANCES = {
+    'vcc':    ('normal', 0.05),     # 5V motor supply
+    'radc':   ('uniform', 0.01),    # 1% resistors
+    'rpwm':   ('uniform', 0.01),
+    'rbase':  ('uniform', 0.05),    # 5% base resistor
+    'cadc':   ('uniform', 0.10),    # X7R ceramics
+    'cpwm':   ('uniform', 0.20),
+    'fcc':    ('uniform', 0.50),    # 2N2222 current gain, 50-150
+    'rload':  ('normal', 0.10),     # Motor winding
+    'lload':  ('normal', 0.20),
+    'rmotor': ('normal', 0.10),
+}
+
+PROBES = ('v(temp)', 'v(pwm_buf)', 'v(motor_out)')
+TEMP_PER_VOLT = 100.0       # Input ramp: 10 mV per °C
+PWM_ON_LEVEL = 0.02         # Fraction of the final PWM level counted as "on"
+PWM_FULL_LEVEL = 0.98       # ... and as "full"
+
+METRICS = ('pwm_on_temp', 'pwm_full_temp', 'motor_idle', 'motor_full')
+
+# Allowed deviation from nominal: ('abs', units) or ('rel', fraction)
+YIELD_LIMITS = {
+    'pwm_on_temp': ('abs', 2.0),        # °C
+    'pwm_full_temp': ('abs', 2.0),      # °C
+    'motor_full': ('rel', 0.10),
+}
+
+# ============================================================
+# SAMPLING AND NETLISTS
+# ============================================================
+
+def nominal_netlist(tstep=MC_TSTEP):
+    """The complete netlist at its nominal values"""
+    import simulate_complete
+    return simulate_complete.render_netlist(TSTEP=tstep)
+
+def nominal_values(circuit, tolerances=TOLERANCES):
+    """Nominal value of every toleranced element"""
+    return {name: circuit.element(name)['value'] for name in tolerances}
+
+def sample_values(nominal, n, seed=0, tolerances=TOLERANCES):
+    """{element: array of n sampled values} around the nominal values"""
+    rng = np.random.default_rng(seed)
+    values = {}
+    for name, (distribution, tolerance) in tolerances.items():
+        if distribution == 'normal':
+            delta = rng.normal(0.0, tolerance / 3, n)
+        elif distribution == 'uniform':
+            delta = rng.uniform(-tolerance, tolerance, n)
+        else:
+            raise ValueError(f"Unknown distribution {distribution!r} for {name}")
+        values[name] = nominal[name] * (1 + delta)
+    return values
+
+def apply_values(netlist, values):
+    """Rewrite the value field of the named element cards (for ngspice)"""
+    lines = []
+    for line in netlist.splitlines():
+        tokens = line.split()
+        name = tokens[0].lower() if tokens else ''
+        if name in values:
+            # R/C/L n1 n2 value; F n1 n2 vsource gain; V n1 n2 DC value
+            field = {'f': 4, 'v': 4}.get(name[0], 3)
+            code, _, comment = line.partition(';')
+            tokens = code.split()
+            tokens[field] = f"{values[name]:.6g}"
+            line = " ".join(tokens) + (f"      ;{comment}" if comment else "")
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+# ============================================================
+# METRICS
+# ============================================================
+
+def crossing(x, y, level):
+    """Per-row x where y first reaches level (linear interpolation; nan if never)"""
+    above = y >= level[:, None]
+    first = np.argmax(above, axis=1)
+    rows = np.arange(len(y))
+    prev = np.maximum(first - 1, 0)
+    y0, y1 = y[rows, prev], y[rows, first]
+    x0, x1 = x[rows, prev], x[rows, first]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        frac = np.where(y1 > y0, (level - y0) / (y1 - y0), 0.0)
+    return np.where(above.any(axis=1), x0 + frac * (x1 - x0), np.nan)
+
+def measure(results):
+    """METRICS for a batch of solved samples (probe arrays of shape (n, n_time))"""
+    temp = np.atleast_2d(results['v(temp)']) * TEMP_PER_VOLT
+    pwm = np.atleast_2d(results['v(pwm_buf)'])
+    motor = np.atleast_2d(results['v(motor_out)'])
+    final = pwm[:, -1]
+    return {
+        'pwm_on_temp': crossing(temp, pwm, PWM_ON_LEVEL * final),
+        'pwm_full_temp': crossing(temp, pwm, PWM_FULL_LEVEL * final),
+        'motor_idle': motor[:, 0],
+        'motor_full': motor[:, -1],
+    }
+
+def passes(metrics, nominal, limits=YIELD_LIMITS):
+    """{limit: bool array} plus 'all', comparing each sample with the nominal design"""
+    checks = {}
+    for name, (kind, limit) in limits.items():
+        allowed = limit if kind == 'abs' else limit * abs(nominal[name])
+        checks[name] = np.abs(metrics[name] - nominal[name]) <= allowed
+    checks['all'] = np.logical_and.reduce(list(checks.values()))
+    return checks
+
+# ============================================================
+# WORKERS
+# ============================================================
+
+def _solve_samples(args):
+    """Solve one chunk of samples and return its metrics"""
+    engine, netlist, values = args
+    if engine == 'mna':
+        circuit = mna_solver.parse_netlist(netlist)
+        results = mna_solver.transient(circuit, probes=PROBES, overrides=values)
+        return measure(results)
+
+    n = len(next(iter(values.values())))
+    netlists = [apply_values(netlist, {name: v[i] for name, v in values.items()}) for i in range(n)]
+    solved = param_sweep._solve_chunk_ngspice(netlists, list(PROBES))
+    return measure({p: np.stack([r[p] for r in solved]) for p in PROBES})
+
+def run_monte_carlo(n, seed=0, engine='mna', workers=None, chunk_size=None,
+                    tstep=MC_TSTEP, tolerances=TOLERANCES):
+    """
+    Sample, solve and measure n design instances.
+
+    Returns {'values': {element: array}, 'metrics': {metric: array},
+             'nominal': {metric: float}}.
+    """
+    if engine not in ('mna', 'ngspice'):
+        raise ValueError(f"Unknown engine {engine!r} (expected 'mna' or 'ngspice')")
+
+    netlist = nominal_netlist(tstep)
+    nominal = nominal_values(mna_solver.parse_netlist(netlist), tolerances)
+    values = sample_values(nominal, n, seed, tolerances)
+
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = min(DEFAULT_CHUNK, max(1, -(-n // workers))) if engine == 'mna' else \
+            max(1, -(-n // (workers * 4)))
+    chunks = [(engine, netlist, {name: v[i:i + chunk_size] for name, v in values.items()})
+              for i in range(0, n, chunk_size)]
+    nominal_job = (engine, netlist, {name: np.array([v]) for name, v in nominal.items()})
+
+    if workers == 1 or len(chunks) == 1:
+        solved = [_solve_samples(chunk) for chunk in [nominal_job] + chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            solved = list(executor.map(_solve_samples, [nominal_job] + chunks))
+
+    metrics = {name: np.concatenate([s[name] for s in solved[1:]]) for name in METRICS}
+    return {'values': values, 'metrics': metrics,
+            'nominal': {name: float(solved[0][name][0]) for name in METRICS}}
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def print_report(result):
+    """Yield, metric distributions and the dominant component per metric"""
+    metrics, nominal, values = result['metrics'], result['nominal'], result['values']
+    checks = passes(metrics, nominal)
+    n = len(checks['all'])
+
+    print(f"\n  Yield: {checks['all'].mean() * 100:.1f}% ({int(checks['all'].sum())}/{n})")
+    for name, (kind, limit) in YIELD_LIMITS.items():
+        bound = f"±{limit:g}" if kind == 'abs' else f"±{limit * 100:g}%"
+        print(f"    {name:<15} {bound:>6}: {checks[name].mean() * 100:5.1f}% pass")
+
+    names = list(values)
+    matrix = np.column_stack([values[name] for name in names])
+    print(f"\n  {'Metric':<15} {'nominal':>9} {'mean':>9} {'std':>8} {'p1':>9} {'p99':>9}  dominant")
+    for name in METRICS:
+        data = metrics[name]
+        valid = np.isfinite(data)
+        corr = [abs(np.corrcoef(matrix[valid, j], data[valid])[0, 1]) if data[valid].std() > 0 else 0.0
+                for j in range(len(names))]
+        p1, p99 = np.percentile(data[valid], [1, 99])
+        print(f"  {name:<15} {nominal[name]:>9.4f} {data[valid].mean():>9.4f} {data[valid].std():>8.4f} "
+              f"{p1:>9.4f} {p99:>9.4f}  {names[int(np.argmax(corr))].upper()}")
+
+def main():
+    args = sys.argv[1:]
+    n = DEFAULT_SAMPLES
+    engine, workers, seed, tstep, output = 'mna', None, 0, MC_TSTEP, None
+
+    for flag in ('--engine', '--workers', '--seed', '--tstep', '--output'):
+        if flag in args:
+            i = args.index(flag)
+            value = args[i + 1]
+            del args[i:i + 2]
+            if flag == '--engine':
+                engine = value
+            elif flag == '--workers':
+                workers = int(value)
+            elif flag == '--seed':
+                seed = int(value)
+            elif flag == '--tstep':
+                tstep = value
+            else:
+                output = value
+    if args:
+        n = int(args[0])
+
+    print("=" * 70)
+    print(f"Monte Carlo tolerance analysis: {n} samples, {engine}, "
+          f"{workers or os.cpu_count()} workers, TSTEP={tstep}")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    try:
+        result = run_monte_carlo(n, seed=seed, engine=engine, workers=workers, tstep=tstep)
+    except (ValueError, RuntimeError, FileNotFoundError) as e:
+        print(f"❌ Monte Carlo run failed: {e}")
+        return 1
+    elapsed = time.perf_counter() - start
+    print(f"✓ Solved {n} samples in {elapsed:.1f}s ({n / elapsed:.0f} samples/s)")
+
+    print_report(result)
+
+    if output:
+        import columnar
+        columns = {name.upper(): v for name, v in result['values'].items()}
+        columns.update(result['metrics'])
+        columns['pass'] = passes(result['metrics'], result['nominal'])['all'].astype(np.uint8)
+        if output.endswith('.npz'):
+            columnar.save_columns(output, columns, meta={'seed': seed, 'tstep': tstep,
+                                                         'nominal': result['nominal']})
+        else:
+            columnar.to_csv(output, columns)
+        print(f"\n✓ Per-sample results saved to: {output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+STM32 Fan Control - Online Telemetry Statistics
+Single-pass, mergeable statistics for temp/ADC/PWM sample streams
+
+- Running moments: Welford/Chan count, mean, variance, min, max per field
+- Value histograms: exact counts for the 16-bit fields -> exact quantiles
+- Temperature table: per-temperature count and ADC/PWM mean, std, min, max
+
+Every accumulator is updated batch by batch (e.g. from
+uart_stream.iter_uart_batches) and two partial results merge into the same
+state as one pass over the concatenated data, so file ranges can be reduced
+on separate workers and combined.
+
+Usage:
+    python online_stats.py ../reports/uart_output.txt [workers]
+"""
+
+import os
+import sys
+
+import numpy as np
+
+import uart_stream
+
+FIELDS = ('temp', 'adc', 'pwm')
+
+# 16-bit value space shared by every field (temp is int16, adc/pwm uint16)
+HIST_OFFSET = 32768
+HIST_SIZE = 65536 + HIST_OFFSET
+
+class RunningMoments:
+    """Welford/Chan running count, mean, M2, min and max of one field"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def update(self, values):
+        """Fold a batch in (batch moments, then Chan's pairwise combine)"""
+        n = len(values)
+        if n == 0:
+            return
+        values = np.asarray(values, dtype=np.float64)
+        mean = float(values.mean())
+        m2 = float(np.square(values - mean).sum())
+        self._combine(n, mean, m2, float(values.min()), float(values.max()))
+
+    def merge(self, other):
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        return self
+
+    def _combine(self, n, mean, m2, lo, hi):
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min = lo if self.min is None else min(self.min, lo)
+        self.max = hi if self.max is None else max(self.max, hi)
+
+    @property
+    def variance(self):
+        """Population variance"""
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        return self.variance ** 0.5
+
+class ValueHistogram:
+    """Exact histogram of a 16-bit integer field; merges by adding counts"""
+
+    def __init__(self):
+        self.counts = np.zeros(HIST_SIZE, dtype=np.int64)
+
+    def update(self, values):
+        if len(values) == 0:
+            return
+        binned = np.bincount(np.asarray(values, dtype=np.int64) + HIST_OFFSET)
+        self.counts[:len(binned)] += binned
+
+    def merge(self, other):
+        self.counts += other.counts
+        return self
+
+    def quantile(self, q):
+        """Nearest-rank quantile (0 <= q <= 1), or None if empty"""
+        cumulative = np.cumsum(self.counts)
+        total = cumulative[-1]
+        if total == 0:
+            return None
+        rank = max(1, int(np.ceil(q * total)))
+        return int(np.searchsorted(cumulative, rank)) - HIST_OFFSET
+
+class TemperatureTable:
+    """
+    Per-temperature sample count and ADC/PWM sum, M2, min and max (the
+    report's table).
+
+    Samples are grouped by bincount on the integer temperature (no sort), so
+    an update is linear in the batch size; bins merge with Chan's formula.
+    """
+
+    VALUE_FIELDS = ('adc', 'pwm')
+
+    def __init__(self):
+        self.count = np.zeros(HIST_SIZE, dtype=np.int64)
+        self.sum = {f: np.zeros(HIST_SIZE, dtype=np.int64) for f in self.VALUE_FIELDS}
+        self.m2 = {f: np.zeros(HIST_SIZE, dtype=np.float64) for f in self.VALUE_FIELDS}
+        self.min = {f: np.full(HIST_SIZE, np.iinfo(np.int64).max, dtype=np.int64) for f in self.VALUE_FIELDS}
+        self.max = {f: np.full(HIST_SIZE, np.iinfo(np.int64).min, dtype=np.int64) for f in self.VALUE_FIELDS}
+
+    def update(self, temps, adcs, pwms):
+        if len(temps) == 0:
+            return
+        index = np.asarray(temps, dtype=np.int64) + HIST_OFFSET
+        lo = int(index.min())
+        top = int(index.max()) + 1
+        local = index - lo
+        bins = slice(lo, top)
+        count = np.bincount(local, minlength=top - lo)
+
+        for field, values in zip(self.VALUE_FIELDS, (adcs, pwms)):
+            values = np.asarray(values, dtype=np.int64)
+            # float64 weights are exact for these sums (< 2**53)
+            total = np.bincount(local, weights=values, minlength=top - lo).astype(np.int64)
+            mean = total / np.maximum(count, 1)
+            deviation = values - mean[local]
+            m2 = np.bincount(local, weights=deviation * deviation, minlength=top - lo)
+            # int64 bins keep ufunc.at on its fast (no-cast) path
+            lowest = np.full(top - lo, np.iinfo(np.int64).max, dtype=np.int64)
+            highest = np.full(top - lo, np.iinfo(np.int64).min, dtype=np.int64)
+            np.minimum.at(lowest, local, values)
+            np.maximum.at(highest, local, values)
+            self._combine(field, bins, count, total, m2, lowest, highest)
+        self.count[bins] += count
+
+    def merge(self, other):
+        for field in self.VALUE_FIELDS:
+            self._combine(field, slice(None), other.count, other.sum[field], other.m2[field],
+                          other.min[field], other.max[field])
+        self.count += other.count
+        return self
+
+    def _combine(self, field, bins, count, total, m2, lowest, highest):
+        """Chan's pairwise combine of per-bin moments (self.count not yet updated)"""
+        n_a = self.count[bins]
+        n = n_a + count
+        delta = total / np.maximum(count, 1) - self.sum[field][bins] / np.maximum(n_a, 1)
+        self.m2[field][bins] += m2 + delta * delta * n_a * count / np.maximum(n, 1)
+        self.sum[field][bins] += total
+        np.minimum(self.min[field][bins], lowest, out=self.min[field][bins])
+        np.maximum(self.max[field][bins], highest, out=self.max[field][bins])
+
+    def columns(self):
+        """{name: array} over the temperatures present: temp, samples, {field}_avg/std/min/max"""
+        present = np.nonzero(self.count)[0]
+        count = self.count[present]
+        table = {'temp': present - HIST_OFFSET, 'samples': count}
+        for field in self.VALUE_FIELDS:
+            table[f'{field}_avg'] = self.sum[field][present] / count
+            table[f'{field}_std'] = np.sqrt(self.m2[field][present] / count)
+            table[f'{field}_min'] = self.min[field][present]
+            table[f'{field}_max'] = self.max[field][present]
+        return table
+
+    def rows(self):
+        """[{'temp', 'samples', 'adc_avg', 'adc_std', ...}, ...] sorted by temperature"""
+        table = self.columns()
+        names = list(table)
+        return [dict(zip(names, values)) for values in zip(*(table[name].tolist() for name in names))]
+
+class TelemetryStats:
+    """All telemetry accumulators for a temp/ADC/PWM stream"""
+
+    def __init__(self):
+        self.moments = {field: RunningMoments() for field in FIELDS}
+        self.histograms = {field: ValueHistogram() for field in FIELDS}
+        self.by_temp = TemperatureTable()
+
+    @property
+    def count(self):
+        return self.moments['temp'].count
+
+    def update(self, temps, adcs, pwms):
+        """Fold one batch of samples into every accumulator"""
+        for field, values in zip(FIELDS, (temps, adcs, pwms)):
+            self.moments[field].update(values)
+            self.histograms[field].update(values)
+        self.by_temp.update(temps, adcs, pwms)
+        return self
+
+    def merge(self, other):
+        """Combine another partial result into this one"""
+        for field in FIELDS:
+            self.moments[field].merge(other.moments[field])
+            self.histograms[field].merge(other.histograms[field])
+        self.by_temp.merge(other.by_temp)
+        return self
+
+    def summary(self):
+        """Statistics dict (calculate_stats() keys plus std/quantiles/by_temp)"""
+        if self.count == 0:
+            return None
+
+        stats = {'samples': self.count}
+        for field in FIELDS:
+            m = self.moments[field]
+            stats[f'{field}_min'] = int(m.min)
+            stats[f'{field}_max'] = int(m.max)
+            stats[f'{field}_avg'] = m.mean
+            stats[f'{field}_std'] = m.std
+            for q in (50, 95):
+                stats[f'{field}_p{q}'] = self.histograms[field].quantile(q / 100)
+        stats['by_temp'] = self.by_temp.rows()
+        return stats
+
+# ============================================================
+# FILE REDUCTION (optionally parallel)
+# ============================================================
+
+def _range_stats(args):
+    filename, start, end = args
+    stats = TelemetryStats()
+    for batch in uart_stream.iter_uart_batches(filename, start=start, end=end):
+        stats.update(*batch)
+    return stats
+
+def file_stats(filename, workers=1):
+    """Statistics for a whole UART capture; workers > 1 splits it by byte range"""
+    size = os.path.getsize(filename)
+    if workers <= 1 or size < uart_stream.DEFAULT_CHUNK_SIZE:
+        return _range_stats((filename, 0, None))
+
+    from concurrent.futures import ProcessPoolExecutor   # Only needed for parallel runs
+    
+    bounds = np.linspace(0, size, workers + 1).astype(np.int64).tolist()
+    ranges = [(filename, bounds[i], bounds[i + 1]) for i in range(workers)]
+    total = TelemetryStats()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for partial in executor.map(_range_stats, ranges):
+            total.merge(partial)
+    return total
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    filename = sys.argv[1] if len(sys.argv) > 1 else "../reports/uart_output.txt"
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+
+    try:
+        stats = file_stats(filename, workers).summary()
+    except FileNotFoundError:
+        print(f"Error: {filename} not found. Run the simulation first.")
+        return 1
+    if stats is None:
+        print("No samples found.")
+        return 1
+
+    print(f"Samples: {stats['samples']}")
+    for field in FIELDS:
+        print(f"  {field:<5} min={stats[f'{field}_min']:<6} max={stats[f'{field}_max']:<6} "
+              f"avg={stats[f'{field}_avg']:<10.2f} std={stats[f'{field}_std']:<10.2f} "
+              f"p50={stats[f'{field}_p50']:<6} p95={stats[f'{field}_p95']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
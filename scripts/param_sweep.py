@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+RTS Fan Control - Parallel Parameter Sweep
+Renders the tempfan netlists over a grid of component values / thresholds and
+solves every design point on a process pool
+
+Engines:
+- mna:     in-process MNA solver (mna_solver.py); design points that only differ
+           in element values are solved together as one batch per worker
+- ngspice: one `ngspice -b` run per design point, each in its own temp directory
+
+Results come back as one stacked array per probe, shape (n_points, n_time).
+
+Usage:
+    python param_sweep.py complete RBASE=500,1k,2k V_ON=0.2,0.25,0.3
+    python param_sweep.py tempfan RMOTOR=50,100 --engine ngspice --workers 4
+"""
+
+import itertools
+import os
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import mna_solver
+import rawfile
+
+NETLISTS = ('complete', 'tempfan')
+
+# ============================================================
+# GRID AND RENDERING
+# ============================================================
+
+def expand_grid(grid):
+    """Cartesian product of {name: [values]} -> list of {name: value} dicts"""
+    names = list(grid)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(grid[n] for n in names))]
+
+def render(netlist_name, params):
+    """Render one of the project netlists with the given parameters"""
+    if netlist_name == 'complete':
+        import simulate_complete
+        return simulate_complete.render_netlist(**params)
+    if netlist_name == 'tempfan':
+        import simulate_tempfan
+        return simulate_tempfan.render_netlist(**params)
+    raise ValueError(f"Unknown netlist {netlist_name!r} (expected one of {', '.join(NETLISTS)})")
+
+def _signature(circuit):
+    """Everything about a circuit except element values (batchable if equal)"""
+    elements = tuple((el['type'], el['name'], el['nodes'], el.get('expression'),
+                      el.get('model'), el.get('source'), el.get('control'),
+                      tuple(map(tuple, el['pwl'])) if 'pwl' in el else None)
+                     for el in circuit.elements)
+    models = tuple(sorted((name, m['type'], tuple(sorted(m['params'].items())))
+                          for name, m in circuit.models.items()))
+    return elements, models, circuit.tran
+
+# ============================================================
+# WORKERS
+# ============================================================
+
+def _solve_chunk_mna(netlists, probes):
+    """Solve a chunk of rendered netlists in-process, batching equal topologies"""
+    circuits = [mna_solver.parse_netlist(text) for text in netlists]
+    groups = {}
+    for i, circuit in enumerate(circuits):
+        groups.setdefault(_signature(circuit), []).append(i)
+
+    results = [None] * len(circuits)
+    for members in groups.values():
+        base = circuits[members[0]]
+        overrides = {}
+        for j, el in enumerate(base.elements):
+            values = [circuits[i].elements[j]['value'] for i in members]
+            if len(set(values)) > 1:
+                overrides[el['name']] = values
+        solved = mna_solver.transient(base, probes=probes, overrides=overrides or None)
+        for row, i in enumerate(members):
+            results[i] = {p: (v[row] if v.ndim == 2 else v) for p, v in solved.items() if p != 'time'}
+            results[i]['time'] = solved['time']
+    return results
+
+def _solve_chunk_ngspice(netlists, probes):
+    """Run ngspice once per netlist, each in a private temp directory"""
+    results = []
+    for text in netlists:
+        circuit = mna_solver.parse_netlist(text)
+        names = circuit.probes
+        with tempfile.TemporaryDirectory(prefix="sweep_") as work_dir:
+            netlist_file = os.path.join(work_dir, "sweep.cir")
+            with open(netlist_file, 'w', encoding='utf-8') as f:
+                f.write(text)
+            log_file = os.path.join(work_dir, "sweep.log")
+            try:
+                subprocess.run(["ngspice", "-b", netlist_file, "-o", log_file],
+                               cwd=work_dir, capture_output=True, text=True, timeout=120, check=True)
+            except subprocess.SubprocessError as e:
+                # Surface as RuntimeError (like a missing rawfile) with the log's last line
+                detail = ""
+                if os.path.exists(log_file):
+                    with open(log_file, encoding='utf-8', errors='replace') as f:
+                        lines = [line.strip() for line in f if line.strip()]
+                    detail = f": {lines[-1]}" if lines else ""
+                reason = "timed out" if isinstance(e, subprocess.TimeoutExpired) else \
+                    f"exited with code {e.returncode}"
+                raise RuntimeError(f"ngspice {reason}{detail}") from e
+            output = [name for name in os.listdir(work_dir) if name.endswith('.raw')]
+            if not output:
+                raise RuntimeError("ngspice produced no rawfile output")
+            # Copy out of the memmap before the temp directory is removed
+            vectors = {name: np.array(v) for name, v in
+                       rawfile.load_vectors(os.path.join(work_dir, output[0])).items()}
+
+        results.append({p: vectors[p] for p in (probes or names)} | {'time': vectors['time']})
+    return results
+
+def _solve_chunk(args):
+    engine, netlists, probes = args
+    if engine == 'mna':
+        return _solve_chunk_mna(netlists, probes)
+    return _solve_chunk_ngspice(netlists, probes)
+
+# ============================================================
+# SWEEP API
+# ============================================================
+
+def run_sweep(netlist_name, grid, probes=None, engine='mna', workers=None, chunk_size=None):
+    """
+    Solve every point of a parameter grid and stack the results.
+
+    Returns {'params': {name: array}, 'time': t, probe: array(n_points, n_time)}.
+    """
+    if engine not in ('mna', 'ngspice'):
+        raise ValueError(f"Unknown engine {engine!r} (expected 'mna' or 'ngspice')")
+
+    points = expand_grid(grid)
+    netlists = [render(netlist_name, p) for p in points]
+    probes = [p.lower() for p in probes] if probes else None
+
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        # A few chunks per worker keeps every core busy until the tail
+        chunk_size = max(1, -(-len(points) // (workers * 4)))
+    chunks = [(engine, netlists[i:i + chunk_size], probes) for i in range(0, len(netlists), chunk_size)]
+
+    if workers == 1 or len(chunks) == 1:
+        solved = [r for chunk in chunks for r in _solve_chunk(chunk)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            solved = [r for chunk_result in executor.map(_solve_chunk, chunks) for r in chunk_result]
+
+    time_axis = solved[0]['time']
+    for r in solved:
+        if len(r['time']) != len(time_axis):
+            raise ValueError("Design points returned different time axes; fix TSTEP/TSTOP across the grid")
+
+    results = {'params': {name: np.array([p[name] for p in points]) for name in grid},
+               'time': time_axis}
+    for probe in solved[0]:
+        if probe != 'time':
+            results[probe] = np.stack([r[probe] for r in solved])
+    return results
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def parse_grid(args):
+    """NAME=v1,v2,... command-line arguments -> grid dict"""
+    grid = {}
+    for arg in args:
+        name, _, values = arg.partition('=')
+        if not values:
+            raise ValueError(f"Expected NAME=v1,v2,... but got {arg!r}")
+        grid[name.upper()] = values.split(',')
+    return grid
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in NETLISTS:
+        print(__doc__)
+        return 1
+
+    netlist_name, args = args[0], args[1:]
+    engine, workers = 'mna', None
+    if '--engine' in args:
+        i = args.index('--engine')
+        engine = args[i + 1]
+        del args[i:i + 2]
+    if '--workers' in args:
+        i = args.index('--workers')
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+
+    grid = parse_grid(args)
+    n_points = len(expand_grid(grid))
+    print(f"Sweeping {n_points} design points ({engine}, {workers or os.cpu_count()} workers)...")
+
+    try:
+        results = run_sweep(netlist_name, grid, engine=engine, workers=workers)
+    except (ValueError, RuntimeError, FileNotFoundError) as e:
+        print(f"❌ Sweep failed: {e}")
+        return 1
+    params = results.pop('params')
+    results.pop('time')
+
+    print(f"✓ Solved {n_points} design points")
+    header = "  ".join(f"{name:>10}" for name in params)
+    print(f"{header}  " + "  ".join(f"{p + ' final':>18}" for p in results))
+    for i in range(n_points):
+        row = "  ".join(f"{str(params[name][i]):>10}" for name in params)
+        print(f"{row}  " + "  ".join(f"{results[p][i, -1]:>18.4f}" for p in results))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+RTS Fan Control - ngspice Binary Rawfile Reader
+Reads the output of `set filetype=binary` + `write <file>.raw <vectors>`
+
+Only the ASCII header is parsed in Python; the data block of each plot is
+mapped with np.memmap and every vector is a zero-copy (strided) view into it.
+
+Usage:
+    python rawfile.py output.raw
+"""
+
+import os
+import sys
+
+import numpy as np
+
+class RawPlot:
+    """One plot of a rawfile: header fields plus memory-mapped vectors"""
+
+    def __init__(self, header, variables, data):
+        self.title = header.get('title', '')
+        self.plotname = header.get('plotname', '')
+        self.flags = header.get('flags', '').split()
+        self.variables = variables      # [(name, type), ...] in file order
+        self.data = data                # memmap, shape (points, variables)
+        self._index = {name.lower(): i for i, (name, _) in enumerate(variables)}
+
+    @property
+    def names(self):
+        return [name for name, _ in self.variables]
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    def __contains__(self, name):
+        return name.lower() in self._index
+
+    def __getitem__(self, name):
+        """Vector by name (case-insensitive), as a view into the memmap"""
+        try:
+            return self.data[:, self._index[name.lower()]]
+        except KeyError:
+            raise KeyError(f"No vector {name!r} in plot '{self.plotname}' "
+                           f"(have: {', '.join(self.names)})") from None
+
+    def vectors(self):
+        """{name: view} for every vector, names lower-cased like ngspice"""
+        return {name.lower(): self[name] for name in self.names}
+
+def _read_header(f):
+    """Parse header lines up to 'Binary:'; returns (header, variables)"""
+    header = {}
+    variables = []
+    n_vars = None
+
+    while True:
+        line = f.readline()
+        if not line:
+            raise ValueError("Unexpected end of file in rawfile header")
+        text = line.decode('latin-1').strip()
+        if not text:
+            continue
+
+        key, _, value = text.partition(':')
+        key = key.strip().lower()
+
+        if key == 'binary':
+            return header, variables
+        if key == 'values':
+            raise ValueError("ASCII rawfiles are not supported (use 'set filetype=binary')")
+        if key == 'variables':
+            n_vars = int(header['no. variables'])
+            if value.strip():   # First variable may share the 'Variables:' line
+                fields = value.split()
+                variables.append((fields[1], fields[2] if len(fields) > 2 else ''))
+            while len(variables) < n_vars:
+                fields = f.readline().decode('latin-1').split()
+                if fields:
+                    variables.append((fields[1], fields[2] if len(fields) > 2 else ''))
+        else:
+            header[key] = value.strip()
+
+def read_rawfile(path):
+    """Read every plot in an ngspice binary rawfile; returns [RawPlot, ...]"""
+    plots = []
+    file_size = os.path.getsize(path)
+
+    with open(path, 'rb') as f:
+        while f.tell() < file_size:
+            header, variables = _read_header(f)
+            flags = header.get('flags', 'real').lower().split()
+            dtype = np.complex128 if 'complex' in flags else np.float64
+            n_vars = len(variables)
+            n_points = int(header['no. points'])
+
+            offset = f.tell()
+            row_bytes = n_vars * np.dtype(dtype).itemsize
+            # ngspice can leave 'No. Points' stale when a run is interrupted
+            n_points = min(n_points, (file_size - offset) // row_bytes)
+
+            if n_points > 0:
+                data = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(n_points, n_vars))
+            else:
+                data = np.empty((0, n_vars), dtype=dtype)
+            plots.append(RawPlot(header, variables, data))
+            f.seek(offset + n_points * row_bytes)
+
+            if f.peek(1)[:1] in (b'\n', b'\r'):
+                f.readline()
+
+    return plots
+
+def load_vectors(path, plotname=None):
+    """{name: view} for one plot (the last one, or the first matching plotname)"""
+    plots = read_rawfile(path)
+    if not plots:
+        raise ValueError(f"No plots in rawfile {path}")
+    if plotname is None:
+        return plots[-1].vectors()
+    for plot in plots:
+        if plot.plotname.lower().startswith(plotname.lower()):
+            return plot.vectors()
+    raise KeyError(f"No plot named {plotname!r} in {path}")
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python rawfile.py <file.raw>")
+        return 1
+
+    for plot in read_rawfile(sys.argv[1]):
+        print(f"{plot.plotname} ({' '.join(plot.flags)}): {len(plot)} points")
+        for name, kind in plot.variables:
+            values = plot[name]
+            print(f"  {name:<16} {kind:<10} min={np.min(values.real):10.4g}  max={np.max(values.real):10.4g}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
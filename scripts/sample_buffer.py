@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+STM32 Fan Control - Sample Buffer
+Typed struct-of-arrays container for temp/ADC/PWM telemetry samples
+
+One growable NumPy array per field (temp int16, adc/pwm uint16: 6 bytes per
+sample instead of ~200 for a dict in a list). Appending doubles the capacity
+when full, column access returns zero-copy views, and slicing returns a
+buffer over views of the same memory.
+
+For code written against the old list-of-dicts format, len(), truth value,
+indexing (buffer[i]['temp']) and iteration still behave the same.
+
+Usage:
+    python sample_buffer.py ../reports/uart_output.txt    # memory comparison
+"""
+
+import sys
+
+import numpy as np
+
+import uart_stream
+
+FIELDS = ('temp', 'adc', 'pwm')
+DTYPES = {'temp': uart_stream.TEMP_DTYPE, 'adc': uart_stream.ADC_DTYPE, 'pwm': uart_stream.PWM_DTYPE}
+
+DEFAULT_CAPACITY = 1024
+
+class SampleBuffer:
+    """Growable temp/adc/pwm columns with list-of-dicts compatible access"""
+
+    __slots__ = ('_columns', '_size')
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self._columns = {field: np.empty(capacity, DTYPES[field]) for field in FIELDS}
+        self._size = 0
+
+    @classmethod
+    def from_columns(cls, temps, adcs, pwms, copy=True):
+        """Buffer over existing arrays (converted to the field dtypes)"""
+        buffer = cls(0)
+        values = (temps, adcs, pwms)
+        buffer._columns = {field: np.array(v, dtype=DTYPES[field], copy=copy or None)
+                           for field, v in zip(FIELDS, values)}
+        sizes = {len(column) for column in buffer._columns.values()}
+        if len(sizes) != 1:
+            raise ValueError(f"Column lengths differ: {sorted(sizes)}")
+        buffer._size = sizes.pop()
+        return buffer
+
+    @classmethod
+    def from_records(cls, records):
+        """Buffer from an iterable of {'temp', 'adc', 'pwm'} dicts"""
+        records = list(records)
+        return cls.from_columns(*([r[field] for r in records] for field in FIELDS))
+
+    # ---------------------------------------------------------- growth
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        capacity = len(self._columns['temp'])
+        if needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity, DEFAULT_CAPACITY)
+        for field, column in self._columns.items():
+            grown = np.empty(capacity, DTYPES[field])
+            grown[:self._size] = column[:self._size]
+            self._columns[field] = grown
+
+    def append(self, temp, adc, pwm):
+        """Add one sample"""
+        self._reserve(1)
+        i = self._size
+        self._columns['temp'][i] = temp
+        self._columns['adc'][i] = adc
+        self._columns['pwm'][i] = pwm
+        self._size = i + 1
+
+    def extend(self, temps, adcs, pwms):
+        """Add a batch of samples (e.g. one uart_stream batch)"""
+        n = len(temps)
+        if not (len(adcs) == len(pwms) == n):
+            raise ValueError("temps, adcs and pwms must have the same length")
+        self._reserve(n)
+        for field, values in zip(FIELDS, (temps, adcs, pwms)):
+            self._columns[field][self._size:self._size + n] = values
+        self._size += n
+
+    def trim(self):
+        """Release unused capacity (copies each column once)"""
+        for field in FIELDS:
+            self._columns[field] = self._columns[field][:self._size].copy()
+        return self
+
+    # ---------------------------------------------------------- columns
+
+    @property
+    def temp(self):
+        return self._columns['temp'][:self._size]
+
+    @property
+    def adc(self):
+        return self._columns['adc'][:self._size]
+
+    @property
+    def pwm(self):
+        return self._columns['pwm'][:self._size]
+
+    def columns(self):
+        """{field: zero-copy view}"""
+        return {field: self._columns[field][:self._size] for field in FIELDS}
+
+    @property
+    def nbytes(self):
+        """Bytes held by the samples (not counting spare capacity)"""
+        return sum(column[:self._size].nbytes for column in self._columns.values())
+
+    # ---------------------------------------------------------- sequence protocol
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            view = self.columns()
+            return SampleBuffer.from_columns(*(view[field][index] for field in FIELDS), copy=False)
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("sample index out of range")
+        return {field: int(self._columns[field][index]) for field in FIELDS}
+
+    def __iter__(self):
+        columns = [self._columns[field][:self._size].tolist() for field in FIELDS]
+        for temp, adc, pwm in zip(*columns):
+            yield {'temp': temp, 'adc': adc, 'pwm': pwm}
+
+    def __repr__(self):
+        return f"SampleBuffer({self._size} samples, {self.nbytes} bytes)"
+
+def as_samples(data):
+    """SampleBuffer for data given as a SampleBuffer or a list of sample dicts"""
+    if isinstance(data, SampleBuffer):
+        return data
+    return SampleBuffer.from_records(data or [])
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    filename = sys.argv[1] if len(sys.argv) > 1 else "../reports/uart_output.txt"
+    samples = SampleBuffer()
+    try:
+        for temps, adcs, pwms in uart_stream.iter_uart_batches(filename):
+            samples.extend(temps, adcs, pwms)
+    except FileNotFoundError:
+        print(f"Error: {filename} not found. Run the simulation first.")
+        return 1
+
+    # A dict per sample plus the list slot, as parse_uart_output used to build
+    per_dict = sys.getsizeof({'temp': 0, 'adc': 0, 'pwm': 0}) + 8
+    print(f"✓ {len(samples)} samples")
+    print(f"  SampleBuffer:   {samples.nbytes / 1e6:10.1f} MB ({samples.nbytes // max(len(samples), 1)} bytes/sample)")
+    print(f"  list of dicts: ~{len(samples) * per_dict / 1e6:10.1f} MB ({per_dict} bytes/sample)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
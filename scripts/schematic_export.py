@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+RTS Fan Control - Schematic Export Queue
+Exports many schematics x formats (svg, pdf) concurrently on a bounded pool
+of worker processes
+
+Each (schematic, format) pair is one job. A job whose output is newer than
+its schematic is skipped, so re-running after editing one variant only
+re-exports that variant. Workers live for the whole queue: the exporter is
+looked up once per worker, not once per job.
+
+With kicad-cli on PATH it does the export (one short kicad-cli run per job;
+kicad-cli has no resident mode). Without it, SVGs are drawn by the built-in
+renderer from the parsed schematic: wires, junctions, labels, text and
+symbols with their library graphics, pins and visible fields. PDF needs
+kicad-cli and is skipped (with a warning) otherwise.
+
+Usage:
+    python schematic_export.py [schematic ...] [options]
+
+    schematic        .kicad_sch files or directories (default: ../circuit)
+    --formats LIST   Comma-separated formats (default: svg,pdf)
+    --output DIR     Output directory (default: report_outputs)
+    --workers N      Worker processes (default: all cores, at most one per job)
+    --force          Export even when the output is up to date
+    --builtin        Use the built-in SVG renderer even if kicad-cli exists
+"""
+
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from xml.sax.saxutils import escape
+
+import kicad_sexpr
+from schematic_netlist import place_pin
+
+DEFAULT_SOURCES = ["../circuit"]
+DEFAULT_OUTPUT_DIR = "report_outputs"
+FORMATS = ('svg', 'pdf')
+EXPORT_TIMEOUT = 120    # Seconds per kicad-cli run
+
+# Paper sizes in mm (landscape), as eeschema names them
+PAPER_SIZES = {
+    'A5': (210, 148), 'A4': (297, 210), 'A3': (420, 297), 'A2': (594, 420),
+    'A1': (841, 594), 'A0': (1189, 841), 'A': (279.4, 215.9), 'B': (431.8, 279.4),
+    'C': (558.8, 431.8), 'D': (863.6, 558.8), 'E': (1117.6, 863.6),
+    'USLetter': (279.4, 215.9), 'USLegal': (355.6, 215.9), 'USLedger': (431.8, 279.4),
+}
+
+# eeschema's default colours
+COLORS = {
+    'wire': '#009600', 'junction': '#009600', 'body': '#840000', 'fill': '#ffffc2',
+    'pin': '#840000', 'pin_text': '#006464', 'field': '#006464', 'text': '#000084',
+    'label': '#000000', 'no_connect': '#0000c8', 'frame': '#840000',
+}
+
+LINE_WIDTH = 0.1524     # 6 mil, eeschema's default line width
+FONT_SIZE = 1.27
+
+# ============================================================
+# SVG RENDERER
+# ============================================================
+
+def _num(value):
+    """Compact coordinate for SVG output"""
+    return f"{value:.3f}".rstrip('0').rstrip('.')
+
+def _hidden(node):
+    """True for (hide yes) / (effects ... hide) in the KiCad 7-9 spellings"""
+    if node.value('hide') == 'yes':
+        return True
+    effects = node.find('effects')
+    return effects is not None and ('hide' in effects.atoms() or effects.value('hide') == 'yes')
+
+def _font(node):
+    """(font size, justify atoms) from a node's (effects ...)"""
+    effects = node.find('effects')
+    if effects is None:
+        return FONT_SIZE, ()
+    font = effects.find('font')
+    size = float(font.value('size')[0]) if font is not None and font.value('size') else FONT_SIZE
+    justify = effects.find('justify')
+    return size, tuple(justify.atoms()) if justify is not None else ()
+
+def _text(x, y, text, size, color, angle=0, justify=()):
+    """<text> element; multi-line text becomes one tspan per line"""
+    anchor = 'start' if 'left' in justify else 'end' if 'right' in justify else 'middle'
+    baseline = 'hanging' if 'top' in justify else 'auto' if 'bottom' in justify else 'central'
+    transform = f' transform="rotate({_num(-angle)} {_num(x)} {_num(y)})"' if angle else ""
+    lines = text.split('\n')
+    if len(lines) == 1:
+        body = escape(text)
+    else:
+        # Multi-line text grows upwards from a bottom anchor, downwards otherwise
+        first = -(len(lines) - 1) * 1.2 * size if baseline == 'auto' else 0
+        body = "".join(f'<tspan x="{_num(x)}" dy="{_num(first if i == 0 else 1.2 * size)}">{escape(line)}</tspan>'
+                       for i, line in enumerate(lines))
+    return (f'<text x="{_num(x)}" y="{_num(y)}" font-size="{_num(size)}" fill="{color}" '
+            f'text-anchor="{anchor}" dominant-baseline="{baseline}"{transform}>{body}</text>')
+
+def _points(node):
+    return [tuple(float(v) for v in xy.atoms()) for xy in node.find('pts').find_all('xy')]
+
+def _arc(start, mid, end):
+    """SVG path of the circular arc through three points"""
+    (x1, y1), (x2, y2), (x3, y3) = start, mid, end
+    d = 2 * (x1 * (y2 - y3) + x2 * (y3 - y1) + x3 * (y1 - y2))
+    if abs(d) < 1e-9:
+        return f"M {_num(x1)} {_num(y1)} L {_num(x3)} {_num(y3)}"
+    cx = ((x1 ** 2 + y1 ** 2) * (y2 - y3) + (x2 ** 2 + y2 ** 2) * (y3 - y1) + (x3 ** 2 + y3 ** 2) * (y1 - y2)) / d
+    cy = ((x1 ** 2 + y1 ** 2) * (x3 - x2) + (x2 ** 2 + y2 ** 2) * (x1 - x3) + (x3 ** 2 + y3 ** 2) * (x2 - x1)) / d
+    r = math.hypot(x1 - cx, y1 - cy)
+    # Start -> mid -> end turning clockwise on screen means a clockwise sweep;
+    # the arc is the long way round when the centre lies on the mid point's side
+    turn = (x2 - x1) * (y3 - y1) - (y2 - y1) * (x3 - x1)
+    side = (cx - x1) * (y3 - y1) - (cy - y1) * (x3 - x1)
+    sweep = 1 if turn > 0 else 0
+    large = 1 if (side > 0) == (turn > 0) and abs(side) > 1e-9 else 0
+    return (f"M {_num(x1)} {_num(y1)} A {_num(r)} {_num(r)} 0 {large} {sweep} "
+            f"{_num(x3)} {_num(y3)}")
+
+def _style(node, closed=True):
+    """fill/stroke attributes from a graphic's (fill (type ...))"""
+    fill = node.find('fill')
+    kind = fill.value('type') if fill is not None else 'none'
+    color = COLORS['fill'] if kind == 'background' else COLORS['body'] if kind == 'outline' else 'none'
+    return f'fill="{color if closed else "none"}" stroke="{COLORS["body"]}" stroke-width="{LINE_WIDTH}"'
+
+def _symbol_graphics(lib_symbol, unit, place):
+    """SVG elements of one library symbol unit; place maps lib (x, y) to the sheet"""
+    elements = []
+    pin_names = lib_symbol.find('pin_names')
+    names_hidden = pin_names is not None and _hidden_flag(pin_names)
+    name_offset = float(pin_names.value('offset', 0.508)) if pin_names is not None else 0.508
+    numbers = lib_symbol.find('pin_numbers')
+    numbers_hidden = numbers is not None and _hidden_flag(numbers)
+
+    for sub in lib_symbol.find_all('symbol'):
+        parts = sub.atoms()[0].rsplit('_', 2)
+        sub_unit = int(parts[1]) if len(parts) == 3 and parts[1].isdigit() else 0
+        if sub_unit not in (0, unit):
+            continue
+        for shape in sub.children():
+            if not isinstance(shape, kicad_sexpr.Node):
+                continue
+            head = shape.head
+            if head == 'rectangle':
+                (x1, y1), (x2, y2) = place(*map(float, shape.value('start'))), place(*map(float, shape.value('end')))
+                elements.append(f'<rect x="{_num(min(x1, x2))}" y="{_num(min(y1, y2))}" '
+                                f'width="{_num(abs(x2 - x1))}" height="{_num(abs(y2 - y1))}" {_style(shape)}/>')
+            elif head == 'polyline':
+                points = " ".join(f"{_num(x)},{_num(y)}" for x, y in (place(*p) for p in _points(shape)))
+                closed = shape.find('fill') is not None and shape.find('fill').value('type') != 'none'
+                elements.append(f'<polyline points="{points}" {_style(shape, closed)}/>')
+            elif head == 'circle':
+                cx, cy = place(*map(float, shape.value('center')))
+                elements.append(f'<circle cx="{_num(cx)}" cy="{_num(cy)}" '
+                                f'r="{_num(float(shape.value("radius")))}" {_style(shape)}/>')
+            elif head == 'arc':
+                path = _arc(*(place(*map(float, shape.value(key))) for key in ('start', 'mid', 'end')))
+                elements.append(f'<path d="{path}" {_style(shape, False)}/>')
+            elif head == 'pin' and not (_hidden(shape) or _hidden_flag(shape)):
+                elements.extend(_pin(shape, place, names_hidden, name_offset, numbers_hidden))
+    return elements
+
+def _hidden_flag(node):
+    """(pin_names hide) in KiCad 7, (pin_names (hide yes)) in KiCad 8+"""
+    return 'hide' in node.atoms() or node.value('hide') == 'yes'
+
+def _pin(pin, place, names_hidden, name_offset, numbers_hidden):
+    x, y, angle = (float(v) for v in pin.value('at'))
+    length = float(pin.value('length', 2.54))
+    dx, dy = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    (x1, y1), (x2, y2) = place(x, y), place(x + dx * length, y + dy * length)
+    elements = [f'<line x1="{_num(x1)}" y1="{_num(y1)}" x2="{_num(x2)}" y2="{_num(y2)}" '
+                f'stroke="{COLORS["pin"]}" stroke-width="{LINE_WIDTH}"/>']
+
+    # Direction from the connection point into the body, on the sheet
+    ux, uy = ((x2 - x1) / length, (y2 - y1) / length) if length else (0.0, 0.0)
+    vertical = abs(uy) > abs(ux)
+    text_angle = 90 if vertical else 0
+    name = pin.find('name').atoms()[0]
+    number = pin.find('number').atoms()[0]
+    if not names_hidden and name not in ('', '~') and name_offset > 0:
+        # Inside the body, past the pin's inner end
+        nx, ny = x2 + ux * name_offset, y2 + uy * name_offset
+        inward = (ux > 0.5) if not vertical else (uy < -0.5)
+        elements.append(_text(nx, ny, name, FONT_SIZE, COLORS['pin_text'], text_angle,
+                              ('left',) if inward else ('right',)))
+    if not numbers_hidden:
+        mx, my = (x1 + x2) / 2, (y1 + y2) / 2
+        if vertical:
+            elements.append(_text(mx - 0.4, my, number, FONT_SIZE, COLORS['pin_text'], 90, ('bottom',)))
+        else:
+            elements.append(_text(mx, my - 0.4, number, FONT_SIZE, COLORS['pin_text'], 0, ('bottom',)))
+    return elements
+
+def _page_size(doc, items):
+    """(width, height) of the page: the paper size, or the drawing's extent"""
+    paper = doc.root.value('paper')
+    atoms = (paper,) if isinstance(paper, str) else paper or ()
+    if atoms and atoms[0] in PAPER_SIZES:
+        width, height = PAPER_SIZES[atoms[0]]
+        return (height, width) if 'portrait' in atoms else (width, height)
+    if len(atoms) >= 3:
+        return float(atoms[1]), float(atoms[2])
+    xs, ys = [297.0], [210.0]
+    for item in items:
+        at = item.value('at')
+        if at:
+            xs.append(float(at[0]))
+            ys.append(float(at[1]))
+    return max(xs) + 25.4, max(ys) + 25.4
+
+def render_svg(doc):
+    """SVG text of one parsed schematic sheet"""
+    items = doc.items()
+    width, height = _page_size(doc, items)
+    lib_symbols = doc.lib_symbols()
+    body = []
+
+    for item in items:
+        head = item.head
+        if head in ('wire', 'bus', 'polyline'):
+            (x1, y1), *rest = _points(item)
+            path = f"M {_num(x1)} {_num(y1)} " + " ".join(f"L {_num(x)} {_num(y)}" for x, y in rest)
+            stroke = COLORS['wire'] if head == 'wire' else COLORS['text']
+            body.append(f'<path d="{path}" fill="none" stroke="{stroke}" '
+                        f'stroke-width="{_num(LINE_WIDTH * (4 if head == "bus" else 1))}"/>')
+        elif head == 'junction':
+            x, y = (float(v) for v in item.value('at')[:2])
+            body.append(f'<circle cx="{_num(x)}" cy="{_num(y)}" r="0.4572" fill="{COLORS["junction"]}"/>')
+        elif head == 'no_connect':
+            x, y = (float(v) for v in item.value('at')[:2])
+            body.append(f'<path d="M {_num(x - 0.635)} {_num(y - 0.635)} l 1.27 1.27 m 0 -1.27 l -1.27 1.27" '
+                        f'stroke="{COLORS["no_connect"]}" stroke-width="{LINE_WIDTH}"/>')
+        elif head in ('text', 'label', 'global_label', 'hierarchical_label'):
+            at = item.value('at')
+            size, justify = _font(item)
+            color = COLORS['text'] if head == 'text' else COLORS['label']
+            if head != 'text' and not justify:
+                justify = ('left', 'bottom')
+            body.append(_text(float(at[0]), float(at[1]), item.atoms()[0], size, color,
+                              float(at[2]) if len(at) > 2 else 0, justify))
+        elif head == 'symbol':
+            body.extend(_render_symbol(item, lib_symbols))
+
+    title = doc.root.find('title_block')
+    if title is not None:
+        lines = [title.value('title') or "", f"Rev {title.value('rev') or '-'}   {title.value('date') or ''}",
+                 title.value('company') or ""]
+        body.append(_text(width - 12.7, height - 12.7, "\n".join(line for line in lines if line.strip()),
+                          1.8, COLORS['frame'], 0, ('right', 'bottom')))
+
+    return "\n".join([
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{_num(width)}mm" height="{_num(height)}mm" '
+        f'viewBox="0 0 {_num(width)} {_num(height)}" font-family="sans-serif" stroke-linecap="round">',
+        f'<rect x="0" y="0" width="{_num(width)}" height="{_num(height)}" fill="white"/>',
+        f'<rect x="5" y="5" width="{_num(width - 10)}" height="{_num(height - 10)}" fill="none" '
+        f'stroke="{COLORS["frame"]}" stroke-width="{LINE_WIDTH}"/>',
+        *body,
+        '</svg>',
+        '',
+    ])
+
+def _render_symbol(item, lib_symbols):
+    at = item.value('at')
+    origin = (float(at[0]), float(at[1]))
+    angle = float(at[2]) if len(at) > 2 else 0.0
+    mirror = item.value('mirror')
+    unit = int(item.value('unit', 1))
+
+    elements = []
+    lib_symbol = lib_symbols.get(item.value('lib_name') or item.value('lib_id'))
+    if lib_symbol is not None:
+        elements.extend(_symbol_graphics(lib_symbol, unit,
+                                         lambda x, y: place_pin(x, y, origin, angle, mirror)))
+    for prop in item.find_all('property'):
+        name, *value = prop.atoms()
+        if not value or not value[0] or _hidden(prop) or name not in ('Reference', 'Value'):
+            continue
+        text = value[0]
+        if name == 'Reference' and text.endswith('?'):
+            text = item.doc.reference(item) or text
+        px, py, *rest = (float(v) for v in prop.value('at'))
+        size, justify = _font(prop)
+        elements.append(_text(px, py, text, size, COLORS['field'], rest[0] if rest else 0, justify))
+    return elements
+
+# ============================================================
+# EXPORT QUEUE
+# ============================================================
+
+_exporter = None    # Per worker: path of kicad-cli, or '' for the built-in renderer
+
+def find_exporter(builtin=False):
+    """kicad-cli path ('' when absent or builtin), looked up once per process"""
+    global _exporter
+    if builtin:
+        return ''
+    if _exporter is None:
+        _exporter = shutil.which('kicad-cli') or ''
+    return _exporter
+
+def is_stale(source, output):
+    """True if output is missing or older than its schematic"""
+    try:
+        return os.path.getmtime(output) < os.path.getmtime(source)
+    except FileNotFoundError:
+        return True
+
+def _umask():
+    """Current process umask (reading it means setting it, so put it back)"""
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+def _write_atomic(path, text):
+    fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        # mkstemp makes the file 0600; give it the mode open() would have
+        os.chmod(tmp_path, 0o666 & ~_umask())
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def run_job(job):
+    """Export one (source, format, output); returns (job, method, error)"""
+    source, fmt, output, builtin = job
+    exporter = find_exporter(builtin)
+    try:
+        if exporter:
+            with tempfile.TemporaryDirectory(prefix="export_", dir=os.path.dirname(output) or ".") as work_dir:
+                # The SVG exporter names its output after the sheet; PDF takes a file
+                target = work_dir if fmt == 'svg' else os.path.join(work_dir, "out.pdf")
+                subprocess.run([exporter, "sch", "export", fmt, source, "-o", target],
+                               capture_output=True, text=True, timeout=EXPORT_TIMEOUT, check=True)
+                produced = [name for name in os.listdir(work_dir) if name.endswith('.' + fmt)]
+                if not produced:
+                    raise RuntimeError(f"kicad-cli produced no .{fmt} output")
+                os.replace(os.path.join(work_dir, sorted(produced)[0]), output)
+            return job, "kicad-cli", None
+        if fmt != 'svg':
+            return job, None, f"{fmt.upper()} export needs kicad-cli"
+        _write_atomic(output, render_svg(kicad_sexpr.load(source)))
+        return job, "built-in renderer", None
+    except subprocess.CalledProcessError as e:
+        output = (e.stderr or e.stdout or "").strip()
+        return job, None, output.splitlines()[-1] if output else str(e)
+    except (OSError, RuntimeError, kicad_sexpr.ParseError, subprocess.TimeoutExpired) as e:
+        return job, None, str(e)
+    except Exception as e:
+        # A sheet the renderer does not understand fails its own job, not the queue
+        return job, None, f"{type(e).__name__}: {e}"
+
+def find_schematics(paths):
+    """.kicad_sch files named directly or found in the given directories"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.endswith('.kicad_sch'))
+        else:
+            found.append(path)
+    return found
+
+def plan_jobs(sources, formats=FORMATS, output_dir=DEFAULT_OUTPUT_DIR, force=False, builtin=False):
+    """
+    (jobs, up_to_date, unsupported) for every schematic x format.
+
+    Jobs are only planned for stale outputs; formats the available exporter
+    cannot write (PDF without kicad-cli) are listed as unsupported instead.
+    """
+    jobs, up_to_date, unsupported, outputs = [], [], [], {}
+    has_cli = bool(find_exporter(builtin))
+    for source in sources:
+        stem = os.path.splitext(os.path.basename(source))[0]
+        for fmt in formats:
+            if fmt not in FORMATS:
+                raise ValueError(f"Unknown format {fmt!r} (expected one of {', '.join(FORMATS)})")
+            output = os.path.join(output_dir, f"{stem}.{fmt}")
+            if output in outputs:
+                raise ValueError(f"{source} and {outputs[output]} would both export to {output}")
+            outputs[output] = source
+            if fmt != 'svg' and not has_cli:
+                unsupported.append(output)
+            elif force or is_stale(source, output):
+                jobs.append((source, fmt, output, builtin))
+            else:
+                up_to_date.append(output)
+    return jobs, up_to_date, unsupported
+
+def export_all(jobs, workers=None, on_result=None):
+    """Run jobs on a pool of at most workers processes; returns [(job, method, error)]"""
+    if not jobs:
+        return []
+    for output_dir in {os.path.dirname(job[2]) for job in jobs}:
+        os.makedirs(output_dir or ".", exist_ok=True)
+
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    results = []
+    if workers == 1:
+        for job in jobs:
+            results.append(run_job(job))
+            if on_result:
+                on_result(*results[-1])
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for future in as_completed([executor.submit(run_job, job) for job in jobs]):
+                results.append(future.result())
+                if on_result:
+                    on_result(*results[-1])
+    return results
+
+def print_result(job, method, error):
+    if error:
+        print(f"⚠ {job[2]}: {error}")
+    else:
+        print(f"✓ {job[2]} ({method})")
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    args = sys.argv[1:]
+    options = {'--formats': ",".join(FORMATS), '--output': DEFAULT_OUTPUT_DIR, '--workers': None}
+    for flag in options:
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = args[i + 1]
+            del args[i:i + 2]
+    force = '--force' in args
+    builtin = '--builtin' in args
+    args = [a for a in args if a not in ('--force', '--builtin')]
+
+    sources = find_schematics(args or DEFAULT_SOURCES)
+    missing = [s for s in sources if not os.path.exists(s)]
+    if not sources or missing:
+        print(f"❌ No schematic found: {', '.join(missing or args or DEFAULT_SOURCES)}")
+        return 1
+
+    formats = [f.strip().lower() for f in options['--formats'].split(',') if f.strip()]
+    try:
+        jobs, up_to_date, unsupported = plan_jobs(sources, formats, options['--output'], force, builtin)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    workers = int(options['--workers']) if options['--workers'] else None
+
+    exporter = find_exporter(builtin) or \
+        "built-in SVG renderer" + ("" if builtin else " (kicad-cli not found)")
+    print(f"Exporting {len(sources)} schematic(s) x {len(formats)} format(s) with {exporter}")
+    if up_to_date:
+        print(f"  {len(up_to_date)} output(s) already up to date (--force to re-export)")
+    if unsupported:
+        print(f"⚠ Skipping {len(unsupported)} output(s) that need kicad-cli: {', '.join(unsupported)}")
+    if not jobs:
+        print("✓ Nothing to do")
+        return 0
+
+    start = time.perf_counter()
+    results = export_all(jobs, workers, on_result=print_result)
+    failed = sum(1 for _, _, error in results if error)
+    print(f"\n{'⚠' if failed else '✓'} {len(results) - failed}/{len(results)} export(s) in "
+          f"{time.perf_counter() - start:.2f} s -> {options['--output']}/")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,582 @@
+#!/usr/bin/env python3
+"""
+RTS Fan Control - Schematic Netlister
+Extracts a SPICE deck from the KiCad schematic, so the simulated circuit
+comes from the drawing instead of a hand-maintained netlist
+
+Connectivity is a union-find over connection points: wire endpoints,
+junctions, symbol pins (library pin positions placed with the symbol's
+rotation and mirroring), labels and power symbols. A point landing on the
+inside of a wire joins that wire, as it does in eeschema. Nets with the same
+local label are joined within a sheet; power symbols and global labels join
+across sheets, and hierarchical labels join the matching sheet pin.
+
+Each symbol is mapped to SPICE cards through SPICE_MODELS (lib_id ->
+function); power nets get a DC source and GND becomes node 0. Symbols
+without a model are listed as comments.
+
+Netlister caches every sheet by the SHA-256 of its file: an unchanged sheet
+is neither re-parsed nor re-connected, and an unchanged design returns the
+previous deck. Each sheet file is assumed to be placed once.
+
+Usage:
+    python schematic_netlist.py [schematic] [options]
+
+    schematic        .kicad_sch file (default: ../circuit/RTS_FanControl.kicad_sch)
+    --output PATH    Write the deck (default: print it)
+    --simulate       Run the deck through mna_solver and print the final node voltages
+    --watch          Rebuild whenever a sheet file changes (Ctrl+C to stop)
+"""
+
+import hashlib
+import math
+import os
+import re
+import sys
+import time
+
+import firmware_model
+import kicad_sexpr
+
+DEFAULT_SCHEMATIC = "../circuit/RTS_FanControl.kicad_sch"
+DEFAULT_TRAN = ('1ms', '10s')
+GROUND_NETS = ('GND', 'GNDD', 'GNDA', 'GNDPWR', 'VSS')
+
+GRID = 100      # Coordinates are matched in 1/100 mm
+
+MOTOR_R = '10'          # Winding resistance and inductance, as in simulate_complete.py
+MOTOR_L = '1m'
+LM35_RAMP = 'PWL(0 0V 10s 1.0V)'    # 0-100 °C over the run, 10 mV/°C
+PWM_HIGH = 3.3          # V, GPIO high level
+
+DIODE_MODEL = ".model D1N4007 D(IS=7.02n N=1.8)"
+NPN_MODEL = ".model Q2N2222 NPN(IS=1e-14 BF=200)"
+
+# ============================================================
+# COMPONENT MODELS
+# ============================================================
+
+# KiCad value prefix -> SPICE suffix; KiCad 'M' is mega, SPICE 'M' is milli.
+# 'R' marks the decimal point of a plain resistance ('2R2' = 2.2).
+SI_PREFIXES = {'f': 'f', 'p': 'p', 'n': 'n', 'u': 'u', 'm': 'm', 'k': 'k', 'K': 'k',
+               'M': 'Meg', 'G': 'G', 'T': 'T', 'R': ''}
+VALUE_PATTERN = re.compile(r'^(\d*\.?\d*)((?i:meg)|[fpnumkKMGTR])?(\d*)[FHVAfhva]?$')
+
+def spice_value(value):
+    """
+    Schematic value -> SPICE number ('0.1µF' -> '0.1u', '2.2MΩ' -> '2.2Meg',
+    '4k7' -> '4.7k', '2R2' -> '2.2'); ValueError if it is not a number.
+    """
+    text = re.sub(r'(?i)ohms?$', '', value.replace('µ', 'u').replace('μ', 'u')
+                  .replace('Ω', '').replace(' ', ''))
+    match = VALUE_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"value {value!r} is not a number")
+    number, prefix, decimals = match.groups()
+    if decimals:
+        # Prefix as decimal point: only after a whole number ('4k7', not '4.7k7')
+        if not prefix or '.' in number:
+            raise ValueError(f"value {value!r} is not a number")
+        number = f"{number or '0'}.{decimals}"
+    if not re.search(r'\d', number):
+        raise ValueError(f"value {value!r} is not a number")
+    suffix = 'Meg' if prefix and prefix.lower() == 'meg' else SI_PREFIXES.get(prefix, '')
+    return number + suffix
+
+def _two_terminal(letter):
+    def cards(ref, value, pin):
+        name = ref if ref.upper().startswith(letter) else letter + ref
+        return [f"{name} {pin('1')} {pin('2')} {spice_value(value)}"], []
+    return cards
+
+def _diode(ref, value, pin):
+    return [f"D{ref.lstrip('D')} {pin('A', '2')} {pin('K', '1')} D1N4007"], [DIODE_MODEL]
+
+def _npn(ref, value, pin):
+    return [f"Q{ref.lstrip('Q')} {pin('C', '3')} {pin('B', '2')} {pin('E', '1')} Q2N2222"], [NPN_MODEL]
+
+def _motor(ref, value, pin):
+    inner = f"{ref}_W"
+    return [f"R{ref} {pin('+', '1')} {inner} {MOTOR_R}",
+            f"L{ref} {inner} {pin('-', '2')} {MOTOR_L}"], []
+
+def _lm35(ref, value, pin):
+    temp = f"{ref}_TEMP"
+    return [f"V{ref}T {temp} 0 {LM35_RAMP}",
+            f"E{ref} {pin('OUT', '2')} {pin('GND', '3')} {temp} 0 1.0"], []
+
+def _stm32(ref, value, pin):
+    # Averaged PWM on PA6 from the ADC voltage on PA0 (firmware control law)
+    v_full = firmware_model.PWM_MAX / firmware_model.PWM_PER_C * firmware_model.LM35_V_PER_C
+    adc = f"V({pin('PA0')})"
+    return [f"E{ref}PWM {pin('PA6')} 0 VALUE = {{IF({adc} > {v_full:g}, {PWM_HIGH:g}, "
+            f"{PWM_HIGH:g} * {adc} / {v_full:g})}}"], []
+
+SPICE_MODELS = {
+    'Device:R': _two_terminal('R'),
+    'Device:C': _two_terminal('C'),
+    'Device:L': _two_terminal('L'),
+    'Diode:1N4007': _diode,
+    'Transistor_BJT:2N2222': _npn,
+    'Motor:Motor_DC': _motor,
+    'Sensor_Temperature:LM35': _lm35,
+    'MCU_ST_STM32F1:STM32F103C8Tx': _stm32,
+}
+
+def supply_voltage(net):
+    """'+3.3V' -> 3.3, '+5V_MOTOR' -> 5.0, '+3V3' -> 3.3, '-12V' -> -12.0 (None if not a supply name)"""
+    match = re.match(r'^([+-]?)(\d+)(?:\.(\d+))?V(\d+)?', net)
+    if not match:
+        return None
+    sign, whole, fraction, v_fraction = match.groups()
+    return float(f"{sign}{whole}.{fraction or v_fraction or 0}")
+
+# ============================================================
+# SHEET CONNECTIVITY
+# ============================================================
+
+class UnionFind:
+    """Disjoint sets over hashable keys (path halving)"""
+
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, key):
+        parent = self.parent
+        if key not in parent:
+            parent[key] = key
+            return key
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[ra] = rb
+
+def _point(x, y):
+    return (round(float(x) * GRID), round(float(y) * GRID))
+
+def _lib_pins(lib_symbol, unit):
+    """[(number, name, x, y)] of a library symbol for one unit (lib coordinates, y up)"""
+    pins = []
+    for sub in lib_symbol.find_all('symbol'):
+        # Sub-symbols are NAME_<unit>_<style>; unit 0 is common to all units
+        parts = sub.atoms()[0].rsplit('_', 2)
+        sub_unit = int(parts[1]) if len(parts) == 3 and parts[1].isdigit() else 0
+        if sub_unit not in (0, unit):
+            continue
+        for pin in sub.find_all('pin'):
+            x, y = pin.value('at')[:2]
+            name = pin.find('name').atoms()[0]
+            number = pin.find('number').atoms()[0]
+            pins.append((number, name, float(x), float(y)))
+    return pins
+
+def place_pin(x, y, at, angle, mirror):
+    """Schematic position of a library pin: flip y, rotate counter-clockwise, mirror"""
+    x, y = x, -y
+    a = math.radians(-angle)
+    c, s = round(math.cos(a)), round(math.sin(a))
+    x, y = x * c - y * s, x * s + y * c
+    if mirror == 'x':
+        y = -y
+    elif mirror == 'y':
+        x = -x
+    return at[0] + x, at[1] + y
+
+def _on_segments(point, horizontal, vertical):
+    """Endpoint of a wire whose interior contains point (None if none)"""
+    x, y = point
+    for x1, x2, end in horizontal.get(y, ()):
+        if x1 < x < x2:
+            return end
+    for y1, y2, end in vertical.get(x, ()):
+        if y1 < y < y2:
+            return end
+    return None
+
+def sheet_connectivity(doc):
+    """
+    Nets of one sheet.
+
+    Returns {'components': [{ref, lib_id, value, pins: {number: (name, net)}}],
+             'nets': {net: [(kind, name), ...]},   # names from labels/power
+             'sheets': [(sheetfile, {pin name: net})]}
+    with nets numbered locally from 0.
+    """
+    uf = UnionFind()
+    horizontal, vertical = {}, {}
+    ends = []
+    for wire in doc.of_kind('wire'):
+        (x1, y1), (x2, y2) = (_point(*xy.atoms()) for xy in wire.find('pts').find_all('xy'))
+        uf.union((x1, y1), (x2, y2))
+        ends += [(x1, y1), (x2, y2)]
+        if y1 == y2:
+            horizontal.setdefault(y1, []).append((min(x1, x2), max(x1, x2), (x1, y1)))
+        elif x1 == x2:
+            vertical.setdefault(x1, []).append((min(y1, y2), max(y1, y2), (x1, y1)))
+
+    def connect(point):
+        end = _on_segments(point, horizontal, vertical)
+        if end is not None:
+            uf.union(point, end)
+        return point
+
+    # Wire endpoints ending on another wire's interior (T joints)
+    for end in ends:
+        connect(end)
+    for junction in doc.of_kind('junction'):
+        connect(_point(*junction.value('at')[:2]))
+
+    names = []      # (point, kind, name)
+    for kind in ('label', 'global_label', 'hierarchical_label'):
+        for label in doc.of_kind(kind):
+            names.append((connect(_point(*label.value('at')[:2])), kind, label.atoms()[0]))
+
+    libs = doc.lib_symbols()
+    pin_cache = {}
+    components = []
+    for symbol in doc.of_kind('symbol'):
+        lib_id = symbol.value('lib_id')
+        unit = int(symbol.value('unit', '1'))
+        if (lib_id, unit) not in pin_cache:
+            pin_cache[lib_id, unit] = _lib_pins(libs[lib_id], unit) if lib_id in libs else []
+        at = symbol.value('at')
+        origin, angle = (float(at[0]), float(at[1])), float(at[2]) if len(at) > 2 else 0.0
+        mirror = symbol.value('mirror')
+
+        pins = {}
+        for number, name, x, y in pin_cache[lib_id, unit]:
+            point = connect(_point(*place_pin(x, y, origin, angle, mirror)))
+            pins[number] = (name, point)
+
+        is_power = lib_id.startswith('power:') or (lib_id in libs and libs[lib_id].find('power') is not None)
+        if is_power:
+            net = symbol.field('Value') or lib_id.split(':', 1)[1]
+            for _, point in pins.values():
+                names.append((point, 'power', net))
+            continue
+        components.append({'ref': doc.reference(symbol), 'lib_id': lib_id,
+                           'value': symbol.field('Value') or '', 'pins': pins})
+
+    sheets = []
+    for sheet in doc.of_kind('sheet'):
+        sheet_pins = {pin.atoms()[0]: connect(_point(*pin.value('at')[:2])) for pin in sheet.find_all('pin')}
+        sheets.append((sheet.field('Sheetfile') or sheet.field('Sheet file'), sheet_pins))
+
+    # Local labels with the same text are one net within the sheet
+    by_label = {}
+    for point, kind, name in names:
+        if kind == 'label':
+            if name in by_label:
+                uf.union(point, by_label[name])
+            else:
+                by_label[name] = point
+
+    # Number the nets
+    numbering = {}
+    def net_of(point):
+        return numbering.setdefault(uf.find(point), len(numbering))
+
+    for component in components:
+        component['pins'] = {number: (name, net_of(point)) for number, (name, point) in component['pins'].items()}
+    nets = {}
+    for point, kind, name in names:
+        nets.setdefault(net_of(point), []).append((kind, name))
+    sheets = [(sheetfile, {name: net_of(point) for name, point in sheet_pins.items()})
+              for sheetfile, sheet_pins in sheets]
+    for net in numbering.values():
+        nets.setdefault(net, [])
+    return {'components': components, 'nets': nets, 'sheets': sheets}
+
+# ============================================================
+# NETLISTER
+# ============================================================
+
+def _file_digest(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    return hashlib.sha256(data).hexdigest(), data
+
+class Netlister:
+    """Schematic -> SPICE deck, reusing per-sheet connectivity while sheets are unchanged"""
+
+    def __init__(self):
+        self._sheets = {}       # path -> (digest, connectivity)
+        self._decks = {}        # root path -> (digests, deck, report)
+        self.rebuilt = []       # Sheets parsed by the last netlist() call
+
+    def _sheet(self, path):
+        digest, data = _file_digest(path)
+        cached = self._sheets.get(path)
+        if cached and cached[0] == digest:
+            return digest, cached[1]
+        connectivity = sheet_connectivity(kicad_sexpr.Document(data.decode('utf-8')))
+        self._sheets[path] = (digest, connectivity)
+        self.rebuilt.append(path)
+        return digest, connectivity
+
+    def _collect(self, root):
+        """[(path, connectivity)] for the root sheet and its sub-sheets, with their digests"""
+        sheets, digests, pending, seen = [], [], [os.path.abspath(root)], set()
+        while pending:
+            path = pending.pop(0)
+            if path in seen:
+                continue
+            seen.add(path)
+            digest, connectivity = self._sheet(path)
+            sheets.append((path, connectivity))
+            digests.append(digest)
+            for sheetfile, _ in connectivity['sheets']:
+                pending.append(os.path.join(os.path.dirname(path), sheetfile))
+        return sheets, tuple(digests)
+
+    def netlist(self, root, tran=DEFAULT_TRAN):
+        """(deck text, report dict) for a schematic file and its sub-sheets"""
+        self.rebuilt = []
+        root = os.path.abspath(root)
+        sheets, digests = self._collect(root)
+        cached = self._decks.get(root)
+        if cached and cached[0] == (digests, tran):
+            return cached[1], cached[2]
+
+        deck, report = build_deck(sheets, title=os.path.basename(root), tran=tran)
+        self._decks[root] = ((digests, tran), deck, report)
+        return deck, report
+
+def _merge(sheets):
+    """Global union of sheet-local nets; returns (uf, net names)"""
+    uf = UnionFind()
+    by_global = {}
+    names = {}
+    for path, connectivity in sheets:
+        for net, labels in connectivity['nets'].items():
+            key = (path, net)
+            uf.find(key)
+            for kind, name in labels:
+                names.setdefault(key, []).append((kind, name))
+                if kind in ('power', 'global_label'):
+                    global_key = (kind == 'power', name)
+                elif kind == 'hierarchical_label':
+                    global_key = ('hier', path, name)
+                else:
+                    continue
+                if global_key in by_global:
+                    uf.union(key, by_global[global_key])
+                else:
+                    by_global[global_key] = key
+        for sheetfile, sheet_pins in connectivity['sheets']:
+            child = os.path.join(os.path.dirname(path), sheetfile)
+            for name, net in sheet_pins.items():
+                global_key = ('hier', child, name)
+                if global_key in by_global:
+                    uf.union((path, net), by_global[global_key])
+                else:
+                    by_global[global_key] = (path, net)
+    return uf, names
+
+def _annotate(components):
+    """Give unannotated references ('R?') free numbers"""
+    used = {c['ref'] for c in components}
+    counters = {}
+    for component in components:
+        ref = component['ref'] or '?'
+        if ref.endswith('?'):
+            prefix = ref[:-1]
+            n = counters.get(prefix, 0)
+            while True:
+                n += 1
+                if f"{prefix}{n}" not in used:
+                    break
+            counters[prefix] = n
+            component['ref'] = f"{prefix}{n}"
+            used.add(component['ref'])
+
+def _node_name(name):
+    """SPICE-safe node name: '+3.3V' -> 'P3_3V', '+5V_MOTOR' -> 'P5V_MOTOR'"""
+    return re.sub(r'[^A-Za-z0-9_]', '_', name.replace('+', 'P')).strip('_') or 'N'
+
+def build_deck(sheets, title="schematic", tran=DEFAULT_TRAN):
+    """SPICE deck text and a report for merged sheet connectivity"""
+    uf, net_labels = _merge(sheets)
+    components = [dict(c, sheet=path) for path, connectivity in sheets for c in connectivity['components']]
+    _annotate(components)
+
+    # Name every net: ground, power, global label, local label, then first pin
+    labels = {}
+    for key, entries in net_labels.items():
+        labels.setdefault(uf.find(key), []).extend(entries)
+    pins_on = {}
+    for component in components:
+        for number, (name, net) in sorted(component['pins'].items()):
+            pins_on.setdefault(uf.find((component['sheet'], net)), []).append((component['ref'], number))
+
+    rank = {'power': 0, 'global_label': 1, 'hierarchical_label': 2, 'label': 3}
+    node = {}
+    supplies = {}
+    shorted = []
+    for root in set(labels) | set(pins_on):
+        entries = sorted(labels.get(root, []), key=lambda e: (rank[e[0]], e[1]))
+        powers = sorted({name for kind, name in entries if kind == 'power'})
+        if len(powers) > 1:
+            shorted.append(powers)
+        if any(kind == 'power' and name.upper() in GROUND_NETS for kind, name in entries):
+            node[root] = '0'
+        elif entries:
+            node[root] = _node_name(entries[0][1])
+            if entries[0][0] == 'power':
+                supplies[node[root]] = entries[0][1]
+        else:
+            ref, number = min(pins_on[root])
+            node[root] = f"N_{ref}_{number}"
+
+    lines = [f"* RTS Fan Control - Netlist extracted from {title}",
+             "* Generated by schematic_netlist.py; edit the schematic, not this file",
+             "", "* Supplies"]
+    for name, net in sorted(supplies.items()):
+        volts = supply_voltage(net)
+        lines.append(f"V{name} {name} 0 DC {volts:g}" if volts is not None else f"* {net}: no voltage in name")
+
+    models = []
+    unmodelled = []
+    unconnected = []
+    lines += ["", "* Components"]
+    for component in sorted(components, key=lambda c: c['ref']):
+        ref, pins = component['ref'], component['pins']
+        nodes = {}
+        for number, (name, net) in pins.items():
+            nodes[number] = node[uf.find((component['sheet'], net))]
+            nodes.setdefault(name, nodes[number])
+            nodes.setdefault(name.split('-')[0], nodes[number])     # 'PA0-ADC' -> 'PA0'
+            if len(pins_on[uf.find((component['sheet'], net))]) == 1 and nodes[number] != '0' \
+                    and nodes[number] not in supplies and not labels.get(uf.find((component['sheet'], net))):
+                unconnected.append(f"{ref}.{number}")
+
+        def pin(*keys):
+            for key in keys:
+                if key in nodes:
+                    return nodes[key]
+            raise KeyError(f"{ref} has no pin {' / '.join(keys)}")
+
+        mapper = SPICE_MODELS.get(component['lib_id'])
+        if mapper is None:
+            unmodelled.append(ref)
+            lines.append(f"* {ref} {component['lib_id']} ({component['value']}): no SPICE model")
+            continue
+        try:
+            cards, needed = mapper(ref, component['value'], pin)
+        except (KeyError, ValueError) as e:
+            unmodelled.append(ref)
+            lines.append(f"* {ref} {component['lib_id']}: {e.args[0]}")
+            continue
+        lines += cards
+        models += [m for m in needed if m not in models]
+
+    if models:
+        lines += ["", "* Models"] + models
+    lines += ["", f".tran {tran[0]} {tran[1]}", ".end", ""]
+
+    report = {'components': len(components), 'nets': len(node), 'supplies': sorted(supplies.values()),
+              'unmodelled': unmodelled, 'unconnected': unconnected, 'shorted': shorted}
+    return "\n".join(lines), report
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def _listing(items, limit=12):
+    shown = ", ".join(items[:limit])
+    return shown + (f" (+{len(items) - limit} more)" if len(items) > limit else "")
+
+def _print_report(report, elapsed, rebuilt):
+    print(f"✓ {report['components']} components, {report['nets']} nets in {elapsed * 1000:.1f} ms "
+          f"({len(rebuilt)} sheet(s) re-read)")
+    if report['unmodelled']:
+        print(f"  No SPICE model: {_listing(report['unmodelled'])}")
+    for powers in report['shorted']:
+        print(f"  ⚠ Power nets shorted together: {', '.join(powers)}")
+    if report['unconnected']:
+        print(f"  ⚠ Unconnected pins: {_listing(report['unconnected'])}")
+
+def main():
+    args = sys.argv[1:]
+    output = None
+    if '--output' in args:
+        i = args.index('--output')
+        output = args[i + 1]
+        del args[i:i + 2]
+    simulate = '--simulate' in args
+    watch = '--watch' in args
+    args = [a for a in args if a not in ('--simulate', '--watch')]
+    path = args[0] if args else DEFAULT_SCHEMATIC
+
+    netlister = Netlister()
+    try:
+        start = time.perf_counter()
+        deck, report = netlister.netlist(path)
+        elapsed = time.perf_counter() - start
+    except FileNotFoundError as e:
+        print(f"❌ {e.filename} not found")
+        return 1
+    except (kicad_sexpr.ParseError, KeyError, ValueError) as e:
+        print(f"❌ Netlist extraction failed: {e}")
+        return 1
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(deck)
+        _print_report(report, elapsed, netlister.rebuilt)
+        print(f"✓ Deck saved to: {output}")
+    else:
+        print(deck)
+        _print_report(report, elapsed, netlister.rebuilt)
+
+    if simulate:
+        import mna_solver
+        circuit = mna_solver.parse_netlist(deck)
+        probes = [f"v({name})" for name in circuit.nodes]
+        results = mna_solver.transient(circuit, probes=probes)
+        print(f"\nFinal node voltages (t = {results['time'][-1]:g}s):")
+        for probe in probes:
+            print(f"  {probe:<24} {results[probe][-1]:>9.4f} V")
+
+    if watch:
+        print(f"\nWatching {path} (Ctrl+C to stop)...")
+        failure = None
+        try:
+            while True:
+                time.sleep(1.0)
+                start = time.perf_counter()
+                try:
+                    new_deck, report = netlister.netlist(path)
+                except FileNotFoundError as e:
+                    error = f"{e.filename} not found"
+                except (kicad_sexpr.ParseError, KeyError, ValueError) as e:
+                    error = f"Netlist extraction failed: {e}"
+                else:
+                    error = None
+                if error:
+                    # A save in progress or a broken edit; report once and keep watching
+                    if error != failure:
+                        print(f"❌ {error}")
+                    failure = error
+                    continue
+                if failure and not netlister.rebuilt:
+                    print(f"✓ {path} readable again (no changes)")
+                failure = None
+                if netlister.rebuilt:
+                    _print_report(report, time.perf_counter() - start, netlister.rebuilt)
+                    if new_deck != deck and output:
+                        with open(output, 'w', encoding='utf-8') as f:
+                            f.write(new_deck)
+                        print(f"✓ Deck updated: {output}")
+                    deck = new_deck
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+RTS Fan Control - Simulation Result Cache
+Content-addressed cache for circuit simulation results
+
+Entries are keyed by a SHA-256 of the rendered netlist text, the analysis
+command and the simulator version, and stored as uncompressed .npz files (one
+float64 array per vector). The cache is bounded by total size; least recently
+used entries (by file mtime, refreshed on every hit) are evicted first.
+
+Usage:
+    python sim_cache.py            # show cache location and size
+    python sim_cache.py --clear    # remove all entries
+"""
+
+import hashlib
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(SCRIPT_DIR)
+DEFAULT_CACHE_DIR = os.environ.get("RTS_SIM_CACHE_DIR", os.path.join(PROJECT_DIR, ".sim_cache"))
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024   # 256 MB
+
+_ANALYSIS_RE = re.compile(r'^\s*\.?(tran|ac|dc|op)\b.*$', re.IGNORECASE | re.MULTILINE)
+
+_ngspice_version = None
+
+def ngspice_version():
+    """First line of `ngspice --version`, or None if ngspice is not installed"""
+    global _ngspice_version
+    if _ngspice_version is None:
+        try:
+            result = subprocess.run(["ngspice", "--version"], capture_output=True, text=True, timeout=10)
+            lines = [l.strip() for l in result.stdout.splitlines() if l.strip()]
+            _ngspice_version = lines[0] if result.returncode == 0 and lines else ""
+        except (FileNotFoundError, subprocess.TimeoutExpired):
+            _ngspice_version = ""
+    return _ngspice_version or None
+
+def _umask():
+    """Current process umask (reading it means setting it, so put it back)"""
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+def analysis_command(netlist):
+    """The analysis line(s) of a netlist, e.g. 'tran 1ms 10s'"""
+    return "\n".join(m.group(0).split(';')[0].strip().lower() for m in _ANALYSIS_RE.finditer(netlist))
+
+class SimulationCache:
+    """Size-bounded LRU cache of simulation vectors on disk"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def key(self, netlist, simulator, analysis=None):
+        """Content hash of netlist + analysis command + simulator version"""
+        if analysis is None:
+            analysis = analysis_command(netlist)
+        digest = hashlib.sha256()
+        for part in (netlist, analysis, simulator):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".npz")
+
+    def get(self, key):
+        """Return {name: array} for a cached key, or None on a miss"""
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                vectors = {name: data[name] for name in data.files}
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+        os.utime(path)   # Mark as most recently used
+        return vectors
+
+    def put(self, key, vectors):
+        """Store {name: array}; written atomically, then evict down to max_bytes"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Not '.npz', so entries() never counts (or evicts) a half-written file
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(path))
+        try:
+            # mkstemp makes the file 0600; give it the mode open() would have
+            os.chmod(tmp_path, 0o666 & ~_umask())
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **{name: np.asarray(v, dtype=np.float64) for name, v in vectors.items()})
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        self.evict()
+
+    def entries(self):
+        """List of (mtime, size, path) for every cache entry"""
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".npz"):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        return total
+
+    def clear(self):
+        for _, _, path in self.entries():
+            os.unlink(path)
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+def cached_run(cache, netlist, simulator, run):
+    """Return cached vectors for netlist, or call run() and cache its result"""
+    key = cache.key(netlist, simulator)
+    vectors = cache.get(key)
+    if vectors is not None:
+        return vectors, True
+    vectors = run()
+    if vectors is not None:
+        cache.put(key, vectors)
+    return vectors, False
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    cache = SimulationCache()
+    if "--clear" in sys.argv[1:]:
+        cache.clear()
+        print(f"✓ Cleared cache: {cache.cache_dir}")
+        return 0
+
+    entries = cache.entries()
+    print(f"Cache directory: {cache.cache_dir}")
+    print(f"Entries:         {len(entries)}")
+    print(f"Size:            {cache.size() / 1024 / 1024:.2f} MB (limit {cache.max_bytes / 1024 / 1024:.0f} MB)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
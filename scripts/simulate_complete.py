@@ -14,38 +14,45 @@ Generates:
 - 6-panel waveform analysis plot
 - Raw simulation data CSV
 - Analysis report with metrics
+
+Usage:
+    python simulate_complete.py [--trace trace.json]   # Chrome trace of each stage
 """
 
 import subprocess
 import os
 import sys
+from string import Template
 
-def main():
-    print("""
-╔════════════════════════════════════════════════════════════════════════════╗
-║            RTS FAN CONTROL - TEMPERATURE TO PWM SIMULATION                 ║
-║                  STM32F103C8 + LM35 + 2N2222 Motor Driver                 ║
-╚════════════════════════════════════════════════════════════════════════════╝
-    """)
-    
-    # Check if ngspice is installed
-    print("\n[1] Checking ngspice installation...")
-    try:
-        result = subprocess.run(["ngspice", "--version"], capture_output=True, text=True)
-        if result.returncode == 0:
-            print("✓ ngspice found")
-        else:
-            print("✗ ngspice not installed")
-            print("  Install with: choco install ngspice")
-            return 1
-    except FileNotFoundError:
-        print("✗ ngspice not found in PATH")
-        print("  Install with: choco install ngspice")
-        return 1
-    
-    print("\n[2] Creating circuit netlist...")
-    
-    netlist = """RTS Fan Control - Complete Simulation
+import decimate
+import mna_solver
+import rawfile
+import sim_cache
+import timing_trace
+
+# ============================================================
+# NETLIST TEMPLATE
+# ============================================================
+
+# Component values and control thresholds are ${NAME} placeholders so the
+# netlist can be rendered for parameter sweeps (see param_sweep.py)
+DEFAULT_PARAMS = {
+    'VCC': '5V',
+    'RADC': '10k',
+    'CADC': '10n',
+    'V_ON': '0.25',
+    'V_FULL': '0.45',
+    'V_PWM': '3.3',
+    'RBASE': '1k',
+    'BETA': '100',
+    'RLOAD': '10',
+    'LLOAD': '1m',
+    'RMOTOR': '10',
+    'TSTEP': '1ms',
+    'TSTOP': '10s',
+}
+
+NETLIST_TEMPLATE = """RTS Fan Control - Complete Simulation
 * STM32F103C8 Temperature-Controlled Fan Driver
 * LM35 Sensor → ADC → PWM → 2N2222 Motor Driver
 
@@ -54,7 +61,7 @@ def main():
 * ============================================================
 * POWER SUPPLIES
 * ============================================================
-VCC 1 0 DC 5V          ; Motor supply
+VCC 1 0 DC ${VCC}          ; Motor supply
 VDD 2 0 DC 3.3V       ; STM32 supply
 
 * ============================================================
@@ -69,8 +76,8 @@ CTEMP TEMP_OUT 0 100n
 * ============================================================
 * ADC INPUT (Low-pass filter)
 * ============================================================
-RADC TEMP_OUT ADC_IN 10k
-CADC ADC_IN 0 10n
+RADC TEMP_OUT ADC_IN ${RADC}
+CADC ADC_IN 0 ${CADC}
 
 * ============================================================
 * STM32 PWM CONVERSION
@@ -79,11 +86,11 @@ CADC ADC_IN 0 10n
 * Control curve: 25°C @ 0%, 45°C @ 100%
 * ============================================================
 EPWM PWM_OUT 0 VALUE = {
-    IF(V(ADC_IN) < 0.25, 
+    IF(V(ADC_IN) < ${V_ON}, 
         0,
-        IF(V(ADC_IN) > 0.45,
-            3.3,
-            3.3 * (V(ADC_IN) - 0.25) / 0.20
+        IF(V(ADC_IN) > ${V_FULL},
+            ${V_PWM},
+            ${V_PWM} * (V(ADC_IN) - ${V_ON}) / (${V_FULL} - ${V_ON})
         )
     )
 }
@@ -95,7 +102,7 @@ CPWM PWM_BUF 0 1u
 * ============================================================
 * BASE DRIVE CIRCUIT (1kΩ resistor)
 * ============================================================
-RBASE PWM_BUF QBASE 1k
+RBASE PWM_BUF QBASE ${RBASE}
 
 * ============================================================
 * 2N2222 NPN TRANSISTOR
@@ -105,7 +112,7 @@ DBE QBASE 0 DIN4148
 .model DIN4148 D(Is=5.84e-14 N=1.906)
 
 * Current source (Ic = β * Ib)
-FCC QCOLL 0 VBES 100
+FCC QCOLL 0 VBES ${BETA}
 
 * Base-Emitter source
 VBES QBASE 0 DC 0
@@ -119,9 +126,9 @@ CCOLL QCOLL 0 10p
 * ============================================================
 * MOTOR LOAD (5V → Transistor → GND)
 * ============================================================
-RLOAD 1 QCOLL 10      ; Motor resistance
-LLOAD QCOLL MOTOR_OUT 1m
-RMOTOR MOTOR_OUT 0 10
+RLOAD 1 QCOLL ${RLOAD}      ; Motor resistance
+LLOAD QCOLL MOTOR_OUT ${LLOAD}
+RMOTOR MOTOR_OUT 0 ${RMOTOR}
 
 * Back-EMF Protection Diode
 DMOTOR 0 1 DPROTECT
@@ -137,158 +144,205 @@ CVDD 2 0 100n
 * TRANSIENT ANALYSIS (0-10 seconds)
 * ============================================================
 .control
-tran 1ms 10s
+tran ${TSTEP} ${TSTOP}
 
-* Save data
-set wr_singlescale
-set wr_vecnames
-option numdgt=7
-wrdata tempfan_simulation.csv v(TEMP) v(ADC_IN) v(PWM_BUF) v(QBASE) v(QCOLL) v(MOTOR_OUT)
+* Save data (binary rawfile, read with rawfile.py)
+set filetype=binary
+write tempfan_simulation.raw v(TEMP) v(ADC_IN) v(PWM_BUF) v(QBASE) v(QCOLL) v(MOTOR_OUT)
 
 .endc
 
 .end
 """
+
+def render_netlist(**params):
+    """Render the netlist with DEFAULT_PARAMS overridden by params"""
+    unknown = set(params) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise KeyError(f"Unknown netlist parameters: {', '.join(sorted(unknown))}")
+    values = dict(DEFAULT_PARAMS)
+    values.update({k: str(v) for k, v in params.items()})
+    return Template(NETLIST_TEMPLATE).substitute(values)
+
+@timing_trace.traced()
+def create_plots(plot_times, temps, adcs, pwms, bases, colls, motors, output_file="fan_simulation.png"):
+    """Six-panel waveform figure"""
+    import matplotlib.pyplot as plt
+    import matplotlib.gridspec as gridspec
+    
+    fig = plt.figure(figsize=(15, 10))
+    gs = gridspec.GridSpec(3, 2, figure=fig, hspace=0.35, wspace=0.3)
+    
+    # Temperature
+    ax1 = fig.add_subplot(gs[0, 0])
+    ax1.plot(plot_times, temps, 'r-', linewidth=2)
+    ax1.axhline(0.25, color='b', linestyle='--', alpha=0.5, label='25°C')
+    ax1.axhline(0.45, color='g', linestyle='--', alpha=0.5, label='45°C')
+    ax1.set_title("Temperature Sensor (LM35)")
+    ax1.set_ylabel("Voltage (V)")
+    ax1.grid(True, alpha=0.3)
+    ax1.legend()
+    
+    # ADC
+    ax2 = fig.add_subplot(gs[0, 1])
+    ax2.plot(plot_times, adcs, 'b-', linewidth=2)
+    ax2.set_title("ADC Input (Filtered)")
+    ax2.set_ylabel("Voltage (V)")
+    ax2.grid(True, alpha=0.3)
+    
+    # PWM
+    ax3 = fig.add_subplot(gs[1, 0])
+    ax3.plot(plot_times, pwms, 'g-', linewidth=2)
+    ax3.fill_between(plot_times, 0, pwms, alpha=0.3, color='green')
+    ax3.set_title("PWM Output (PA6)")
+    ax3.set_ylabel("Voltage (V)")
+    ax3.set_ylim([0, 3.5])
+    ax3.grid(True, alpha=0.3)
+    
+    # Transistor
+    ax4 = fig.add_subplot(gs[1, 1])
+    ax4.plot(plot_times, bases, 'purple', linewidth=2, label='Base')
+    ax4.plot(plot_times, colls, 'orange', linewidth=2, label='Collector')
+    ax4.set_title("2N2222 Transistor")
+    ax4.set_ylabel("Voltage (V)")
+    ax4.grid(True, alpha=0.3)
+    ax4.legend()
+    
+    # Characteristic Curve
+    ax5 = fig.add_subplot(gs[2, 0])
+    temp_vals = [x/100.0 for x in range(0, 101, 5)]
+    pwm_vals = []
+    for v in temp_vals:
+        if v < 0.25:
+            pwm = 0
+        elif v > 0.45:
+            pwm = 3.3
+        else:
+            pwm = 3.3 * (v - 0.25) / 0.20
+        pwm_vals.append(pwm)
+    
+    ax5.plot(temp_vals, pwm_vals, 'darkgreen', linewidth=3, marker='o')
+    ax5.scatter(adcs, pwms, c=plot_times, cmap='viridis', s=5, alpha=0.5)
+    ax5.set_title("Control Characteristic")
+    ax5.set_xlabel("ADC Voltage (V)")
+    ax5.set_ylabel("PWM (V)")
+    ax5.grid(True, alpha=0.3)
+    
+    # Motor
+    ax6 = fig.add_subplot(gs[2, 1])
+    ax6.plot(plot_times, motors, 'brown', linewidth=2)
+    ax6.fill_between(plot_times, 0, motors, alpha=0.3, color='brown')
+    ax6.set_title("Motor Output")
+    ax6.set_ylabel("Voltage (V)")
+    ax6.set_xlabel("Time (s)")
+    ax6.grid(True, alpha=0.3)
+    
+    fig.suptitle("RTS Fan Control - Circuit Simulation\nSTM32F103C8 + LM35 + 2N2222 Motor Driver", 
+                 fontsize=14, fontweight='bold')
     
-    with open("tempfan.cir", "w") as f:
-        f.write(netlist)
+    plt.savefig(output_file, dpi=150, bbox_inches='tight')
+    print(f"✓ Saved: {output_file}")
+    plt.show()
+
+@timing_trace.traced("simulate_complete")
+def main():
+    print("""
+╔════════════════════════════════════════════════════════════════════════════╗
+║            RTS FAN CONTROL - TEMPERATURE TO PWM SIMULATION                 ║
+║                  STM32F103C8 + LM35 + 2N2222 Motor Driver                 ║
+╚════════════════════════════════════════════════════════════════════════════╝
+    """)
+    
+    # Check if ngspice is installed
+    print("\n[1] Checking ngspice installation...")
+    ngspice = sim_cache.ngspice_version()
+    use_ngspice = ngspice is not None
+    if use_ngspice:
+        print("✓ ngspice found")
+    else:
+        print("✗ ngspice not found in PATH - using in-process MNA solver")
+        print("  Install with: choco install ngspice")
+    
+    print("\n[2] Creating circuit netlist...")
+    
+    with timing_trace.span("netlist creation"):
+        netlist = render_netlist()
+        with open("tempfan.cir", "w") as f:
+            f.write(netlist)
     print("✓ Created tempfan.cir")
     
-    print("\n[3] Running ngspice simulation...")
-    try:
-        result = subprocess.run(
-            ["ngspice", "-b", "tempfan.cir", "-o", "tempfan_sim.log"],
-            capture_output=True,
-            text=True,
-            timeout=60
-        )
-        if result.returncode == 0:
+    # Reuse the results of an identical earlier run if we have them
+    cache = sim_cache.SimulationCache()
+    simulator = ngspice or f"mna_solver {mna_solver.SOLVER_VERSION}"
+    cache_key = cache.key(netlist, simulator)
+    with timing_trace.span("cache lookup"):
+        results = cache.get(cache_key)
+    
+    ran_ngspice = False     # Only an ngspice run writes the rawfile and log
+    if results is not None:
+        print(f"\n[3] Loaded cached simulation results ({simulator})")
+    elif use_ngspice:
+        print("\n[3] Running ngspice simulation...")
+        try:
+            with timing_trace.span("simulator run", engine="ngspice"):
+                result = subprocess.run(
+                    ["ngspice", "-b", "tempfan.cir", "-o", "tempfan_sim.log"],
+                    capture_output=True,
+                    text=True,
+                    timeout=60
+                )
+            if result.returncode == 0:
+                print("✓ Simulation completed")
+                ran_ngspice = True
+                with timing_trace.span("load rawfile"):
+                    results = rawfile.load_vectors("tempfan_simulation.raw")
+                cache.put(cache_key, results)
+            else:
+                print("✗ Simulation failed")
+                print(result.stdout[-200:] if result.stdout else "")
+                print(result.stderr[-200:] if result.stderr else "")
+                return 1
+        except subprocess.TimeoutExpired:
+            print("✗ Simulation timeout")
+            return 1
+    else:
+        print("\n[3] Running in-process MNA simulation...")
+        try:
+            with timing_trace.span("simulator run", engine="mna"):
+                results = mna_solver.simulate(netlist)
+            cache.put(cache_key, results)
             print("✓ Simulation completed")
-        else:
-            print("✗ Simulation failed")
-            print(result.stdout[-200:] if result.stdout else "")
-            print(result.stderr[-200:] if result.stderr else "")
+        except (ValueError, KeyError, RuntimeError) as e:
+            print(f"✗ Simulation failed: {e}")
             return 1
-    except subprocess.TimeoutExpired:
-        print("✗ Simulation timeout")
-        return 1
     
     print("\n[4] Parsing results...")
     try:
-        import matplotlib.pyplot as plt
-        import matplotlib.gridspec as gridspec
+        times = results["time"]
+        temps, adcs, pwms, bases, colls, motors = (
+            results[v] for v in ("v(temp)", "v(adc_in)", "v(pwm_buf)",
+                                 "v(qbase)", "v(qcoll)", "v(motor_out)"))
         
-        # Read CSV
-        times, temps, adcs, pwms, bases, colls, motors = [], [], [], [], [], [], []
-        
-        with open("tempfan_simulation.csv", "r") as f:
-            lines = f.readlines()
-            
-        # Skip to data
-        start = 0
-        for i, line in enumerate(lines):
-            if "Index" in line or "v(temp)" in line.lower():
-                start = i + 1
-                break
-        
-        for line in lines[start:]:
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-            try:
-                parts = line.split()
-                if len(parts) >= 7:
-                    times.append(float(parts[0]))
-                    temps.append(float(parts[1]))
-                    adcs.append(float(parts[2]))
-                    pwms.append(float(parts[3]))
-                    bases.append(float(parts[4]))
-                    colls.append(float(parts[5]))
-                    motors.append(float(parts[6]))
-            except:
-                pass
-        
-        if times:
+        if len(times) > 0:
             print(f"✓ Parsed {len(times)} data points")
             
+            # Plot a shared, plot-resolution subset of every trace; min/max
+            # buckets keep each trace's extremes, so the report ranges are exact
+            plot_times, temps, adcs, pwms, bases, colls, motors = decimate.decimate(
+                times, temps, adcs, pwms, bases, colls, motors)
+            
             # Create plots
             print("\n[5] Creating plots...")
-            fig = plt.figure(figsize=(15, 10))
-            gs = gridspec.GridSpec(3, 2, figure=fig, hspace=0.35, wspace=0.3)
-            
-            # Temperature
-            ax1 = fig.add_subplot(gs[0, 0])
-            ax1.plot(times, temps, 'r-', linewidth=2)
-            ax1.axhline(0.25, color='b', linestyle='--', alpha=0.5, label='25°C')
-            ax1.axhline(0.45, color='g', linestyle='--', alpha=0.5, label='45°C')
-            ax1.set_title("Temperature Sensor (LM35)")
-            ax1.set_ylabel("Voltage (V)")
-            ax1.grid(True, alpha=0.3)
-            ax1.legend()
-            
-            # ADC
-            ax2 = fig.add_subplot(gs[0, 1])
-            ax2.plot(times, adcs, 'b-', linewidth=2)
-            ax2.set_title("ADC Input (Filtered)")
-            ax2.set_ylabel("Voltage (V)")
-            ax2.grid(True, alpha=0.3)
-            
-            # PWM
-            ax3 = fig.add_subplot(gs[1, 0])
-            ax3.plot(times, pwms, 'g-', linewidth=2)
-            ax3.fill_between(times, 0, pwms, alpha=0.3, color='green')
-            ax3.set_title("PWM Output (PA6)")
-            ax3.set_ylabel("Voltage (V)")
-            ax3.set_ylim([0, 3.5])
-            ax3.grid(True, alpha=0.3)
-            
-            # Transistor
-            ax4 = fig.add_subplot(gs[1, 1])
-            ax4.plot(times, bases, 'purple', linewidth=2, label='Base')
-            ax4.plot(times, colls, 'orange', linewidth=2, label='Collector')
-            ax4.set_title("2N2222 Transistor")
-            ax4.set_ylabel("Voltage (V)")
-            ax4.grid(True, alpha=0.3)
-            ax4.legend()
-            
-            # Characteristic Curve
-            ax5 = fig.add_subplot(gs[2, 0])
-            temp_vals = [x/100.0 for x in range(0, 101, 5)]
-            pwm_vals = []
-            for v in temp_vals:
-                if v < 0.25:
-                    pwm = 0
-                elif v > 0.45:
-                    pwm = 3.3
-                else:
-                    pwm = 3.3 * (v - 0.25) / 0.20
-                pwm_vals.append(pwm)
-            
-            ax5.plot(temp_vals, pwm_vals, 'darkgreen', linewidth=3, marker='o')
-            ax5.scatter(adcs, pwms, c=times, cmap='viridis', s=5, alpha=0.5)
-            ax5.set_title("Control Characteristic")
-            ax5.set_xlabel("ADC Voltage (V)")
-            ax5.set_ylabel("PWM (V)")
-            ax5.grid(True, alpha=0.3)
-            
-            # Motor
-            ax6 = fig.add_subplot(gs[2, 1])
-            ax6.plot(times, motors, 'brown', linewidth=2)
-            ax6.fill_between(times, 0, motors, alpha=0.3, color='brown')
-            ax6.set_title("Motor Output")
-            ax6.set_ylabel("Voltage (V)")
-            ax6.set_xlabel("Time (s)")
-            ax6.grid(True, alpha=0.3)
-            
-            fig.suptitle("RTS Fan Control - Circuit Simulation\nSTM32F103C8 + LM35 + 2N2222 Motor Driver", 
-                         fontsize=14, fontweight='bold')
-            
-            plt.savefig("fan_simulation.png", dpi=150, bbox_inches='tight')
-            print("✓ Saved: fan_simulation.png")
-            plt.show()
+            create_plots(plot_times, temps, adcs, pwms, bases, colls, motors)
             
             # Generate report
             print("\n[6] Generating report...")
+            output_files = ["- fan_simulation.png: 6-panel analysis"]
+            if ran_ngspice:
+                output_files += ["- tempfan_simulation.raw: Raw data (ngspice binary rawfile)",
+                                 "- tempfan_sim.log: Simulation log"]
+            output_files.append("- simulation_report.txt: This report")
+            output_list = "\n".join(output_files)
             report = f"""
 RTS FAN CONTROL - SIMULATION REPORT
 ===================================
@@ -312,15 +366,12 @@ CONTROL POINTS:
 - Motor Full Speed: > 45°C (0.45V ADC input)
 
 OUTPUT FILES:
-- fan_simulation.png: 6-panel analysis
-- tempfan_simulation.csv: Raw data
-- tempfan_sim.log: Simulation log
-- simulation_report.txt: This report
+{output_list}
 
 STATUS: ✓ CIRCUIT READY FOR DEPLOYMENT
 """
             
-            with open("simulation_report.txt", "w") as f:
+            with timing_trace.span("report"), open("simulation_report.txt", "w") as f:
                 f.write(report)
             
             print(report)
@@ -328,7 +379,7 @@ STATUS: ✓ CIRCUIT READY FOR DEPLOYMENT
             
             return 0
         else:
-            print("✗ No data parsed from CSV")
+            print("✗ No data in simulation results")
             return 1
             
     except ImportError:
@@ -339,4 +390,5 @@ STATUS: ✓ CIRCUIT READY FOR DEPLOYMENT
         return 1
 
 if __name__ == "__main__":
+    timing_trace.enable_from_args(sys.argv)
     sys.exit(main())
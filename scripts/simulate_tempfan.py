@@ -2,22 +2,50 @@
 """
 RTS Fan Control - Temperature to PWM Simulation
 Simulates LM35 temperature sensor + STM32F103C8 + 2N2222 motor driver
-Uses ngspice for circuit simulation with matplotlib for visualization
+Uses ngspice for circuit simulation (or the in-process MNA solver when ngspice
+is unavailable) with matplotlib for visualization
+
+Usage:
+    python simulate_tempfan.py [--csv] [--data-only] [--trace trace.json]
+
+--data-only writes the results table without plotting (matplotlib is never
+imported). --trace records how long each stage takes (see timing_trace.py).
 """
 
 import subprocess
 import os
 import sys
-import csv
+from string import Template
 import numpy as np
-import matplotlib.pyplot as plt
 from pathlib import Path
 
+import columnar
+import decimate
+import firmware_model
+import mna_solver
+import rawfile
+import sim_cache
+import timing_trace
+
 # ============================================================
 # NGSPICE NETLIST: LM35 + STM32 + Motor Driver
 # ============================================================
 
-NETLIST = """* RTS Fan Control - Temperature to PWM Simulation
+# Component values are ${NAME} placeholders so the netlist can be rendered
+# for parameter sweeps (see param_sweep.py)
+DEFAULT_PARAMS = {
+    'VCC': '5V',
+    'VTEMP': '0V',
+    'ADC_GAIN': '1.515',
+    'V_THRESH': '0.3',
+    'RBASE': '1k',
+    'RE1': '100',
+    'RMOTOR': '100',
+    'LMOTOR': '10m',
+    'CMOTOR': '100u',
+}
+
+NETLIST_TEMPLATE = """* RTS Fan Control - Temperature to PWM Simulation
 * LM35 Sensor (0-100°C) -> STM32F103C8 ADC -> 2N2222 Motor Driver
 
 .title RTS Fan Control Simulation
@@ -25,9 +53,9 @@ NETLIST = """* RTS Fan Control - Temperature to PWM Simulation
 * ============================================================
 * VOLTAGE SOURCES
 * ============================================================
-VCC 1 0 DC 5V          ; 5V Supply for motor
+VCC 1 0 DC ${VCC}          ; 5V Supply for motor
 VDD 2 0 DC 3.3V       ; 3.3V Supply for STM32
-VTEMP 3 0 DC 0V       ; Temperature input (0V = 0°C)
+VTEMP 3 0 DC ${VTEMP}       ; Temperature input (0V = 0°C)
 
 * ============================================================
 * LM35 TEMPERATURE SENSOR MODEL
@@ -44,7 +72,7 @@ CTEMP 4 0 100n
 * Simplified: ADC input voltage -> PWM output voltage
 * Scaling: 0-3.3V input -> 0-5V PWM output
 * ============================================================
-EADC 5 0 4 0 1.515    ; ADC gain (5V / 3.3V ≈ 1.515)
+EADC 5 0 4 0 ${ADC_GAIN}    ; ADC gain (5V / 3.3V ≈ 1.515)
 RADC 5 6 10k          ; ADC input impedance
 CADC 6 0 1u           ; Input filter
 
@@ -52,7 +80,7 @@ CADC 6 0 1u           ; Input filter
 * IF V_temp < 0.3V (< 30°C): PWM = 0V (motor off)
 * IF V_temp >= 0.3V (>= 30°C): PWM proportional to temp
 * ============================================================
-ETHRESH 7 0 VALUE = {IF(V(4) < 0.3, 0, V(4) * 1.515)}
+ETHRESH 7 0 VALUE = {IF(V(4) < ${V_THRESH}, 0, V(4) * ${ADC_GAIN})}
 CPWM 7 8 10u          ; PWM output smoothing
 RPWM 8 0 1Meg
 
@@ -62,16 +90,16 @@ RPWM 8 0 1Meg
 * ============================================================
 
 * Base resistor (STM32 PA6 -> 2N2222 base)
-RBASE 8 9 1k
+RBASE 8 9 ${RBASE}
 
 * 2N2222 NPN Transistor
 Q1 1 9 10 Q2N2222
-RE1 10 0 100
+RE1 10 0 ${RE1}
 
 * Motor Load (Equivalent circuit)
-RMOTOR 1 11 100       ; Motor winding resistance
-LMOTOR 11 12 10m      ; Motor inductance
-CMOTOR 12 0 100u      ; Output smoothing
+RMOTOR 1 11 ${RMOTOR}       ; Motor winding resistance
+LMOTOR 11 12 ${LMOTOR}      ; Motor inductance
+CMOTOR 12 0 ${CMOTOR}      ; Output smoothing
 
 * Freewheeling Diode (1N4007)
 D1 12 1 D1N4007
@@ -140,28 +168,41 @@ D1 12 1 D1N4007
 * Temperature sweep: 0 to 100°C over 10 seconds
 * Rate: 10°C per second
 .control
-    alter VTEMP DC 0    ; Start at 0V (0°C)
+    alter VTEMP DC ${VTEMP}    ; Start at 0V (0°C)
     tran 0.01 10 0 0.01 ; Simulate 10 seconds with 0.01s steps
     
     * Manually increase temperature source over time
     * At each time point, calculate temperature
     alter VTEMP DC 0.1
     
-    * Output results to file
-    set wr_singlescale
-    set wr_vecnames
-    option numdgt=6
-    wrdata output.csv v(4) v(8) v(12)
+    * Output results to file (binary rawfile, read with rawfile.py)
+    set filetype=binary
+    write output.raw v(4) v(8) v(12)
     
 .endc
 
 .end
 """
 
+def render_netlist(**params):
+    """Render the netlist with DEFAULT_PARAMS overridden by params"""
+    unknown = set(params) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise KeyError(f"Unknown netlist parameters: {', '.join(sorted(unknown))}")
+    values = dict(DEFAULT_PARAMS)
+    values.update({k: str(v) for k, v in params.items()})
+    return Template(NETLIST_TEMPLATE).substitute(values)
+
+NETLIST = render_netlist()
+
+# Vector names used for cached results
+CACHE_VECTORS = ('time', 'v_temp_mV', 'v_pwm', 'v_motor')
+
 # ============================================================
 # SIMULATION FUNCTIONS
 # ============================================================
 
+@timing_trace.traced()
 def create_netlist_file(filename="tempfan.cir"):
     """Create ngspice netlist file"""
     with open(filename, 'w', encoding='utf-8') as f:
@@ -169,6 +210,7 @@ def create_netlist_file(filename="tempfan.cir"):
     print(f"✅ Netlist created: {filename}")
     return filename
 
+@timing_trace.traced()
 def run_ngspice_simulation(netlist_file="tempfan.cir", log_file="ngspice.log"):
     """Run ngspice simulation"""
     print("\n🔄 Running ngspice simulation...")
@@ -198,38 +240,41 @@ def run_ngspice_simulation(netlist_file="tempfan.cir", log_file="ngspice.log"):
         print(f"❌ Error running simulation: {e}")
         return False
 
-def read_simulation_data(csv_file="output.csv"):
-    """Read simulation results from CSV"""
-    print(f"\n📊 Reading simulation data from {csv_file}")
+@timing_trace.traced()
+def run_inprocess_simulation(netlist=NETLIST):
+    """Solve the netlist in-process with the MNA engine (no ngspice needed)"""
+    print("\n🔄 Running in-process MNA simulation...")
+    try:
+        results = mna_solver.simulate(netlist, probes=["v(4)", "v(8)", "v(12)"])
+    except (ValueError, KeyError, RuntimeError) as e:
+        print(f"❌ In-process simulation failed: {e}")
+        return None
     
-    times = []
-    v_temp = []
-    v_pwm = []
-    v_motor = []
+    print(f"✅ Solved {len(results['time'])} time points")
+    return results['time'], results['v(4)'] * 1000, results['v(8)'], results['v(12)']
+
+@timing_trace.traced()
+def read_simulation_data(raw_file="output.raw"):
+    """Read simulation results from the ngspice binary rawfile (memory-mapped)"""
+    print(f"\n📊 Reading simulation data from {raw_file}")
     
     try:
-        with open(csv_file, 'r') as f:
-            reader = csv.reader(f)
-            # Skip header if present
-            next(reader, None)
-            
-            for row in reader:
-                if len(row) >= 3:
-                    try:
-                        times.append(float(row[0]))
-                        v_temp.append(float(row[1]) * 1000)   # Convert to mV
-                        v_pwm.append(float(row[2]))
-                        v_motor.append(float(row[3]) if len(row) > 3 else 0)
-                    except ValueError:
-                        continue
-        
-        print(f"✅ Read {len(times)} data points")
-        return times, v_temp, v_pwm, v_motor
-        
+        vectors = rawfile.load_vectors(raw_file)
+        times = vectors['time']
+        v_temp = vectors['v(4)'] * 1000   # Convert to mV
+        v_pwm = vectors['v(8)']
+        v_motor = vectors['v(12)']
     except FileNotFoundError:
-        print(f"❌ Output file not found: {csv_file}")
+        print(f"❌ Output file not found: {raw_file}")
+        return [], [], [], []
+    except (ValueError, KeyError) as e:
+        print(f"❌ Invalid rawfile {raw_file}: {e}")
         return [], [], [], []
+    
+    print(f"✅ Read {len(times)} data points")
+    return times, v_temp, v_pwm, v_motor
 
+@timing_trace.traced()
 def generate_synthetic_data():
     """Generate synthetic data if ngspice not available"""
     print("\n⚠️  Generating synthetic data (ngspice unavailable)")
@@ -240,19 +285,22 @@ def generate_synthetic_data():
     temperatures_C = times * 10  # 10°C per second
     v_temp_mV = temperatures_C * 10  # LM35: 10mV per °C
     
-    # PWM response with hysteresis
-    v_pwm = np.where(v_temp_mV < 300, 0,  # Below 30°C: off
-            np.where(v_temp_mV > 1000, 5,  # Above 100°C: full
-                    (v_temp_mV - 300) * 5 / 700))  # Linear ramp 30-100°C
+    # PWM response from the firmware control law, as the 0-5V average the
+    # netlist's PWM node models
+    adc = firmware_model.adc_code(v_temp_mV / 1000)
+    _, pwm = firmware_model.control_law(adc)
+    v_pwm = 5 * pwm / firmware_model.PWM_MAX
     
     # Motor voltage (filtered)
     v_motor = v_pwm * 0.9  # Motor drives at ~90% of PWM
     
     return times, v_temp_mV, v_pwm, v_motor
 
+@timing_trace.traced()
 def create_plots(times, v_temp, v_pwm, v_motor, output_file="fan_simulation.png"):
     """Generate matplotlib plots"""
     print("\n📈 Generating plots...")
+    import matplotlib.pyplot as plt   # Imported here so data-only runs skip it
     
     # Convert to numpy arrays if needed
     times = np.array(times)
@@ -264,6 +312,10 @@ def create_plots(times, v_temp, v_pwm, v_motor, output_file="fan_simulation.png"
     temp_celsius = v_temp / 10  # LM35: 10mV per °C
     pwm_percent = (v_pwm / 5) * 100 if len(v_pwm) > 0 else np.zeros_like(times)
     
+    # Reduce to plot resolution (min/max buckets keep peaks and threshold crossings)
+    times, temp_celsius, v_pwm, pwm_percent, v_motor = decimate.decimate(
+        times, temp_celsius, v_pwm, pwm_percent, v_motor)
+    
     # Create figure with subplots
     fig, axes = plt.subplots(3, 1, figsize=(12, 10))
     fig.suptitle('RTS Fan Control - Temperature to PWM Simulation', fontsize=16, fontweight='bold')
@@ -316,26 +368,40 @@ def create_plots(times, v_temp, v_pwm, v_motor, output_file="fan_simulation.png"
     
     plt.show()
 
-def save_data_table(times, v_temp, v_pwm, v_motor, output_file="simulation_results.csv"):
-    """Save simulation results as CSV table"""
+# Column name -> CSV header of the results table
+RESULT_LABELS = {
+    'time': 'Time(s)',
+    'temp': 'Temp(°C)',
+    'v_temp': 'V_Temp(mV)',
+    'v_pwm': 'V_PWM(V)',
+    'pwm_duty': 'PWM_Duty(%)',
+    'v_motor': 'V_Motor(V)',
+}
+
+# Decimal places per column in the CSV export
+RESULT_DECIMALS = {'time': 3, 'temp': 1, 'v_temp': 2, 'v_pwm': 3, 'pwm_duty': 1, 'v_motor': 3}
+
+@timing_trace.traced()
+def save_data_table(times, v_temp, v_pwm, v_motor, output_file="simulation_results.npz"):
+    """
+    Save simulation results as a columnar .npz table, or as CSV for a .csv
+    name (.csv.gz for gzip-compressed CSV)
+    """
     print(f"\n📋 Saving results to {output_file}")
     
     temp_celsius = np.array(v_temp) / 10
     pwm_percent = (np.array(v_pwm) / 5) * 100 if len(v_pwm) > 0 else np.zeros_like(times)
+    columns = {'time': times, 'temp': temp_celsius, 'v_temp': v_temp, 'v_pwm': v_pwm,
+               'pwm_duty': pwm_percent, 'v_motor': v_motor}
     
-    with open(output_file, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(['Time(s)', 'Temp(°C)', 'V_Temp(mV)', 'V_PWM(V)', 'PWM_Duty(%)', 'V_Motor(V)'])
-        
-        for i in range(len(times)):
-            writer.writerow([
-                f"{times[i]:.3f}",
-                f"{temp_celsius[i]:.1f}",
-                f"{v_temp[i]:.2f}",
-                f"{v_pwm[i]:.3f}",
-                f"{pwm_percent[i]:.1f}",
-                f"{v_motor[i]:.3f}"
-            ])
+    if output_file.endswith(('.csv', '.csv.gz')):
+        # Whole-column formatting, written in large blocks (see columnar.to_csv)
+        columnar.to_csv(output_file, columns, RESULT_LABELS, RESULT_DECIMALS)
+    else:
+        # Time stays float64 (ms steps over seconds); the signals fit float32
+        columns = {name: np.asarray(values, dtype=np.float64 if name == 'time' else np.float32)
+                   for name, values in columns.items()}
+        columnar.save_columns(output_file, columns, RESULT_LABELS, meta={'netlist': 'tempfan.cir'})
     
     print(f"✅ Results saved: {output_file}")
 
@@ -343,6 +409,7 @@ def save_data_table(times, v_temp, v_pwm, v_motor, output_file="simulation_resul
 # MAIN EXECUTION
 # ============================================================
 
+@timing_trace.traced("simulate_tempfan")
 def main():
     print("="*60)
     print("RTS FAN CONTROL - CIRCUIT SIMULATION")
@@ -352,36 +419,63 @@ def main():
     # Create netlist
     create_netlist_file("tempfan.cir")
     
-    # Try to run ngspice
-    sim_success = run_ngspice_simulation("tempfan.cir", "ngspice.log")
+    # Reuse the results of an identical earlier run if we have them
+    cache = sim_cache.SimulationCache()
+    simulator = sim_cache.ngspice_version() or f"mna_solver {mna_solver.SOLVER_VERSION}"
+    cache_key = cache.key(NETLIST, simulator)
+    with timing_trace.span("cache lookup"):
+        cached = cache.get(cache_key)
     
-    # Get data
-    if sim_success:
-        times, v_temp, v_pwm, v_motor = read_simulation_data("output.csv")
+    if cached is not None:
+        print(f"\n✅ Loaded cached simulation results ({simulator})")
+        times, v_temp, v_pwm, v_motor = (cached[name] for name in CACHE_VECTORS)
     else:
-        print("\n⚠️  Using synthetic data for demonstration...")
-        times, v_temp, v_pwm, v_motor = generate_synthetic_data()
+        # Try to run ngspice
+        sim_success = run_ngspice_simulation("tempfan.cir", "ngspice.log")
+        
+        # Get data
+        if sim_success:
+            data = read_simulation_data("output.raw")
+        else:
+            data = run_inprocess_simulation()
+            # Store the fallback under the engine that actually produced it
+            simulator = f"mna_solver {mna_solver.SOLVER_VERSION}"
+            cache_key = cache.key(NETLIST, simulator)
+        
+        if data is None:
+            print("\n⚠️  Using synthetic data for demonstration...")
+            data = generate_synthetic_data()
+        elif len(data[0]) > 0:
+            cache.put(cache_key, dict(zip(CACHE_VECTORS, data)))
+        times, v_temp, v_pwm, v_motor = data
     
     # If we have data, generate plots
+    data_only = '--data-only' in sys.argv[1:]
     if len(times) > 0:
         # Create plots
-        create_plots(times, v_temp, v_pwm, v_motor, "fan_simulation.png")
+        if not data_only:
+            create_plots(times, v_temp, v_pwm, v_motor, "fan_simulation.png")
         
-        # Save CSV results
-        save_data_table(times, v_temp, v_pwm, v_motor, "simulation_results.csv")
+        # Save results (binary columns; CSV too with --csv)
+        save_data_table(times, v_temp, v_pwm, v_motor, "simulation_results.npz")
+        if '--csv' in sys.argv[1:]:
+            save_data_table(times, v_temp, v_pwm, v_motor, "simulation_results.csv")
         
         # Print summary
         print("\n" + "="*60)
         print("SIMULATION SUMMARY")
         print("="*60)
         print(f"Simulation time: {times[-1]:.2f} seconds")
-        print(f"Temperature range: {np.array(v_temp)/10:.1f}°C - {np.array(v_temp)/10:.1f}°C")
+        print(f"Temperature range: {np.min(v_temp)/10:.1f}°C - {np.max(v_temp)/10:.1f}°C")
         print(f"PWM output: {np.min(v_pwm):.2f}V - {np.max(v_pwm):.2f}V")
         print(f"Motor response: {np.min(v_motor):.2f}V - {np.max(v_motor):.2f}V")
         print("="*60)
         print("\n✅ Files generated:")
-        print("   • fan_simulation.png - Visualization of results")
-        print("   • simulation_results.csv - Data table")
+        if not data_only:
+            print("   • fan_simulation.png - Visualization of results")
+        print("   • simulation_results.npz - Data table (typed binary columns)")
+        if '--csv' in sys.argv[1:]:
+            print("   • simulation_results.csv - Data table (CSV)")
         print("   • ngspice.log - Simulation log")
         print()
     else:
@@ -389,4 +483,5 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    timing_trace.enable_from_args(sys.argv)
     main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+RTS Fan Control - Closed-Loop Thermal Plant
+Lumped thermal model driven by the firmware control law, many scenarios at once
+
+    C dT/dt = P_load(t) - (G_natural + G_fan * fan_speed) * (T - T_ambient)
+
+The sensed temperature goes through the LM35 and 12-bit ADC, the control law
+of main.c runs every 500 ms (HAL_Delay(500)), and the fan speed follows the
+PWM duty with a first-order lag. Each step uses the exact exponential update
+for piecewise-constant inputs, so any dt is stable. Every quantity is an
+array with one entry per scenario, so thousands of ambient/load combinations
+advance in lock-step.
+
+Duty modes:
+    timer    on-pin duty of TIM3 (period 1125), saturates at PWM >= 1125
+    command  the commanded duty pwm / 4000, as the firmware intends
+
+Usage:
+    python thermal_plant.py [options]
+
+    --grid NA,NL       Ambient x load grid size (default: 50,40)
+    --duration S       Simulated seconds (default: 600)
+    --duty MODE        timer | command (default: both, side by side)
+    --output PATH      Also save per-scenario metrics (.npz or .csv)
+"""
+
+import sys
+import time
+
+import numpy as np
+
+import firmware_model
+
+CONTROL_PERIOD_S = 0.5      # HAL_Delay(500) in main.c
+DEFAULT_DT = 0.1            # s
+DEFAULT_DURATION = 600.0    # s
+SETTLING_BAND = 0.5         # °C around the final temperature
+
+# Small heatsink in a ventilated enclosure
+THERMAL_DEFAULTS = {
+    'heat_capacity': 60.0,  # J/K
+    'g_natural': 0.4,       # W/K with the fan stopped
+    'g_fan': 3.6,           # W/K added at full fan speed
+    'fan_tau': 2.0,         # s, fan spin-up time constant
+}
+
+DUTY_MODES = ('timer', 'command')
+
+AMBIENT_RANGE = (15.0, 40.0)    # °C
+LOAD_RANGE = (5.0, 40.0)        # W
+IDLE_FRACTION = 0.2             # Load before the step, as a fraction of full load
+LOAD_STEP_S = 60.0              # s
+
+def fan_duty(pwm, mode='timer'):
+    """Fan drive duty (0-1) for firmware PWM compare values"""
+    if mode == 'timer':
+        return firmware_model.timer_duty(pwm)
+    if mode == 'command':
+        return np.asarray(pwm, dtype=np.float64) / firmware_model.PWM_MAX
+    raise ValueError(f"Unknown duty mode {mode!r} (expected one of {', '.join(DUTY_MODES)})")
+
+def step_load(p_before, p_after, t_step):
+    """Load profile: p_before until t_step, then p_after (scalars or per-scenario arrays)"""
+    p_before = np.asarray(p_before, dtype=np.float64)
+    p_after = np.asarray(p_after, dtype=np.float64)
+    return lambda t: p_after if t >= t_step else p_before
+
+def scenario_grid(ambients, loads):
+    """Flattened (ambient, load) arrays covering every combination"""
+    ambient, load = np.meshgrid(np.asarray(ambients, dtype=np.float64),
+                                np.asarray(loads, dtype=np.float64), indexing='ij')
+    return ambient.ravel(), load.ravel()
+
+def simulate(ambient, load, duration=DEFAULT_DURATION, initial_temp=None, dt=DEFAULT_DT,
+             control_period=CONTROL_PERIOD_S, duty_mode='timer', **params):
+    """
+    Step all scenarios together.
+
+    ambient: per-scenario ambient temperature (°C).
+    load: per-scenario heat input (W), or a function of time returning it.
+    initial_temp: starting temperature (default: ambient).
+    params: overrides for THERMAL_DEFAULTS.
+
+    Returns a dict with times (one entry per control period) and float32
+    (n_times, n_scenarios) arrays temp, pwm and duty.
+    """
+    p = dict(THERMAL_DEFAULTS)
+    unknown = set(params) - set(p)
+    if unknown:
+        raise ValueError(f"Unknown thermal parameters: {', '.join(sorted(unknown))}")
+    p.update(params)
+
+    ambient = np.asarray(ambient, dtype=np.float64)
+    load_at = load if callable(load) else (lambda t, load=np.asarray(load, dtype=np.float64): load)
+    temp = ambient.copy() if initial_temp is None else np.broadcast_to(
+        np.asarray(initial_temp, dtype=np.float64), ambient.shape).copy()
+    speed = np.zeros_like(temp)
+    fan_alpha = 1 - np.exp(-dt / p['fan_tau'])
+
+    steps_per_control = max(1, int(round(control_period / dt)))
+    n_control = int(round(duration / (steps_per_control * dt)))
+    times = np.arange(n_control) * steps_per_control * dt
+    record = {name: np.empty((n_control, len(temp)), dtype=np.float32)
+              for name in ('temp', 'pwm', 'duty')}
+
+    step = 0
+    for k in range(n_control):
+        # Firmware: sample the LM35, run the control law, set the compare value
+        adc = firmware_model.adc_code(firmware_model.lm35_voltage(temp))
+        _, pwm = firmware_model.control_law(adc)
+        duty = fan_duty(pwm, duty_mode)
+        record['temp'][k] = temp
+        record['pwm'][k] = pwm
+        record['duty'][k] = duty
+
+        for _ in range(steps_per_control):
+            power = load_at(step * dt)
+            speed += (duty - speed) * fan_alpha
+            conductance = p['g_natural'] + p['g_fan'] * speed
+            equilibrium = ambient + power / conductance
+            temp = equilibrium + (temp - equilibrium) * np.exp(-conductance * dt / p['heat_capacity'])
+            step += 1
+
+    return {'times': times, **record}
+
+def settling_metrics(times, temp, band=SETTLING_BAND, t_start=0.0):
+    """
+    Per-scenario response metrics from a (n_times, n_scenarios) trajectory.
+
+    settling_time: seconds after t_start until the temperature stays within
+    band of its final value (NaN where the run ends unsettled); overshoot:
+    peak above the final value.
+    """
+    temp = np.asarray(temp, dtype=np.float64)
+    window = np.asarray(times) >= t_start
+    times, temp = np.asarray(times)[window], temp[window]
+    if len(times) < 2:
+        raise ValueError(f"Nothing to measure after t={t_start:g}s; the run must last longer")
+
+    final = temp[-1]
+    peak = temp.max(axis=0)
+    outside = np.abs(temp - final) > band
+    # Last sample outside the band; the one after it is where the scenario settles
+    last_out = len(times) - 1 - np.argmax(outside[::-1], axis=0)
+    settled_at = np.where(outside.any(axis=0), np.minimum(last_out + 1, len(times) - 1), 0)
+    # Still drifting during the last 10 % of the run -> not settled
+    tail = temp[int(len(times) * 0.9):]
+    settled = np.abs(tail - final).max(axis=0) <= band
+
+    return {
+        'final_temp': final,
+        'peak_temp': peak,
+        'overshoot': peak - final,
+        'settling_time': np.where(settled, times[settled_at] - t_start, np.nan),
+        'settled': settled,
+    }
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def run_grid(n_ambient, n_load, duration, duty_mode):
+    """Step-load scenario sweep; returns (ambient, load, metrics, final_duty, elapsed)"""
+    ambient, load = scenario_grid(np.linspace(*AMBIENT_RANGE, n_ambient),
+                                  np.linspace(*LOAD_RANGE, n_load))
+    start = time.perf_counter()
+    result = simulate(ambient, step_load(load * IDLE_FRACTION, load, LOAD_STEP_S),
+                      duration=duration, duty_mode=duty_mode)
+    elapsed = time.perf_counter() - start
+    metrics = settling_metrics(result['times'], result['temp'], t_start=LOAD_STEP_S)
+    return ambient, load, metrics, result['duty'][-1], elapsed
+
+def print_summary(duty_mode, ambient, load, metrics, final_duty, elapsed, steps):
+    """Worst cases and spread of one sweep"""
+    n = len(ambient)
+    print(f"\n[{duty_mode}] {n} scenarios x {steps} steps in {elapsed:.2f}s "
+          f"({n * steps / elapsed / 1e6:.1f} M scenario-steps/s)")
+    settle = metrics['settling_time']
+    hottest = int(np.argmax(metrics['final_temp']))
+    print(f"  Settled:            {int(metrics['settled'].sum())}/{n}")
+    if metrics['settled'].any():
+        # Unsettled scenarios have no settling time (NaN) and are left out
+        worst = int(np.nanargmax(settle))
+        print(f"  Settling time:      median {np.nanmedian(settle):.1f}s, max {settle[worst]:.1f}s "
+              f"(ambient {ambient[worst]:.1f}°C, load {load[worst]:.1f}W)")
+    print(f"  Overshoot:          median {np.median(metrics['overshoot']):.2f}°C, "
+          f"max {metrics['overshoot'].max():.2f}°C")
+    print(f"  Final temperature:  {metrics['final_temp'].min():.1f} - {metrics['final_temp'][hottest]:.1f}°C "
+          f"(hottest at ambient {ambient[hottest]:.1f}°C, load {load[hottest]:.1f}W)")
+    print(f"  Final fan duty:     {final_duty.min() * 100:.0f} - {final_duty.max() * 100:.0f}%")
+
+def main():
+    args = sys.argv[1:]
+    n_ambient, n_load = 50, 40
+    duration = DEFAULT_DURATION
+    modes = DUTY_MODES
+    output = None
+
+    if '--grid' in args:
+        n_ambient, n_load = (int(v) for v in args[args.index('--grid') + 1].split(','))
+    if '--duration' in args:
+        duration = float(args[args.index('--duration') + 1])
+    if '--duty' in args:
+        modes = (args[args.index('--duty') + 1],)
+    if '--output' in args:
+        output = args[args.index('--output') + 1]
+    if duration <= LOAD_STEP_S:
+        print(f"❌ --duration must be longer than the load step at t={LOAD_STEP_S:g}s")
+        return 1
+
+    print("=" * 70)
+    print("Closed-loop thermal plant: step load "
+          f"{IDLE_FRACTION * 100:.0f}% -> 100% at t={LOAD_STEP_S:.0f}s, "
+          f"ambient {AMBIENT_RANGE[0]:.0f}-{AMBIENT_RANGE[1]:.0f}°C, "
+          f"load {LOAD_RANGE[0]:.0f}-{LOAD_RANGE[1]:.0f}W")
+    print("=" * 70)
+
+    steps = int(round(duration / DEFAULT_DT))
+    columns = {}
+    for mode in modes:
+        try:
+            ambient, load, metrics, final_duty, elapsed = run_grid(n_ambient, n_load, duration, mode)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+        print_summary(mode, ambient, load, metrics, final_duty, elapsed, steps)
+        columns['ambient'], columns['load'] = ambient, load
+        for name in ('final_temp', 'peak_temp', 'overshoot', 'settling_time'):
+            columns[f"{mode}_{name}"] = metrics[name]
+        columns[f"{mode}_final_duty"] = final_duty
+
+    if output:
+        import columnar
+        if output.endswith('.npz'):
+            columnar.save_columns(output, columns, meta={'duration_s': duration,
+                                                         'thermal': THERMAL_DEFAULTS})
+        else:
+            columnar.to_csv(output, columns)
+        print(f"\n✓ Scenario metrics saved to: {output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
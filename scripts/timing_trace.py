@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+RTS Fan Control - Timing Trace
+Span instrumentation for the pipeline scripts, written as Chrome trace JSON
+(open in https://ui.perfetto.dev or chrome://tracing)
+
+    with timing_trace.span("simulator run", engine="mna"):
+        ...
+
+    @timing_trace.traced()
+    def create_plots(...):
+        ...
+
+Tracing is off unless enabled; a disabled span() returns a shared no-op
+context and traced() functions run with a single flag check.
+
+Enabling:
+- `--trace PATH` on the pipeline scripts starts a new trace file
+- RTS_TRACE=PATH in the environment appends, so every script run from one
+  shell (demo.bat, a report rebuild) lands in the same timeline
+
+Worker processes inherit the setting; they flush their spans to part files
+next to the trace, which the owning process merges when it saves.
+
+Usage:
+    python timing_trace.py trace.json     # Summarize a trace: time per span name
+"""
+
+import atexit
+import functools
+import glob
+import json
+import os
+import sys
+import threading
+import time
+
+ENV_PATH = "RTS_TRACE"
+ENV_OWNER = "RTS_TRACE_OWNER"
+
+_enabled = False
+_path = None
+_owner_pid = None      # Process that writes the trace file
+_pid = None
+_events = []
+
+# Wall-clock microseconds with perf_counter resolution, comparable across processes
+_WALL0_NS = time.time_ns()
+_PERF0_NS = time.perf_counter_ns()
+
+def _now_us():
+    return (_WALL0_NS + time.perf_counter_ns() - _PERF0_NS) / 1000
+
+class _NullSpan:
+    """What span() returns while tracing is disabled"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    """One complete ("X") event, recorded when the block exits"""
+    __slots__ = ('name', 'args', 'start')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = _now_us()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = _now_us()
+        args = self.args
+        if exc_type is not None:
+            args = dict(args, error=exc_type.__name__)
+        _record({'name': self.name, 'ph': 'X', 'ts': self.start, 'dur': end - self.start,
+                 'pid': os.getpid(), 'tid': threading.get_ident(), 'args': args})
+        return False
+
+def _record(event):
+    global _pid
+    if _pid != os.getpid():
+        # Forked child: drop the parent's buffered events
+        _pid = os.getpid()
+        _events.clear()
+        _events.append(_process_name_event())
+    _events.append(event)
+
+def _process_name_event():
+    name = os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else "python"
+    if _owner_pid != os.getpid():
+        name += " (worker)"
+    return {'name': 'process_name', 'ph': 'M', 'pid': os.getpid(), 'tid': 0, 'args': {'name': name}}
+
+def is_enabled():
+    """True when spans are being recorded"""
+    return _enabled
+
+def span(name, **args):
+    """Context manager timing a block (no-op while disabled)"""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+def traced(name=None):
+    """Decorator recording every call of a function as a span"""
+    def decorate(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(label, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def enable(path, append=False):
+    """Start recording; the trace is saved to path when the process exits"""
+    global _enabled, _path, _owner_pid, _pid
+    _path = os.path.abspath(path)
+    _enabled = True
+    _owner_pid = os.getpid()
+    _pid = _owner_pid
+    _events[:] = [_process_name_event()]
+    if not append and os.path.exists(_path):
+        os.remove(_path)
+    # Spawned workers re-import this module and pick the settings up from here
+    os.environ[ENV_PATH] = _path
+    os.environ[ENV_OWNER] = str(_pid)
+    atexit.register(save)
+
+def enable_from_args(args):
+    """Handle a `--trace PATH` command-line option (removed from args)"""
+    if '--trace' in args:
+        i = args.index('--trace')
+        path = args[i + 1]
+        del args[i:i + 2]
+        if _owner_pid != os.getpid():
+            enable(path)
+
+def _part_pattern(path):
+    return f"{path}.*.part"
+
+def flush():
+    """Worker processes: append buffered spans to this process's part file"""
+    if not _enabled or _owner_pid == os.getpid() or _pid != os.getpid() or len(_events) <= 1:
+        return
+    with open(f"{_path}.{os.getpid()}.part", 'a', encoding='utf-8') as f:
+        for event in _events:
+            f.write(json.dumps(event) + "\n")
+    # The process name event goes into every flush; duplicates are harmless
+    del _events[1:]
+
+def save():
+    """Write (or extend) the trace file with this run's spans and any worker parts"""
+    if not _enabled or _owner_pid != os.getpid() or _pid != os.getpid():
+        return None
+    events = []
+    if os.path.exists(_path):
+        try:
+            with open(_path, encoding='utf-8') as f:
+                events = json.load(f).get('traceEvents', [])
+        except (OSError, ValueError):
+            events = []
+    events.extend(_events)
+    for part in sorted(glob.glob(_part_pattern(_path))):
+        with open(part, encoding='utf-8') as f:
+            events.extend(json.loads(line) for line in f if line.strip())
+        os.remove(part)
+    _events[:] = [_process_name_event()]
+
+    tmp = _path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+    os.replace(tmp, _path)
+    return _path
+
+def _enable_from_environment():
+    """Enable at import when RTS_TRACE is set (as owner unless a parent owns it)"""
+    global _enabled, _path, _pid
+    path = os.environ.get(ENV_PATH)
+    if not path:
+        return
+    owner = os.environ.get(ENV_OWNER)
+    if owner and owner != str(os.getpid()):
+        _enabled = True
+        _path = path
+        _pid = os.getpid()
+        _events[:] = [_process_name_event()]
+        atexit.register(flush)
+    else:
+        enable(path, append=True)
+
+_enable_from_environment()
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return 1
+
+    with open(sys.argv[1], encoding='utf-8') as f:
+        events = [e for e in json.load(f).get('traceEvents', []) if e.get('ph') == 'X']
+    if not events:
+        print("⚠ No spans in trace")
+        return 1
+
+    totals = {}
+    for e in events:
+        total, count = totals.get(e['name'], (0.0, 0))
+        totals[e['name']] = (total + e['dur'], count + 1)
+    wall = (max(e['ts'] + e['dur'] for e in events) - min(e['ts'] for e in events)) / 1000
+    processes = len({e['pid'] for e in events})
+
+    print(f"{len(events)} spans from {processes} processes over {wall:.1f} ms\n")
+    print(f"{'Span':<40} {'calls':>6} {'total ms':>10} {'mean ms':>10}")
+    for name, (total, count) in sorted(totals.items(), key=lambda item: -item[1][0]):
+        print(f"{name:<40} {count:>6} {total / 1000:>10.1f} {total / 1000 / count:>10.2f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+RTS Fan Control - UART Emulator
+Writes the UART log of src/main_simple.c without Renode
+
+The firmware loop is a pure function of the loop counter: the temperature
+starts at 25 °C, rises 5 °C every 10 cycles and wraps to 25 °C above 100 °C,
+so the output repeats every 160 lines. One period is formatted with a port of
+int_to_string() and the firmware_model outputs, then tiled, which writes
+byte-identical lines (including the \\r\\n endings and the startup banner) at
+disk speed. Use it to load-test the parser and report pipeline.
+
+Usage:
+    python uart_emulator.py [lines] [options]
+
+    lines              Loop iterations to emit (default: 60, a 30 s Renode run)
+    --output PATH      Output file, '-' for stdout (default: ../reports/uart_output.txt)
+    --append           Append to the output instead of replacing it
+    --first N          Start at loop iteration N (continue an earlier log)
+    --no-banner        Omit the startup banner
+    --rate N           Pace output at N lines/s (0.5 s per line on the target is 2);
+                       with --rate, lines 0 means run until Ctrl+C
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+import firmware_model
+
+# main_simple.c loop
+TEMP_START = 25             # °C, also the wrap-around value
+TEMP_STEP = 5               # °C per step
+TEMP_LIMIT = 100            # Wraps once the temperature exceeds this
+CYCLES_PER_STEP = 10
+LOOP_PERIOD_S = 0.5         # delay_ms(500)
+
+BANNER = (b"\r\n========================================\r\n"
+          b"STM32 Fan Control Simulation\r\n"
+          b"========================================\r\n\r\n")
+
+DEFAULT_LINES = 60          # demo.bat lets Renode run for 30 s
+DEFAULT_OUTPUT = "../reports/uart_output.txt"
+BLOCK_BYTES = 1 << 20       # Size of each write
+
+TEMP_LEVELS = np.arange(TEMP_START, TEMP_LIMIT + 1, TEMP_STEP)
+PERIOD_LINES = len(TEMP_LEVELS) * CYCLES_PER_STEP
+
+def int_to_string(num):
+    """Port of the firmware's int_to_string(): decimal digits, leading '-'"""
+    num = int(num)
+    if num == 0:
+        return b"0"
+    digits = []
+    negative = num < 0
+    num = abs(num)
+    while num > 0:
+        digits.append(48 + num % 10)
+        num //= 10
+    if negative:
+        digits.append(ord('-'))
+    return bytes(reversed(digits))
+
+def format_line(temperature, adc_value, pwm_duty, fan):
+    """One UART line exactly as the firmware sends it"""
+    return (b"Temp: " + int_to_string(temperature) +
+            b" C | ADC: " + int_to_string(adc_value) +
+            b" | PWM: " + int_to_string(pwm_duty) +
+            b" | Fan: " + int_to_string(fan) + b"%\r\n")
+
+def loop_temperatures(first, count):
+    """Temperature (°C) of loop iterations first .. first+count-1"""
+    cycles = np.arange(first, first + count, dtype=np.int64)
+    return TEMP_LEVELS[(cycles // CYCLES_PER_STEP) % len(TEMP_LEVELS)]
+
+def expected_samples(count, first=0):
+    """(temps, adcs, pwms) the parser should recover from emulated lines"""
+    temps = loop_temperatures(first, count)
+    adcs, pwms, _ = firmware_model.simple_firmware_outputs(temps)
+    return temps, adcs, pwms
+
+def period_lines():
+    """The PERIOD_LINES lines of one full temperature sweep, in loop order"""
+    temps = loop_temperatures(0, PERIOD_LINES)
+    adcs, pwms, fans = firmware_model.simple_firmware_outputs(temps)
+    return [format_line(*values) for values in zip(temps, adcs, pwms, fans)]
+
+def iter_uart_bytes(count, first=0, banner=True, block_bytes=BLOCK_BYTES):
+    """Yield the UART output of count loop iterations as ~block_bytes chunks"""
+    lines = period_lines()
+    phase = first % PERIOD_LINES
+    lines = lines[phase:] + lines[:phase]
+    period = b''.join(lines)
+
+    if banner:
+        yield BANNER
+    repeats = max(1, block_bytes // len(period))
+    block = period * repeats
+    full_blocks, rest = divmod(count, PERIOD_LINES * repeats)
+    for _ in range(full_blocks):
+        yield block
+    full_periods, rest = divmod(rest, PERIOD_LINES)
+    tail = period * full_periods + b''.join(lines[:rest])
+    if tail:
+        yield tail
+
+def write_uart_output(out, count, first=0, banner=True, append=False):
+    """Write count emulated loop iterations to a path or binary stream; returns bytes written"""
+    if hasattr(out, 'write'):
+        return sum(out.write(chunk) for chunk in iter_uart_bytes(count, first, banner))
+    with open(out, 'ab' if append else 'wb') as f:
+        return sum(f.write(chunk) for chunk in iter_uart_bytes(count, first, banner))
+
+def stream_uart_output(f, rate, count=None, first=0, banner=True):
+    """Write lines to an open binary stream at rate lines/s (forever if count is None)"""
+    if banner:
+        f.write(BANNER)
+        f.flush()
+    batch = max(1, int(rate / 10))          # ~10 flushes per second
+    start = time.monotonic()
+    written = 0
+    while count is None or written < count:
+        n = batch if count is None else min(batch, count - written)
+        for chunk in iter_uart_bytes(n, first + written, banner=False):
+            f.write(chunk)
+        f.flush()
+        written += n
+        delay = start + written / rate - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+    return written
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    args = sys.argv[1:]
+    count = DEFAULT_LINES
+    output = DEFAULT_OUTPUT
+    first = 0
+    rate = None
+    banner = '--no-banner' not in args
+    append = '--append' in args
+
+    for flag in ('--output', '--first', '--rate'):
+        if flag in args:
+            i = args.index(flag)
+            value = args[i + 1]
+            del args[i:i + 2]
+            if flag == '--output':
+                output = value
+            elif flag == '--first':
+                first = int(value)
+            else:
+                rate = float(value)
+    args = [a for a in args if not a.startswith('--')]
+    if args:
+        count = int(args[0])
+
+    to_stdout = output == '-'
+    log = sys.stderr if to_stdout else sys.stdout
+    if not to_stdout:
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+
+    if rate:
+        print(f"Emulating main_simple.c at {rate:g} lines/s -> {output} (Ctrl+C to stop)", file=log)
+        f = sys.stdout.buffer if to_stdout else open(output, 'ab' if append else 'wb')
+        try:
+            written = stream_uart_output(f, rate, count or None, first, banner)
+        except KeyboardInterrupt:
+            written = None
+        finally:
+            if not to_stdout:
+                f.close()
+        if written is not None:
+            print(f"✓ {written} lines written", file=log)
+        return 0
+
+    start = time.perf_counter()
+    if to_stdout:
+        size = write_uart_output(sys.stdout.buffer, count, first, banner)
+    else:
+        size = write_uart_output(output, count, first, banner, append)
+    elapsed = time.perf_counter() - start
+    print(f"✓ {count} lines ({size / 1e6:.1f} MB) -> {output} in {elapsed:.2f}s "
+          f"({count / max(elapsed, 1e-9) / 1e6:.1f} M lines/s)", file=log)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+STM32 Fan Control - Streaming UART Log Parser
+Parses Renode UART captures ("Temp: XX C | ADC: XXXX | PWM: XXXX | Fan: XX%")
+in large binary chunks with a compiled bytes regex
+
+Samples are yielded as batches of typed NumPy arrays (temp int16, adc/pwm
+uint16) instead of per-line dicts, so multi-gigabyte logs parse at close to
+disk speed with memory bounded by the chunk and batch sizes.
+
+Usage:
+    python uart_stream.py ../reports/uart_output.txt
+"""
+
+import os
+import re
+import sys
+import time
+from itertools import chain
+
+import numpy as np
+
+# Same fields as analyze_results' line regex; [ \t] keeps a match on one line
+UART_LINE_RE = re.compile(rb'Temp:[ \t]*(\d+)[ \t]*C[ \t]*\|[ \t]*ADC:[ \t]*(\d+)[ \t]*\|[ \t]*PWM:[ \t]*(\d+)')
+
+TEMP_DTYPE = np.int16
+ADC_DTYPE = np.uint16
+PWM_DTYPE = np.uint16
+
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024     # bytes read per chunk
+DEFAULT_BATCH_SIZE = 1024 * 1024          # samples per yielded batch
+
+def parse_chunk(data):
+    """Parse complete lines in a bytes-like chunk -> (temps, adcs, pwms) arrays"""
+    matches = UART_LINE_RE.findall(data)
+    if not matches:
+        return (np.empty(0, TEMP_DTYPE), np.empty(0, ADC_DTYPE), np.empty(0, PWM_DTYPE))
+
+    # One join + one C-level text parse instead of int() per field
+    fields = np.fromstring(b' '.join(chain.from_iterable(matches)), dtype=np.int64, sep=' ').reshape(-1, 3)
+    return (fields[:, 0].astype(TEMP_DTYPE),
+            fields[:, 1].astype(ADC_DTYPE),
+            fields[:, 2].astype(PWM_DTYPE))
+
+def iter_chunks(f, chunk_size=DEFAULT_CHUNK_SIZE, end=None):
+    """
+    Read a binary file in chunks that always end on a line boundary.
+
+    With end set, stop after the last line that starts before byte offset end.
+    """
+    carry = b''
+    while True:
+        if end is not None and f.tell() >= end:
+            if carry:
+                yield carry + f.readline()   # Finish the line that crosses end
+            return
+        size = chunk_size if end is None else min(chunk_size, end - f.tell())
+        block = f.read(size)
+        if not block:
+            if carry:
+                yield carry
+            return
+        block = carry + block
+        cut = block.rfind(b'\n') + 1
+        if cut == 0:
+            carry = block   # No newline yet; keep accumulating
+            continue
+        carry = block[cut:]
+        yield block[:cut]
+
+def iter_uart_batches(filename, batch_size=DEFAULT_BATCH_SIZE, chunk_size=DEFAULT_CHUNK_SIZE,
+                      start=0, end=None):
+    """
+    Yield (temps, adcs, pwms) batches of up to batch_size samples.
+
+    Each batch is a freshly preallocated set of arrays, so consumers can keep
+    references without copying. start/end restrict parsing to the lines that
+    begin inside that byte range, so a file can be split across workers.
+    """
+    temps = np.empty(batch_size, TEMP_DTYPE)
+    adcs = np.empty(batch_size, ADC_DTYPE)
+    pwms = np.empty(batch_size, PWM_DTYPE)
+    filled = 0
+
+    with open(filename, 'rb') as f:
+        if start > 0:
+            f.seek(start - 1)
+            f.readline()    # Skip the line owned by the previous range
+        for chunk in iter_chunks(f, chunk_size, end):
+            chunk_temps, chunk_adcs, chunk_pwms = parse_chunk(chunk)
+            pos = 0
+            while pos < len(chunk_temps):
+                take = min(batch_size - filled, len(chunk_temps) - pos)
+                temps[filled:filled + take] = chunk_temps[pos:pos + take]
+                adcs[filled:filled + take] = chunk_adcs[pos:pos + take]
+                pwms[filled:filled + take] = chunk_pwms[pos:pos + take]
+                filled += take
+                pos += take
+
+                if filled == batch_size:
+                    yield temps, adcs, pwms
+                    temps = np.empty(batch_size, TEMP_DTYPE)
+                    adcs = np.empty(batch_size, ADC_DTYPE)
+                    pwms = np.empty(batch_size, PWM_DTYPE)
+                    filled = 0
+
+    if filled:
+        yield temps[:filled], adcs[:filled], pwms[:filled]
+
+class UartTail:
+    """
+    Incremental reader for a capture that is still being written.
+
+    poll() parses only the bytes appended since the previous call; a trailing
+    partial line is held back until its newline arrives. If the file shrinks
+    (the capture was restarted) reading starts again from the beginning.
+    """
+
+    def __init__(self, filename, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.filename = filename
+        self.chunk_size = chunk_size
+        self.offset = 0
+        self.carry = b''
+        self.restarted = False
+
+    def poll(self):
+        """(temps, adcs, pwms) for the complete lines appended since last poll"""
+        self.restarted = False
+        try:
+            size = os.path.getsize(self.filename)
+        except FileNotFoundError:
+            size = 0
+        if size < self.offset:
+            self.offset = 0
+            self.carry = b''
+            self.restarted = True
+        if size == self.offset:
+            return parse_chunk(b'')
+
+        with open(self.filename, 'rb') as f:
+            f.seek(self.offset)
+            data = self.carry + f.read(min(size - self.offset, self.chunk_size))
+            self.offset = f.tell()
+
+        cut = data.rfind(b'\n') + 1
+        self.carry = data[cut:]
+        return parse_chunk(data[:cut])
+
+def read_uart_arrays(filename, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Parse a whole capture into three concatenated typed arrays"""
+    batches = list(iter_uart_batches(filename, chunk_size=chunk_size))
+    if not batches:
+        return (np.empty(0, TEMP_DTYPE), np.empty(0, ADC_DTYPE), np.empty(0, PWM_DTYPE))
+    return tuple(np.concatenate(column) for column in zip(*batches))
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    filename = sys.argv[1] if len(sys.argv) > 1 else "../reports/uart_output.txt"
+
+    start = time.perf_counter()
+    samples = 0
+    try:
+        for temps, _, _ in iter_uart_batches(filename):
+            samples += len(temps)
+    except FileNotFoundError:
+        print(f"Error: {filename} not found. Run the simulation first.")
+        return 1
+    elapsed = time.perf_counter() - start
+
+    print(f"✓ Parsed {samples} samples in {elapsed:.3f}s "
+          f"({samples / max(elapsed, 1e-9) / 1e6:.2f} M samples/s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
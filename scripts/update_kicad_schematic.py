@@ -10,29 +10,33 @@ Update KiCad schematic with electrical improvements:
 - Add 0.1µF and 10µF decoupling caps for STM32
 - Verify flyback diode cathode to +5V_MOTOR
 - Add UART header (RX/TX/GND)
+
+Usage:
+    python update_kicad_schematic.py                    # Regenerate the whole file
+    python update_kicad_schematic.py --patch [--prune] [--dry-run]
+        # Edit the existing file in place: uuids, annotation and anything not
+        # in this design are kept (--prune removes it), see kicad_patch.py
 """
 
 import os
+import sys
 
-def generate_improved_schematic():
-    schematic_content = """(kicad_sch (version 20230121) (generator eeschema)
-
-  (uuid 9a8d4c80-fac4-4cbb-90c3-17fbb4451be3)
+from kicad_model import (Junction, PowerFlag, Property, Schematic, Symbol, Text, Wire,
+                         lib_symbols_from_text, pins)
 
-  (paper "A4")
+# Fixed uuids keep the file stable across regenerations
+SCHEMATIC_UUID = "9a8d4c80-fac4-4cbb-90c3-17fbb4451be3"
 
-  (title_block
-    (title "STM32F103C8 Fan Control System")
-    (date "2025-11-07")
-    (rev "2.0")
-    (company "Real-Time Systems Project")
-    (comment 1 "Temperature-controlled DC fan using PWM")
-    (comment 2 "LM35 sensor - Proper power connections")
-    (comment 3 "UART debug output on PA9/PA10")
-    (comment 4 "Decoupling capacitors and proper reset circuit")
-  )
+TITLE = "STM32F103C8 Fan Control System"
+COMMENTS = [
+    "Temperature-controlled DC fan using PWM",
+    "LM35 sensor - Proper power connections",
+    "UART debug output on PA9/PA10",
+    "Decoupling capacitors and proper reset circuit",
+]
 
-  (lib_symbols
+# Cached library symbols, as KiCad stores them in the schematic
+LIB_SYMBOLS = """
     (symbol "MCU_ST_STM32F1:STM32F103C8Tx" (in_bom yes) (on_board yes)
       (property "Reference" "U1" (at 0 2.54 0)
         (effects (font (size 1.27 1.27)))
@@ -502,513 +506,190 @@ def generate_improved_schematic():
         )
       )
     )
-  )
-
-  (junction (at 50.8 40.64) (diameter 0) (color 0 0 0 0)
-    (uuid 9e01234a-5678-9012-3456-789012345678)
-  )
-  (junction (at 88.9 30.48) (diameter 0) (color 0 0 0 0)
-    (uuid 8e01234a-5678-9012-3456-789012345678)
-  )
-  (junction (at 88.9 116.84) (diameter 0) (color 0 0 0 0)
-    (uuid 7e01234a-5678-9012-3456-789012345678)
-  )
-  (junction (at 127 76.2) (diameter 0) (color 0 0 0 0)
-    (uuid bfc0d01d-8787-45a7-baa1-ec4a97eed377)
-  )
-  (junction (at 165.1 55.88) (diameter 0) (color 0 0 0 0)
-    (uuid e86708b7-3ab6-4e54-bb21-edaf4bc11401)
-  )
-  (junction (at 210.82 71.12) (diameter 0) (color 0 0 0 0)
-    (uuid 1e01234a-5678-9012-3456-789012345678)
-  )
-  (junction (at 165.1 116.84) (diameter 0) (color 0 0 0 0)
-    (uuid 2e01234a-5678-9012-3456-789012345678)
-  )
-
-  (wire (pts (xy 50.8 40.64) (xy 50.8 77.47))
-    (stroke (width 0) (type default))
-    (uuid wire-lm35-vcc-1)
-  )
-  
-  (wire (pts (xy 58.42 81.28) (xy 62.23 81.28))
-    (stroke (width 0) (type default))
-    (uuid wire-lm35-out-1)
-  )
-  (wire (pts (xy 62.23 81.28) (xy 62.23 83.82))
-    (stroke (width 0) (type default))
-    (uuid wire-lm35-out-2)
-  )
-  (wire (pts (xy 62.23 83.82) (xy 71.12 83.82))
-    (stroke (width 0) (type default))
-    (uuid wire-lm35-out-3)
-  )
-  
-  ; LM35 pin 3 (GND) to GND
-  (wire (pts (xy 50.8 91.44) (xy 50.8 116.84))
-    (stroke (width 0) (type default))
-    (uuid wire-lm35-gnd-1)
-  )
-  (wire (pts (xy 50.8 116.84) (xy 88.9 116.84))
-    (stroke (width 0) (type default))
-    (uuid wire-lm35-gnd-2)
-  )
-  
-  ; STM32 VDD to +3.3V
-  (wire (pts (xy 86.36 30.48) (xy 88.9 30.48))
-    (stroke (width 0) (type default))
-    (uuid wire-stm32-vdd-1)
-  )
-  (wire (pts (xy 88.9 30.48) (xy 91.44 30.48))
-    (stroke (width 0) (type default))
-    (uuid wire-stm32-vdd-2)
-  )
-  
-  ; STM32 VSS to GND
-  (wire (pts (xy 86.36 116.84) (xy 88.9 116.84))
-    (stroke (width 0) (type default))
-    (uuid wire-stm32-vss-1)
-  )
-  (wire (pts (xy 88.9 116.84) (xy 165.1 116.84))
-    (stroke (width 0) (type default))
-    (uuid wire-stm32-vss-2)
-  )
-  
-  ; NRST pull-up to +3.3V
-  (wire (pts (xy 106.68 58.42) (xy 111.76 58.42))
-    (stroke (width 0) (type default))
-    (uuid wire-nrst-1)
-  )
-  (wire (pts (xy 111.76 58.42) (xy 111.76 48.26))
-    (stroke (width 0) (type default))
-    (uuid wire-nrst-2)
-  )
-  (wire (pts (xy 111.76 48.26) (xy 119.38 48.26))
-    (stroke (width 0) (type default))
-    (uuid wire-nrst-3)
-  )
-  (wire (pts (xy 119.38 48.26) (xy 119.38 40.64))
-    (stroke (width 0) (type default))
-    (uuid wire-nrst-4)
-  )
-  
-  ; BOOT0 to GND
-  (wire (pts (xy 106.68 88.9) (xy 111.76 88.9))
-    (stroke (width 0) (type default))
-    (uuid wire-boot0-1)
-  )
-  (wire (pts (xy 111.76 88.9) (xy 111.76 116.84))
-    (stroke (width 0) (type default))
-    (uuid wire-boot0-2)
-  )
-  
-  ; PA0 (ADC) from LM35
-  ; (already connected above)
-  
-  ; PA6 (PWM) to base resistor
-  (wire (pts (xy 104.14 76.2) (xy 111.76 76.2))
-    (stroke (width 0) (type default))
-    (uuid wire-pa6-1)
-  )
-  (wire (pts (xy 111.76 76.2) (xy 119.38 76.2))
-    (stroke (width 0) (type default))
-    (uuid wire-pa6-2)
-  )
-  
-  ; Base resistor to transistor
-  (wire (pts (xy 127 76.2) (xy 134.62 76.2))
-    (stroke (width 0) (type default))
-    (uuid wire-base-1)
-  )
-  (wire (pts (xy 134.62 76.2) (xy 134.62 83.82))
-    (stroke (width 0) (type default))
-    (uuid wire-base-2)
-  )
-  
-  ; Transistor collector to motor
-  (wire (pts (xy 139.7 83.82) (xy 139.7 71.12))
-    (stroke (width 0) (type default))
-    (uuid wire-collector-1)
-  )
-  (wire (pts (xy 139.7 71.12) (xy 165.1 71.12))
-    (stroke (width 0) (type default))
-    (uuid wire-collector-2)
-  )
-  
-  ; Motor positive to +5V_MOTOR
-  (wire (pts (xy 165.1 63.5) (xy 165.1 55.88))
-    (stroke (width 0) (type default))
-    (uuid wire-motor-pos-1)
-  )
-  (wire (pts (xy 165.1 55.88) (xy 210.82 55.88))
-    (stroke (width 0) (type default))
-    (uuid wire-motor-pos-2)
-  )
-  
-  ; Flyback diode cathode to +5V_MOTOR
-  (wire (pts (xy 165.1 55.88) (xy 165.1 76.2))
-    (stroke (width 0) (type default))
-    (uuid wire-diode-cathode-1)
-  )
-  
-  ; Flyback diode anode to motor negative
-  (wire (pts (xy 165.1 85.09) (xy 165.1 78.74))
-    (stroke (width 0) (type default))
-    (uuid wire-diode-anode-1)
-  )
-  (wire (pts (xy 165.1 85.09) (xy 165.1 88.9))
-    (stroke (width 0) (type default))
-    (uuid wire-diode-anode-2)
-  )
-  
-  ; Motor negative to transistor emitter
-  (wire (pts (xy 139.7 91.44) (xy 139.7 116.84))
-    (stroke (width 0) (type default))
-    (uuid wire-emitter-1)
-  )
-  (wire (pts (xy 139.7 116.84) (xy 165.1 116.84))
-    (stroke (width 0) (type default))
-    (uuid wire-emitter-2)
-  )
-  (wire (pts (xy 165.1 88.9) (xy 165.1 116.84))
-    (stroke (width 0) (type default))
-    (uuid wire-motor-neg-1)
-  )
-  
-  ; +5V_MOTOR decoupling cap to GND
-  (wire (pts (xy 210.82 63.5) (xy 210.82 71.12))
-    (stroke (width 0) (type default))
-    (uuid wire-motor-cap-1)
-  )
-  (wire (pts (xy 210.82 78.74) (xy 210.82 116.84))
-    (stroke (width 0) (type default))
-    (uuid wire-motor-cap-2)
-  )
-  
-  ; STM32 decoupling caps
-  (wire (pts (xy 99.06 30.48) (xy 99.06 38.1))
-    (stroke (width 0) (type default))
-    (uuid wire-dec-cap1-1)
-  )
-  (wire (pts (xy 99.06 45.72) (xy 99.06 116.84))
-    (stroke (width 0) (type default))
-    (uuid wire-dec-cap1-2)
-  )
-  (wire (pts (xy 106.68 30.48) (xy 106.68 38.1))
-    (stroke (width 0) (type default))
-    (uuid wire-dec-cap2-1)
-  )
-  (wire (pts (xy 106.68 45.72) (xy 106.68 116.84))
-    (stroke (width 0) (type default))
-    (uuid wire-dec-cap2-2)
-  )
-  
-  ; +3.3V rail
-  (wire (pts (xy 50.8 40.64) (xy 88.9 40.64))
-    (stroke (width 0) (type default))
-    (uuid wire-3v3-rail-1)
-  )
-  (wire (pts (xy 88.9 30.48) (xy 88.9 40.64))
-    (stroke (width 0) (type default))
-    (uuid wire-3v3-rail-2)
-  )
-  (wire (pts (xy 88.9 40.64) (xy 99.06 40.64))
-    (stroke (width 0) (type default))
-    (uuid wire-3v3-rail-3)
-  )
-  (wire (pts (xy 99.06 40.64) (xy 99.06 30.48))
-    (stroke (width 0) (type default))
-    (uuid wire-3v3-rail-4)
-  )
-  (wire (pts (xy 99.06 40.64) (xy 106.68 40.64))
-    (stroke (width 0) (type default))
-    (uuid wire-3v3-rail-5)
-  )
-  (wire (pts (xy 106.68 40.64) (xy 106.68 30.48))
-    (stroke (width 0) (type default))
-    (uuid wire-3v3-rail-6)
-  )
-  (wire (pts (xy 106.68 40.64) (xy 119.38 40.64))
-    (stroke (width 0) (type default))
-    (uuid wire-3v3-rail-7)
-  )
-  
-  ; UART header connections
-  (wire (pts (xy 104.14 68.58) (xy 185.42 68.58))
-    (stroke (width 0) (type default))
-    (uuid wire-uart-tx)
-  )
-  (wire (pts (xy 104.14 71.12) (xy 185.42 71.12))
-    (stroke (width 0) (type default))
-    (uuid wire-uart-rx)
-  )
-  (wire (pts (xy 165.1 116.84) (xy 185.42 116.84))
-    (stroke (width 0) (type default))
-    (uuid wire-uart-gnd-1)
-  )
-  (wire (pts (xy 185.42 73.66) (xy 185.42 116.84))
-    (stroke (width 0) (type default))
-    (uuid wire-uart-gnd-2)
-  )
-  
-  ; +5V_MOTOR to motor supply
-  (wire (pts (xy 210.82 55.88) (xy 210.82 63.5))
-    (stroke (width 0) (type default))
-    (uuid wire-5v-motor-supply)
-  )
-
-  (text "Temperature Sensor\\n(Software Simulated)" (at 25.4 68.58 0)
-    (effects (font (size 1.27 1.27)) (justify left bottom))
-    (uuid text-lm35)
-  )
-  (text "STM32 Controller\\n72MHz ARM Cortex-M3" (at 71.12 20.32 0)
-    (effects (font (size 1.27 1.27)) (justify left bottom))
-    (uuid text-stm32)
-  )
-  (text "Fan Driver Circuit\\nPWM @ 8kHz" (at 142.24 45.72 0)
-    (effects (font (size 1.27 1.27)) (justify left bottom))
-    (uuid text-driver)
-  )
-  (text "Power Supplies:\\n+3.3V: STM32 & LM35\\n+5V_MOTOR: Fan supply" 
-    (at 200.66 30.48 0)
-    (effects (font (size 1.016 1.016)) (justify left bottom))
-    (uuid text-power)
-  )
-  (text "PA0: ADC Input (Temperature)\\nPA6: PWM Output (TIM3_CH1)\\nPA9/PA10: UART Debug @ 115200" 
-    (at 45.72 127 0)
-    (effects (font (size 1.016 1.016)) (justify left bottom))
-    (uuid text-pins)
-  )
-
-  ; Component instances
-  (symbol (lib_id "Sensor_Temperature:LM35") (at 50.8 81.28 0) (mirror y) (unit 1)
-    (in_bom yes) (on_board yes) (dnp no)
-    (uuid lm35-instance)
-    (property "Reference" "U2" (at 44.45 73.66 0)
-      (effects (font (size 1.27 1.27)) (justify left))
-    )
-    (property "Value" "LM35" (at 44.45 76.2 0)
-      (effects (font (size 1.27 1.27)) (justify left))
-    )
-    (property "Footprint" "Package_TO_SOT_THT:TO-92_Inline" (at 50.8 83.82 0)
-      (effects (font (size 1.27 1.27)) hide)
-    )
-    (pin "1" (uuid lm35-pin1))
-    (pin "2" (uuid lm35-pin2))
-    (pin "3" (uuid lm35-pin3))
-  )
-
-  (symbol (lib_id "MCU_ST_STM32F1:STM32F103C8Tx") (at 88.9 73.66 0) (unit 1)
-    (in_bom yes) (on_board yes) (dnp no)
-    (uuid stm32-instance)
-    (property "Reference" "U1" (at 88.9 20.32 0)
-      (effects (font (size 1.27 1.27)))
-    )
-    (property "Value" "STM32F103C8T6" (at 88.9 22.86 0)
-      (effects (font (size 1.27 1.27)))
-    )
-    (property "Footprint" "Package_QFP:LQFP-48_7x7mm_P0.5mm" (at 88.9 116.84 0)
-      (effects (font (size 1.27 1.27)) hide)
-    )
-    (pin "1" (uuid stm32-pin1))
-    (pin "2" (uuid stm32-pin2))
-    (pin "7" (uuid stm32-pin7))
-    (pin "10" (uuid stm32-pin10))
-    (pin "16" (uuid stm32-pin16))
-    (pin "30" (uuid stm32-pin30))
-    (pin "31" (uuid stm32-pin31))
-    (pin "44" (uuid stm32-pin44))
-  )
-
-  (symbol (lib_id "Device:R") (at 123.19 76.2 90) (unit 1)
-    (in_bom yes) (on_board yes) (dnp no)
-    (uuid r1-base)
-    (property "Reference" "R1" (at 123.19 71.12 90)
-      (effects (font (size 1.27 1.27)))
-    )
-    (property "Value" "1k" (at 123.19 73.66 90)
-      (effects (font (size 1.27 1.27)))
-    )
-    (property "Footprint" "Resistor_THT:R_Axial_DIN0207_L6.3mm_D2.5mm_P10.16mm_Horizontal" (at 123.19 77.978 0)
-      (effects (font (size 1.27 1.27)) hide)
-    )
-    (pin "1" (uuid r1-pin1))
-    (pin "2" (uuid r1-pin2))
-  )
-
-  (symbol (lib_id "Device:R") (at 119.38 44.45 0) (unit 1)
-    (in_bom yes) (on_board yes) (dnp no)
-    (uuid r2-nrst)
-    (property "Reference" "R2" (at 121.92 43.18 0)
-      (effects (font (size 1.27 1.27)) (justify left))
-    )
-    (property "Value" "10k" (at 121.92 45.72 0)
-      (effects (font (size 1.27 1.27)) (justify left))
-    )
-    (property "Footprint" "Resistor_THT:R_Axial_DIN0207_L6.3mm_D2.5mm_P10.16mm_Horizontal" (at 117.602 44.45 90)
-      (effects (font (size 1.27 1.27)) hide)
-    )
-    (pin "1" (uuid r2-pin1))
-    (pin "2" (uuid r2-pin2))
-  )
-
-  (symbol (lib_id "Transistor_BJT:2N2222") (at 137.16 83.82 0) (unit 1)
-    (in_bom yes) (on_board yes) (dnp no)
-    (uuid q1-driver)
-    (property "Reference" "Q1" (at 142.24 80.01 0)
-      (effects (font (size 1.27 1.27)) (justify left))
-    )
-    (property "Value" "2N2222" (at 142.24 82.55 0)
-      (effects (font (size 1.27 1.27)) (justify left))
-    )
-    (property "Footprint" "Package_TO_SOT_THT:TO-92_Inline" (at 142.24 85.725 0)
-      (effects (font (size 1.27 1.27) italic) (justify left) hide)
-    )
-    (pin "1" (uuid q1-pin1))
-    (pin "2" (uuid q1-pin2))
-    (pin "3" (uuid q1-pin3))
-  )
-
-  (symbol (lib_id "Diode:1N4007") (at 165.1 81.28 270) (unit 1)
-    (in_bom yes) (on_board yes) (dnp no)
-    (uuid d1-flyback)
-    (property "Reference" "D1" (at 167.64 80.01 90)
-      (effects (font (size 1.27 1.27)) (justify left))
-    )
-    (property "Value" "1N4007" (at 167.64 82.55 90)
-      (effects (font (size 1.27 1.27)) (justify left))
-    )
-    (property "Footprint" "Diode_THT:D_DO-41_SOD81_P10.16mm_Horizontal" (at 160.655 81.28 0)
-      (effects (font (size 1.27 1.27)) hide)
-    )
-    (pin "1" (uuid d1-pin1))
-    (pin "2" (uuid d1-pin2))
-  )
-
-  (symbol (lib_id "Motor:Motor_DC") (at 165.1 71.12 0) (unit 1)
-    (in_bom yes) (on_board yes) (dnp no)
-    (uuid m1-fan)
-    (property "Reference" "M1" (at 170.18 67.31 0)
-      (effects (font (size 1.27 1.27)) (justify left))
-    )
-    (property "Value" "DC_Fan" (at 170.18 69.85 0)
-      (effects (font (size 1.27 1.27)) (justify left))
-    )
-    (property "Footprint" "" (at 165.1 73.406 0)
-      (effects (font (size 1.27 1.27)) hide)
-    )
-    (pin "1" (uuid m1-pin1))
-    (pin "2" (uuid m1-pin2))
-  )
+"""
 
-  (symbol (lib_id "Device:C") (at 99.06 41.91 0) (unit 1)
-    (in_bom yes) (on_board yes) (dnp no)
-    (uuid c1-dec)
-    (property "Reference" "C1" (at 100.33 39.37 0)
-      (effects (font (size 1.27 1.27)) (justify left))
-    )
-    (property "Value" "0.1µF" (at 100.33 44.45 0)
-      (effects (font (size 1.27 1.27)) (justify left))
-    )
-    (property "Footprint" "Capacitor_THT:C_Disc_D5.0mm_W2.5mm_P5.00mm" (at 99.9948 45.72 0)
-      (effects (font (size 1.27 1.27)) hide)
-    )
-    (pin "1" (uuid c1-pin1))
-    (pin "2" (uuid c1-pin2))
-  )
+JUNCTIONS = [
+    ((50.8, 40.64), "9e01234a-5678-9012-3456-789012345678"),
+    ((88.9, 30.48), "8e01234a-5678-9012-3456-789012345678"),
+    ((88.9, 116.84), "7e01234a-5678-9012-3456-789012345678"),
+    ((127, 76.2), "bfc0d01d-8787-45a7-baa1-ec4a97eed377"),
+    ((165.1, 55.88), "e86708b7-3ab6-4e54-bb21-edaf4bc11401"),
+    ((210.82, 71.12), "1e01234a-5678-9012-3456-789012345678"),
+    ((165.1, 116.84), "2e01234a-5678-9012-3456-789012345678"),
+]
 
-  (symbol (lib_id "Device:C") (at 106.68 41.91 0) (unit 1)
-    (in_bom yes) (on_board yes) (dnp no)
-    (uuid c2-dec)
-    (property "Reference" "C2" (at 107.95 39.37 0)
-      (effects (font (size 1.27 1.27)) (justify left))
-    )
-    (property "Value" "10µF" (at 107.95 44.45 0)
-      (effects (font (size 1.27 1.27)) (justify left))
-    )
-    (property "Footprint" "Capacitor_THT:CP_Radial_D5.0mm_P2.50mm" (at 107.6148 45.72 0)
-      (effects (font (size 1.27 1.27)) hide)
-    )
-    (pin "1" (uuid c2-pin1))
-    (pin "2" (uuid c2-pin2))
-  )
+WIRES = [
+    ((50.8, 40.64), (50.8, 77.47), "wire-lm35-vcc-1"),
+    ((58.42, 81.28), (62.23, 81.28), "wire-lm35-out-1"),
+    ((62.23, 81.28), (62.23, 83.82), "wire-lm35-out-2"),
+    ((62.23, 83.82), (71.12, 83.82), "wire-lm35-out-3"),
+    # LM35 pin 3 (GND) to GND
+    ((50.8, 91.44), (50.8, 116.84), "wire-lm35-gnd-1"),
+    ((50.8, 116.84), (88.9, 116.84), "wire-lm35-gnd-2"),
+    # STM32 VDD to +3.3V
+    ((86.36, 30.48), (88.9, 30.48), "wire-stm32-vdd-1"),
+    ((88.9, 30.48), (91.44, 30.48), "wire-stm32-vdd-2"),
+    # STM32 VSS to GND
+    ((86.36, 116.84), (88.9, 116.84), "wire-stm32-vss-1"),
+    ((88.9, 116.84), (165.1, 116.84), "wire-stm32-vss-2"),
+    # NRST pull-up to +3.3V
+    ((106.68, 58.42), (111.76, 58.42), "wire-nrst-1"),
+    ((111.76, 58.42), (111.76, 48.26), "wire-nrst-2"),
+    ((111.76, 48.26), (119.38, 48.26), "wire-nrst-3"),
+    ((119.38, 48.26), (119.38, 40.64), "wire-nrst-4"),
+    # BOOT0 to GND
+    ((106.68, 88.9), (111.76, 88.9), "wire-boot0-1"),
+    ((111.76, 88.9), (111.76, 116.84), "wire-boot0-2"),
+    # PA0 (ADC) from LM35
+    # (already connected above)
+    # PA6 (PWM) to base resistor
+    ((104.14, 76.2), (111.76, 76.2), "wire-pa6-1"),
+    ((111.76, 76.2), (119.38, 76.2), "wire-pa6-2"),
+    # Base resistor to transistor
+    ((127, 76.2), (134.62, 76.2), "wire-base-1"),
+    ((134.62, 76.2), (134.62, 83.82), "wire-base-2"),
+    # Transistor collector to motor
+    ((139.7, 83.82), (139.7, 71.12), "wire-collector-1"),
+    ((139.7, 71.12), (165.1, 71.12), "wire-collector-2"),
+    # Motor positive to +5V_MOTOR
+    ((165.1, 63.5), (165.1, 55.88), "wire-motor-pos-1"),
+    ((165.1, 55.88), (210.82, 55.88), "wire-motor-pos-2"),
+    # Flyback diode cathode to +5V_MOTOR
+    ((165.1, 55.88), (165.1, 76.2), "wire-diode-cathode-1"),
+    # Flyback diode anode to motor negative
+    ((165.1, 85.09), (165.1, 78.74), "wire-diode-anode-1"),
+    ((165.1, 85.09), (165.1, 88.9), "wire-diode-anode-2"),
+    # Motor negative to transistor emitter
+    ((139.7, 91.44), (139.7, 116.84), "wire-emitter-1"),
+    ((139.7, 116.84), (165.1, 116.84), "wire-emitter-2"),
+    ((165.1, 88.9), (165.1, 116.84), "wire-motor-neg-1"),
+    # +5V_MOTOR decoupling cap to GND
+    ((210.82, 63.5), (210.82, 71.12), "wire-motor-cap-1"),
+    ((210.82, 78.74), (210.82, 116.84), "wire-motor-cap-2"),
+    # STM32 decoupling caps
+    ((99.06, 30.48), (99.06, 38.1), "wire-dec-cap1-1"),
+    ((99.06, 45.72), (99.06, 116.84), "wire-dec-cap1-2"),
+    ((106.68, 30.48), (106.68, 38.1), "wire-dec-cap2-1"),
+    ((106.68, 45.72), (106.68, 116.84), "wire-dec-cap2-2"),
+    # +3.3V rail
+    ((50.8, 40.64), (88.9, 40.64), "wire-3v3-rail-1"),
+    ((88.9, 30.48), (88.9, 40.64), "wire-3v3-rail-2"),
+    ((88.9, 40.64), (99.06, 40.64), "wire-3v3-rail-3"),
+    ((99.06, 40.64), (99.06, 30.48), "wire-3v3-rail-4"),
+    ((99.06, 40.64), (106.68, 40.64), "wire-3v3-rail-5"),
+    ((106.68, 40.64), (106.68, 30.48), "wire-3v3-rail-6"),
+    ((106.68, 40.64), (119.38, 40.64), "wire-3v3-rail-7"),
+    # UART header connections
+    ((104.14, 68.58), (185.42, 68.58), "wire-uart-tx"),
+    ((104.14, 71.12), (185.42, 71.12), "wire-uart-rx"),
+    ((165.1, 116.84), (185.42, 116.84), "wire-uart-gnd-1"),
+    ((185.42, 73.66), (185.42, 116.84), "wire-uart-gnd-2"),
+    # +5V_MOTOR to motor supply
+    ((210.82, 55.88), (210.82, 63.5), "wire-5v-motor-supply"),
+    # Component instances
+]
 
-  (symbol (lib_id "Device:C") (at 210.82 67.31 0) (unit 1)
-    (in_bom yes) (on_board yes) (dnp no)
-    (uuid c3-motor)
-    (property "Reference" "C3" (at 212.09 64.77 0)
-      (effects (font (size 1.27 1.27)) (justify left))
-    )
-    (property "Value" "100µF" (at 212.09 69.85 0)
-      (effects (font (size 1.27 1.27)) (justify left))
-    )
-    (property "Footprint" "Capacitor_THT:CP_Radial_D6.3mm_P2.50mm" (at 211.7548 71.12 0)
-      (effects (font (size 1.27 1.27)) hide)
-    )
-    (pin "1" (uuid c3-pin1))
-    (pin "2" (uuid c3-pin2))
-  )
+TEXTS = [
+    ("Temperature Sensor\n(Software Simulated)", (25.4, 68.58), 1.27, "text-lm35"),
+    ("STM32 Controller\n72MHz ARM Cortex-M3", (71.12, 20.32), 1.27, "text-stm32"),
+    ("Fan Driver Circuit\nPWM @ 8kHz", (142.24, 45.72), 1.27, "text-driver"),
+    ("Power Supplies:\n+3.3V: STM32 & LM35\n+5V_MOTOR: Fan supply", (200.66, 30.48), 1.016, "text-power"),
+    ("PA0: ADC Input (Temperature)\nPA6: PWM Output (TIM3_CH1)\nPA9/PA10: UART Debug @ 115200", (45.72, 127), 1.016, "text-pins"),
+]
 
-  (symbol (lib_id "Connector:Conn_01x03_Pin") (at 180.34 71.12 0) (mirror x) (unit 1)
-    (in_bom yes) (on_board yes) (dnp no)
-    (uuid j1-uart)
-    (property "Reference" "J1" (at 180.34 76.2 0)
-      (effects (font (size 1.27 1.27)))
-    )
-    (property "Value" "UART" (at 180.34 78.74 0)
-      (effects (font (size 1.27 1.27)))
-    )
-    (property "Footprint" "Connector_PinHeader_2.54mm:PinHeader_1x03_P2.54mm_Vertical" (at 180.34 71.12 0)
-      (effects (font (size 1.27 1.27)) hide)
-    )
-    (pin "1" (uuid j1-pin1))
-    (pin "2" (uuid j1-pin2))
-    (pin "3" (uuid j1-pin3))
-  )
+def build_schematic(title=TITLE, comments=COMMENTS, texts=TEXTS):
+    """The improved schematic as a kicad_model.Schematic"""
+    sch = Schematic(title, rev="2.0", date="2025-11-07", company="Real-Time Systems Project",
+                    comments=comments, uuid=SCHEMATIC_UUID)
+    sch.lib_symbols = lib_symbols_from_text(LIB_SYMBOLS)
 
-  (symbol (lib_id "power:+3.3V") (at 50.8 40.64 0) (unit 1)
-    (in_bom yes) (on_board yes) (dnp no)
-    (uuid pwr-3v3)
-    (property "Reference" "#PWR01" (at 50.8 44.45 0)
-      (effects (font (size 1.27 1.27)) hide)
-    )
-    (property "Value" "+3.3V" (at 50.8 36.83 0)
-      (effects (font (size 1.27 1.27)))
-    )
-    (pin "1" (uuid pwr-3v3-pin1))
-  )
+    sch.add(*(Junction(at, uuid) for at, uuid in JUNCTIONS))
+    sch.add(*(Wire(start, end, uuid) for start, end, uuid in WIRES))
+    sch.add(*(Text(text, at, size=size, uuid=uuid) for text, at, size, uuid in texts))
+    sch.add(
+        Symbol("Sensor_Temperature:LM35", (50.8, 81.28), mirror='y', uuid="lm35-instance", properties=[
+            Property("Reference", "U2", (44.45, 73.66), justify='left'),
+            Property("Value", "LM35", (44.45, 76.2), justify='left'),
+            Property("Footprint", "Package_TO_SOT_THT:TO-92_Inline", (50.8, 83.82), hide=True),
+        ], pins=pins(1, 2, 3, prefix="lm35")),
+        Symbol("MCU_ST_STM32F1:STM32F103C8Tx", (88.9, 73.66), uuid="stm32-instance", properties=[
+            Property("Reference", "U1", (88.9, 20.32)),
+            Property("Value", "STM32F103C8T6", (88.9, 22.86)),
+            Property("Footprint", "Package_QFP:LQFP-48_7x7mm_P0.5mm", (88.9, 116.84), hide=True),
+        ], pins=pins(1, 2, 7, 10, 16, 30, 31, 44, prefix="stm32")),
+        Symbol("Device:R", (123.19, 76.2), angle=90, uuid="r1-base", properties=[
+            Property("Reference", "R1", (123.19, 71.12), angle=90),
+            Property("Value", "1k", (123.19, 73.66), angle=90),
+            Property("Footprint", "Resistor_THT:R_Axial_DIN0207_L6.3mm_D2.5mm_P10.16mm_Horizontal", (123.19, 77.978), hide=True),
+        ], pins=pins(1, 2, prefix="r1")),
+        Symbol("Device:R", (119.38, 44.45), uuid="r2-nrst", properties=[
+            Property("Reference", "R2", (121.92, 43.18), justify='left'),
+            Property("Value", "10k", (121.92, 45.72), justify='left'),
+            Property("Footprint", "Resistor_THT:R_Axial_DIN0207_L6.3mm_D2.5mm_P10.16mm_Horizontal", (117.602, 44.45), angle=90, hide=True),
+        ], pins=pins(1, 2, prefix="r2")),
+        Symbol("Transistor_BJT:2N2222", (137.16, 83.82), uuid="q1-driver", properties=[
+            Property("Reference", "Q1", (142.24, 80.01), justify='left'),
+            Property("Value", "2N2222", (142.24, 82.55), justify='left'),
+            Property("Footprint", "Package_TO_SOT_THT:TO-92_Inline", (142.24, 85.725), justify='left', italic=True, hide=True),
+        ], pins=pins(1, 2, 3, prefix="q1")),
+        Symbol("Diode:1N4007", (165.1, 81.28), angle=270, uuid="d1-flyback", properties=[
+            Property("Reference", "D1", (167.64, 80.01), angle=90, justify='left'),
+            Property("Value", "1N4007", (167.64, 82.55), angle=90, justify='left'),
+            Property("Footprint", "Diode_THT:D_DO-41_SOD81_P10.16mm_Horizontal", (160.655, 81.28), hide=True),
+        ], pins=pins(1, 2, prefix="d1")),
+        Symbol("Motor:Motor_DC", (165.1, 71.12), uuid="m1-fan", properties=[
+            Property("Reference", "M1", (170.18, 67.31), justify='left'),
+            Property("Value", "DC_Fan", (170.18, 69.85), justify='left'),
+            Property("Footprint", "", (165.1, 73.406), hide=True),
+        ], pins=pins(1, 2, prefix="m1")),
+        Symbol("Device:C", (99.06, 41.91), uuid="c1-dec", properties=[
+            Property("Reference", "C1", (100.33, 39.37), justify='left'),
+            Property("Value", "0.1µF", (100.33, 44.45), justify='left'),
+            Property("Footprint", "Capacitor_THT:C_Disc_D5.0mm_W2.5mm_P5.00mm", (99.9948, 45.72), hide=True),
+        ], pins=pins(1, 2, prefix="c1")),
+        Symbol("Device:C", (106.68, 41.91), uuid="c2-dec", properties=[
+            Property("Reference", "C2", (107.95, 39.37), justify='left'),
+            Property("Value", "10µF", (107.95, 44.45), justify='left'),
+            Property("Footprint", "Capacitor_THT:CP_Radial_D5.0mm_P2.50mm", (107.6148, 45.72), hide=True),
+        ], pins=pins(1, 2, prefix="c2")),
+        Symbol("Device:C", (210.82, 67.31), uuid="c3-motor", properties=[
+            Property("Reference", "C3", (212.09, 64.77), justify='left'),
+            Property("Value", "100µF", (212.09, 69.85), justify='left'),
+            Property("Footprint", "Capacitor_THT:CP_Radial_D6.3mm_P2.50mm", (211.7548, 71.12), hide=True),
+        ], pins=pins(1, 2, prefix="c3")),
+        Symbol("Connector:Conn_01x03_Pin", (180.34, 71.12), mirror='x', uuid="j1-uart", properties=[
+            Property("Reference", "J1", (180.34, 76.2)),
+            Property("Value", "UART", (180.34, 78.74)),
+            Property("Footprint", "Connector_PinHeader_2.54mm:PinHeader_1x03_P2.54mm_Vertical", (180.34, 71.12), hide=True),
+        ], pins=pins(1, 2, 3, prefix="j1")),
+        PowerFlag("+3.3V", (50.8, 40.64), "#PWR01", uuid="pwr-3v3", pin_uuid="pwr-3v3-pin1"),
+        PowerFlag("+5V_MOTOR", (210.82, 55.88), "#PWR02", uuid="pwr-5v-motor", pin_uuid="pwr-5v-motor-pin1"),
+        PowerFlag("GND", (88.9, 116.84), "#PWR03", uuid="pwr-gnd", pin_uuid="pwr-gnd-pin1"),
+    )
+    return sch
 
-  (symbol (lib_id "power:+5V_MOTOR") (at 210.82 55.88 0) (unit 1)
-    (in_bom yes) (on_board yes) (dnp no)
-    (uuid pwr-5v-motor)
-    (property "Reference" "#PWR02" (at 210.82 59.69 0)
-      (effects (font (size 1.27 1.27)) hide)
-    )
-    (property "Value" "+5V_MOTOR" (at 210.82 52.07 0)
-      (effects (font (size 1.27 1.27)))
-    )
-    (pin "1" (uuid pwr-5v-motor-pin1))
-  )
+def generate_improved_schematic():
+    """The improved schematic file contents"""
+    return build_schematic().to_string()
 
-  (symbol (lib_id "power:GND") (at 88.9 116.84 0) (unit 1)
-    (in_bom yes) (on_board yes) (dnp no)
-    (uuid pwr-gnd)
-    (property "Reference" "#PWR03" (at 88.9 123.19 0)
-      (effects (font (size 1.27 1.27)) hide)
-    )
-    (property "Value" "GND" (at 88.9 120.65 0)
-      (effects (font (size 1.27 1.27)))
-    )
-    (pin "1" (uuid pwr-gnd-pin1))
-  )
+def save_schematic(schematic, output_file, args):
+    """Write the schematic, or with --patch apply it to the existing file"""
+    if '--patch' not in args or not os.path.exists(output_file):
+        schematic.save(output_file)
+        print(f"✓ Updated schematic saved to: {output_file}")
+        return
 
-  (sheet_instances
-    (path "/" (page "1"))
-  )
-)
-"""
-    
-    return schematic_content
+    import kicad_patch
+    dry_run = '--dry-run' in args
+    edits = kicad_patch.patch_file(output_file, schematic, prune='--prune' in args, dry_run=dry_run)
+    for edit in edits:
+        print(f"  - {edit.description}")
+    if not edits:
+        print(f"✓ {output_file} is already up to date")
+    elif dry_run:
+        print(f"⚠ Dry run: {len(edits)} edit(s) not written to {output_file}")
+    else:
+        print(f"✓ Patched {output_file} ({len(edits)} edit(s), other items untouched)")
 
 def main():
     print("=" * 80)
@@ -1032,14 +713,8 @@ def main():
     circuit_dir = os.path.join(project_dir, "circuit")
     output_file = os.path.join(circuit_dir, "RTS_FanControl.kicad_sch")
     
-    # Generate the schematic
-    schematic_content = generate_improved_schematic()
-    
-    # Write to file
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(schematic_content)
+    save_schematic(build_schematic(), output_file, sys.argv[1:])
     
-    print(f"✓ Updated schematic saved to: {output_file}")
     print()
     print("Open the schematic in KiCad to view the improvements!")
     print("=" * 80)